@@ -0,0 +1,68 @@
+"""
+Compare the single-pass extraction of Translator.__create_xyz_points
+with the former two-pass implementation (np.where + np.extract), in
+time and peak memory.
+
+Usage: python benchmarks/extraction.py [--size 10000] [--nodata-ratio 0.3]
+"""
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+from lidario import Translator
+
+
+def legacy_xyz_points(raster, no_data=-9999):
+    """Former implementation: two masks, two scans of the raster."""
+    y, x = np.where(raster != no_data)
+    z = np.extract(raster != no_data, raster)
+
+    return x, y, z
+
+
+def single_pass_xyz_points(raster, no_data=-9999):
+    """Current implementation: one mask, one scan of the raster."""
+    mask = Translator._Translator__create_mask(raster, no_data)
+
+    return Translator._Translator__create_xyz_points(raster, mask)
+
+
+def measure(function, raster, no_data, repeat):
+    """Return the best time (s) and the peak memory (MiB) of a function."""
+
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(raster, no_data)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    function(raster, no_data)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return best, peak / 2 ** 20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--size", type=int, default=10000)
+    parser.add_argument("--nodata-ratio", type=float, default=0.3)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    # Synthetic float32 raster, with a share of no data pixels
+    rng = np.random.default_rng(0)
+    raster = rng.random((args.size, args.size), dtype=np.float32)
+    raster[raster < args.nodata_ratio] = -9999
+
+    print(f"{args.size}x{args.size} raster, {args.nodata_ratio:.0%} of no data")
+    for name, function in (("legacy", legacy_xyz_points),
+                           ("single-pass", single_pass_xyz_points)):
+        seconds, peak = measure(function, raster, -9999, args.repeat)
+        print(f"{name:>12}: {seconds:7.3f} s, peak {peak:8.1f} MiB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""
+Measure the import time of the entry points of lidario with
+"python -X importtime", and list the heavy dependencies they import.
+Give a git reference to compare with the lidario of this commit.
+
+Usage: python benchmarks/import_time.py [--repeat 5] [--ref HEAD~1]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tarfile
+import tempfile
+from io import BytesIO
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ENTRY_POINTS = [
+    "import lidario",
+    "from lidario import MetadataReader",
+    "from lidario import Translator",
+    "from lidario.io import OutputHandler",
+]
+
+HEAVY_MODULES = ("pandas", "plyfile", "rasterio", "pyarrow")
+
+
+def import_time(statement, path):
+    """
+    Run a statement in a new interpreter, and return its import time (s)
+    with the heavy modules it imported. The modules imported at the
+    startup of the interpreter are not counted.
+    """
+
+    env = dict(os.environ, PYTHONPATH=path)
+    stderr = subprocess.run([sys.executable, "-X", "importtime", "-c", statement],
+                            env=env, cwd=path, capture_output=True, text=True,
+                            check=True).stderr
+
+    total, modules = 0, set()
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+
+        _, cumulative, name = line.split("|")
+        modules.add(name.strip().split(".")[0])
+
+        # Top-level imports only: their time includes the nested imports
+        if not name.startswith("  "):
+            total += int(cumulative)
+
+    return total / 1e6, sorted(modules.intersection(HEAVY_MODULES))
+
+
+def measure(path, repeat):
+    """Return the best import time and heavy modules of each entry point."""
+
+    baseline = min(import_time("pass", path)[0] for _ in range(repeat))
+    results = {}
+
+    for statement in ENTRY_POINTS:
+        runs = [import_time(statement, path) for _ in range(repeat)]
+        results[statement] = (min(seconds for seconds, _ in runs) - baseline, runs[0][1])
+
+    return results
+
+
+def extract(ref, directory):
+    """Extract the lidario package of a git reference to a directory."""
+
+    archive = subprocess.run(["git", "archive", ref, "lidario"], cwd=ROOT,
+                             capture_output=True, check=True).stdout
+
+    with tarfile.open(fileobj=BytesIO(archive)) as tar:
+        tar.extractall(directory)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--ref", help="Git reference to compare with")
+    args = parser.parse_args()
+
+    current = measure(ROOT, args.repeat)
+
+    previous = None
+    if args.ref:
+        with tempfile.TemporaryDirectory() as directory:
+            extract(args.ref, directory)
+            previous = measure(directory, args.repeat)
+
+    for statement, (seconds, modules) in current.items():
+        line = f"{statement:>38}: {seconds * 1000:7.1f} ms"
+
+        if previous:
+            before, before_modules = previous[statement]
+            line += f" (was {before * 1000:7.1f} ms, x{before / seconds:4.1f})"
+            modules = f"{', '.join(modules) or '-'} (was {', '.join(before_modules) or '-'})"
+        else:
+            modules = ", ".join(modules) or "-"
+
+        print(f"{line}, imports: {modules}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,226 @@
+"""
+Benchmark Translator.translate for each input type, output type and
+out_format, on a synthetic GeoTIFF. Measure the best time, the peak
+memory (tracemalloc) and the size of the saved files, and write the
+results to a JSON file. Give the JSON file of a previous run to compare
+the two runs (ie: between two commits). Runs offline.
+
+Usage: python benchmarks/suite.py [--size 2000] [--nodata-ratio 0.3]
+                                  [--outputs csv las ...] [--chunked]
+                                  [--json results.json] [--compare base.json]
+"""
+import argparse
+import glob
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import rasterio
+import rasterio.mask
+from affine import Affine
+from lidario import Translator
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+
+# Output types, with the out_format values to benchmark
+OUTPUTS = {
+    "csv": [None, "gzip"],
+    "xyz": [None, "gzip"],
+    "ply": ["binary", "ascii"],
+    "las": ["1.2", "1.4"],
+    "npy": [None, "structured"],
+    "parquet": ["snappy", "zstd", "none"],
+    "arrow": [None],
+    "pointcloud": [None],
+    "numpy": [None],
+    "dataframe": [None],
+    "dictionary": [None],
+    "list": [None],
+    "tuple": [None],
+}
+
+# The outputs which need pyarrow
+ARROW_OUTPUTS = ("arrow", "parquet")
+
+
+def make_geotiff(path, size, nodata_ratio, dtype="float32", seed=0):
+    """
+    Write a tiled GeoTIFF of size x size pixels of random values, with a
+    share of "nodata_ratio" no data pixels.
+    """
+
+    rng = np.random.default_rng(seed)
+    raster = (rng.random((size, size)) * 1000).astype(dtype)
+    raster[rng.random((size, size)) < nodata_ratio] = -9999
+
+    profile = dict(driver="GTiff", height=size, width=size, count=1, dtype=dtype,
+                   nodata=-9999, crs="EPSG:32631", tiled=True, blockxsize=256,
+                   blockysize=256, transform=Affine(0.5, 0, 600000, 0, -0.5, 5700000))
+
+    with rasterio.open(path, "w", **profile) as dataset:
+        dataset.write(raster, 1)
+
+
+def load_mask(path):
+    """Return the rasterio.mask.mask result of the whole GeoTIFF."""
+
+    with rasterio.open(path) as dataset:
+        left, bottom, right, top = dataset.bounds
+        shape = {"type": "Polygon", "coordinates": [[
+            (left, bottom), (right, bottom), (right, top), (left, top), (left, bottom)]]}
+
+        return rasterio.mask.mask(dataset, [shape], crop=True, nodata=-9999)
+
+
+def measure(function, repeat):
+    """
+    Return the best time (s) of a function, and its peak memory (MiB)
+    in a separate run: tracemalloc slows down the allocations.
+    """
+
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return best, peak / 2 ** 20
+
+
+def run_case(input_type, input_values, output_type, out_format, out_dir, args):
+    """Benchmark a translation, and return its results as a dictionary."""
+
+    translator = Translator(input_type, output_type)
+    out_file = os.path.join(out_dir, f"{input_type}_{output_type}_{out_format}")
+
+    def translate():
+        return translator.translate(input_values, out_file, out_format,
+                                    chunked=args.chunked)
+
+    seconds, peak = measure(translate, args.repeat)
+
+    # Size of the saved files (the point cloud, and its index)
+    file_size = sum(os.path.getsize(name) for name in glob.glob(out_file + ".*"))
+
+    return {
+        "input_type": input_type,
+        "output_type": output_type,
+        "out_format": out_format,
+        "chunked": args.chunked,
+        "seconds": seconds,
+        "peak_mib": peak,
+        "points_per_second": args.points / seconds,
+        "file_size": file_size,
+    }
+
+
+def environment(args):
+    """Return the settings of the run and the versions of the libraries."""
+
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"],
+                                cwd=os.path.dirname(os.path.abspath(__file__)),
+                                capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        "commit": commit,
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "rasterio": rasterio.__version__,
+        "pyarrow": pyarrow.__version__ if pyarrow else None,
+        "size": args.size,
+        "nodata_ratio": args.nodata_ratio,
+        "points": args.points,
+        "repeat": args.repeat,
+    }
+
+
+def compare(results, base_file):
+    """Print the time and memory ratios of the results to a previous run."""
+
+    with open(base_file) as file:
+        base = json.load(file)
+
+    key = lambda case: (case["input_type"], case["output_type"],
+                        case["out_format"], case["chunked"])
+    base_cases = {key(case): case for case in base["results"]}
+
+    print(f"\nCompared to {base_file} (commit {base['environment']['commit']}):")
+    for case in results:
+        previous = base_cases.get(key(case))
+        if previous is None:
+            continue
+
+        print(f"{case['input_type']:>8} {case['output_type']:>10} {str(case['out_format']):>10}: "
+              f"time x{case['seconds'] / previous['seconds']:5.2f}, "
+              f"peak x{case['peak_mib'] / max(previous['peak_mib'], 1e-9):5.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--size", type=int, default=2000)
+    parser.add_argument("--nodata-ratio", type=float, default=0.3)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--inputs", nargs="+", default=["geotiff", "mask"],
+                        choices=["geotiff", "mask"])
+    parser.add_argument("--outputs", nargs="+", default=list(OUTPUTS),
+                        choices=list(OUTPUTS))
+    parser.add_argument("--chunked", action="store_true",
+                        help="Translate window by window")
+    parser.add_argument("--json", default="benchmark.json",
+                        help="File to write the results to")
+    parser.add_argument("--compare", help="JSON file of a previous run")
+    args = parser.parse_args()
+
+    outputs = [output for output in args.outputs
+               if pyarrow is not None or output not in ARROW_OUTPUTS]
+
+    results = []
+
+    with tempfile.TemporaryDirectory() as out_dir:
+        tif = os.path.join(out_dir, "synthetic.tif")
+        make_geotiff(tif, args.size, args.nodata_ratio)
+
+        inputs = {"geotiff": tif, "mask": load_mask(tif)}
+        args.points = Translator("geotiff", "numpy").count_points(tif)
+
+        print(f"{args.size}x{args.size} raster, {args.nodata_ratio:.0%} of no data, "
+              f"{args.points} points")
+
+        for input_type in args.inputs:
+            for output_type in outputs:
+                for out_format in OUTPUTS[output_type]:
+                    case = run_case(input_type, inputs[input_type], output_type,
+                                    out_format, out_dir, args)
+                    results.append(case)
+
+                    print(f"{input_type:>8} {output_type:>10} {str(out_format):>10}: "
+                          f"{case['seconds']:7.3f} s, peak {case['peak_mib']:8.1f} MiB, "
+                          f"{case['points_per_second'] / 1e6:6.2f} M points/s")
+
+    with open(args.json, "w") as file:
+        json.dump({"environment": environment(args), "results": results}, file, indent=2)
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
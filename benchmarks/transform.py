@@ -0,0 +1,76 @@
+"""
+Compare the time and peak memory of the points creation and affine
+geo-transformation of the Translator, with the former implementation
+(int64 indices, float64 temporaries), in float64 and float32.
+
+Usage: python benchmarks/transform.py [--size 10000] [--nodata-ratio 0.3] [--rotated]
+"""
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+from affine import Affine
+from lidario import Translator
+
+
+def legacy_translate(raster, transform, no_data=-9999):
+    """Former implementation of the points creation and transformation."""
+    y, x = np.where(raster != no_data)
+    z = np.extract(raster != no_data, raster)
+
+    gtr = transform
+    gtr_x = gtr[2] + (x + 0.5) * gtr[0] + (y + 0.5) * gtr[1]
+    gtr_y = gtr[5] + (x + 0.5) * gtr[3] + (y + 0.5) * gtr[4]
+
+    return gtr_x, gtr_y, z
+
+
+def translator(dtype):
+    """Translate the raster in a single window, without saving it."""
+    def translate(raster, transform):
+        return next(Translator("mask", "np").translate_iter(
+            (raster, transform), dtype=dtype))
+
+    return translate
+
+
+def measure(function, raster, transform):
+    """Return the time (s) and the peak memory (MiB) of a function."""
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    function(raster, transform)
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return seconds, peak / 2 ** 20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--size", type=int, default=10000)
+    parser.add_argument("--nodata-ratio", type=float, default=0.3)
+    parser.add_argument("--rotated", action="store_true")
+    args = parser.parse_args()
+
+    # Synthetic float32 raster, with a share of no data pixels
+    rng = np.random.default_rng(0)
+    raster = rng.random((args.size, args.size), dtype=np.float32)
+    raster[raster < args.nodata_ratio] = -9999
+
+    rotation = 0.1 if args.rotated else 0.0
+    transform = Affine(1.0, rotation, 150000.0, rotation, -1.0, 170000.0)
+
+    print(f"{args.size}x{args.size} raster, {args.nodata_ratio:.0%} of no data, "
+          f"{'rotated' if args.rotated else 'north-up'}")
+    for name, function in (("legacy", legacy_translate),
+                           ("float64", translator("float64")),
+                           ("float32", translator("float32"))):
+        seconds, peak = measure(function, raster, transform)
+        print(f"{name:>8}: {seconds:7.3f} s, peak {peak:8.1f} MiB")
+
+
+if __name__ == '__main__':
+    main()
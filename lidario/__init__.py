@@ -1,3 +1,5 @@
 
 from lidario.translator import Translator
+from lidario.rasterizer import Rasterizer
 from lidario.metadata_reader import MetadataReader
+from lidario.io import DatasetCache, PointCloud, ResultCache
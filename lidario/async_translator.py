@@ -0,0 +1,259 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import rasterio
+from lidario.batch import TileResult, _out_file
+from lidario.translator import Translator
+
+
+def _run_in_env(function, *args, **kwargs):
+    """
+    Run a function of a task of the pool in a GDAL environment, exited
+    with the task: the threads of the pool do not keep any environment.
+    """
+    with rasterio.Env():
+        return function(*args, **kwargs)
+
+
+class AsyncTranslator:
+    """
+    Asyncio interface of a Translator, for the services which run an event
+    loop (ie: aiohttp). The translations run in a pool of threads owned
+    by the AsyncTranslator: the rasterio reads and the numpy stages
+    release the GIL, and the event loop is never blocked.
+
+    The number of translations submitted to the pool is bounded: beyond
+    "max_pending", the callers wait for a free slot without blocking the
+    loop. A cancelled call gives up its translation if it has not started
+    yet. A running translation can not be interrupted: its slot is freed
+    when it ends. Use an AsyncTranslator from a single event loop, and
+    close it (or use it as an async context manager) to stop its threads.
+
+    :param input_type: Type of raster data provided. See lidario.Translator.
+    :param output_type: Type of point cloud data to return. See
+        lidario.Translator.
+    :param affine_transform: If True (default), apply an affine
+        geo-transformation to the translated coordinates.
+    :param metadata: If True, return a tuple with the point cloud and the
+        metadata. Default: False.
+    :param result_cache: A lidario.ResultCache, to restore the unchanged
+        translations. See lidario.Translator. Default: None.
+    :param max_workers: Number of threads translating at once. Default:
+        the number of CPUs, at most 8.
+    :param max_pending: Maximum number of translations running or waiting
+        for a thread. Default: twice the number of threads.
+
+    :type input_type: str
+    :type output_type: str
+    :type affine_transform: bool, optional
+    :type metadata: bool, optional
+    :type result_cache: lidario.ResultCache, optional
+    :type max_workers: int, optional
+    :type max_pending: int, optional
+    """
+
+    def __init__(self, input_type, output_type, affine_transform=True, metadata=False,
+                 result_cache=None, max_workers=None, max_pending=None):
+
+        self.input_type = input_type
+        self.output_type = output_type
+        self.affine_transform = affine_transform
+        self.return_metadata = metadata
+        self.result_cache = result_cache
+
+        self.max_workers = max_workers or min(8, os.cpu_count() or 1)
+        self.max_pending = max_pending or 2 * self.max_workers
+        self.executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix="lidario")
+
+        # Created in the event loop, on the first call
+        self.__slots = None
+        self.__pending = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    @property
+    def pending(self) -> int:
+        """Number of translations running or waiting for a thread."""
+        return self.__pending
+
+    async def translate(self, input_values, out_file="output1.csv", **kwargs):
+        """
+        Translate a given "input_values" into a X, Y, Z point cloud, in a
+        thread of the pool.
+
+        :param input_values: Data values to translate. See
+            lidario.Translator.translate.
+        :param out_file: Name of the file to save the point cloud to, if
+            the "output_type" is a file type. See lidario.Translator.translate.
+        :param kwargs: Other keyword arguments of lidario.Translator.translate:
+            out_format, no_data, decimal, band, window_size, bounds...
+
+        :return: The point cloud, see lidario.Translator.translate.
+        """
+
+        return await self.__run(self.__translator().translate, input_values,
+                                out_file, **kwargs)
+
+    async def count_points(self, input_values, **kwargs) -> int:
+        """
+        Count the points a translation would produce, in a thread of the
+        pool. See lidario.Translator.count_points.
+
+        :return: The number of points.
+        :rtype: int
+        """
+
+        return await self.__run(self.__translator().count_points, input_values, **kwargs)
+
+    async def translate_iter(self, input_values, **kwargs):
+        """
+        Translate a given "input_values" window by window, and yield a
+        batch of points for each of them. Each window is read and
+        translated in a thread of the pool when the caller asks for it:
+        a slow consumer does not pile up the batches in memory.
+
+        :param input_values: Data values to translate. See
+            lidario.Translator.translate_iter.
+        :param kwargs: Other keyword arguments of
+            lidario.Translator.translate_iter: no_data, window_size, ...
+
+        :return: An async generator of (x, y, z) tuples of np.array.
+        """
+
+        batches = await self.__run(self.__translator().translate_iter, input_values, **kwargs)
+
+        # A generator can not run in two threads at once
+        lock = threading.Lock()
+
+        def next_batch():
+            with lock:
+                return next(batches, None)
+
+        def close():
+            with lock:
+                batches.close()
+
+        try:
+            while True:
+                points = await self.__run(next_batch)
+                if points is None:
+                    break
+
+                yield points
+
+        finally:
+            # Close the raster once the running window, if any, is done
+            try:
+                self.executor.submit(_run_in_env, close)
+            except RuntimeError:
+                close()
+
+    async def translate_many(self, inputs, out_dir=".", progress=None, **kwargs):
+        """
+        Translate many tiles concurrently, within the bounds of the pool.
+        Cancel the call to give up the tiles not translated yet.
+
+        :param inputs: Iterable of data values to translate (ie: paths of
+            .tif files).
+        :param out_dir: Directory where the point clouds are saved, if the
+            "output_type" is a file type. Each file is named after its
+            input file. Default: current directory.
+        :param progress: Callable, called in the event loop with
+            (tile_result, done, total) each time a tile is translated.
+        :param kwargs: Other keyword arguments of lidario.Translator.translate.
+
+        :type inputs: iterable
+        :type out_dir: str, optional
+        :type progress: callable, optional
+
+        :return: A list of lidario.batch.TileResult, in the order of the
+            given inputs. A tile which failed has its exception in "error".
+        :rtype: list
+        """
+
+        inputs = list(inputs)
+        done = 0
+
+        async def translate_tile(index, input_values):
+            nonlocal done
+            out_file = _out_file(out_dir, index, input_values)
+
+            try:
+                result = await self.translate(input_values, out_file, **kwargs)
+                tile = TileResult(index, input_values, out_file, result, None, None)
+
+            except asyncio.CancelledError:
+                raise
+
+            except Exception as error:
+                tile = TileResult(index, input_values, out_file, None, error, None)
+
+            done += 1
+            if progress is not None:
+                progress(tile, done, len(inputs))
+
+            return tile
+
+        # Cancelling the gather cancels the tiles
+        return await asyncio.gather(*(translate_tile(index, input_values)
+                                      for index, input_values in enumerate(inputs)))
+
+    async def close(self) -> None:
+        """
+        Wait for the running translations, and stop the threads of the
+        pool, without blocking the event loop.
+        """
+
+        await asyncio.get_running_loop().run_in_executor(None, self.executor.shutdown)
+
+    def __translator(self):
+        """Create a Translator: the translations do not share any state."""
+
+        return Translator(self.input_type, self.output_type, self.affine_transform,
+                          self.return_metadata, result_cache=self.result_cache)
+
+    async def __run(self, function, *args, **kwargs):
+        """
+        Run a blocking function in the pool, once the number of pending
+        translations is below "max_pending".
+        """
+
+        loop = asyncio.get_running_loop()
+
+        if self.__slots is None:
+            self.__slots = asyncio.Semaphore(self.max_pending)
+
+        slots = self.__slots
+        await slots.acquire()
+
+        try:
+            future = self.executor.submit(_run_in_env, function, *args, **kwargs)
+        except BaseException:
+            slots.release()
+            raise
+
+        self.__pending += 1
+
+        def release(_):
+            try:
+                loop.call_soon_threadsafe(self.__release, slots)
+            except RuntimeError:
+                # The event loop is closed
+                pass
+
+        # Free the slot when the function ends, not when the caller gives up
+        future.add_done_callback(release)
+
+        return await asyncio.wrap_future(future)
+
+    def __release(self, slots):
+        """Free the slot of an ended translation."""
+
+        self.__pending -= 1
+        slots.release()
@@ -0,0 +1,172 @@
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from functools import lru_cache
+
+
+TileResult = namedtuple("TileResult", ["index", "input_values", "out_file",
+                                       "result", "error", "stats"])
+TileResult.__doc__ = """
+Result of the translation of a tile by "translate_many".
+
+- index: Position of the tile in the given inputs.
+- input_values: The translated input values (ie: the path of the tile).
+- out_file: Name of the file where the tile is saved (without extension).
+- result: The value returned by Translator.translate, None if it failed.
+- error: The exception raised by the translation, None if it succeeded.
+- stats: The stats of the translation if the Translator is profiled, else None.
+"""
+
+
+@lru_cache(maxsize=8)
+def _get_translator(input_type, output_type, affine_transform, metadata, profile):
+    """Create a Translator once per worker process and settings."""
+    from lidario.translator import Translator
+
+    return Translator(input_type, output_type, affine_transform=affine_transform,
+                      metadata=metadata, profile=profile)
+
+
+def _translate_tile(settings, index, input_values, out_file, kwargs):
+    """
+    Translate a tile in a worker process. Each worker opens its own
+    rasterio handles. Errors are returned instead of being raised, to
+    not stop the other translations.
+
+    :return: A TileResult.
+    """
+    try:
+        translator = _get_translator(*settings)
+        result = translator.translate(input_values, out_file, **kwargs)
+
+    except Exception as error:
+        return TileResult(index, input_values, out_file, None, error, None)
+
+    return TileResult(index, input_values, out_file, result, None, translator.stats)
+
+
+def _out_file(out_dir, index, input_values):
+    """Name the output of a tile after its file, or after its index."""
+
+    if isinstance(input_values, (str, os.PathLike)):
+        name = os.path.splitext(os.path.basename(input_values))[0]
+    else:
+        name = f"tile_{index}"
+
+    return os.path.join(out_dir, name)
+
+
+def iter_translate_many(settings, inputs, out_dir=".", workers=None,
+                        max_in_flight=None, progress=None, restore=None, store=None,
+                        **kwargs):
+    """
+    Translate many tiles over a pool of processes, and yield their
+    TileResult in the order of the given inputs.
+
+    :param settings: Tuple of the Translator settings: (input_type,
+        output_type, affine_transform, metadata, profile).
+    :param inputs: Iterable of input values (ie: paths of tif files).
+    :param out_dir: Directory where the file outputs are saved.
+    :param workers: Number of processes. Default: the number of CPUs. With
+        a single worker, the tiles are translated in the current process.
+    :param max_in_flight: Maximum number of tiles submitted and not yet
+        yielded, to cap the memory used by the pending results.
+        Default: twice the number of workers.
+    :param progress: Callable, called with (tile_result, done, total)
+        each time a tile is translated.
+    :param restore: Callable, called with (index, input_values, out_file)
+        in the current process before the translation of a tile. If it
+        returns a TileResult, the tile is not translated.
+    :param store: Callable, called with the TileResult of each tile
+        translated without error, in the current process.
+    :param kwargs: Keyword arguments of Translator.translate.
+
+    :return: A generator of TileResult.
+    """
+
+    inputs = list(inputs)
+    total = len(inputs)
+
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = max(max_in_flight or 2 * workers, 1)
+
+    # No pool for a single worker: nothing to pickle between processes
+    if workers == 1:
+        for index, input_values in enumerate(inputs):
+            out_file = _out_file(out_dir, index, input_values)
+            tile = restore(index, input_values, out_file) if restore else None
+
+            if tile is None:
+                tile = _translate_tile(settings, index, input_values, out_file, kwargs)
+
+                if store is not None and tile.error is None:
+                    store(tile)
+
+            if progress is not None:
+                progress(tile, index + 1, total)
+
+            yield tile
+
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+
+        pending = {}
+        finished = {}
+        submitted = 0
+        done = 0
+
+        for index in range(total):
+
+            # Fill the pool, up to the maximum number of tiles in flight
+            while submitted < total and len(pending) + len(finished) < max_in_flight:
+                input_values = inputs[submitted]
+                out_file = _out_file(out_dir, submitted, input_values)
+                tile = restore(submitted, input_values, out_file) if restore else None
+
+                # Already translated
+                if tile is not None:
+                    finished[submitted] = tile
+
+                    done += 1
+                    if progress is not None:
+                        progress(tile, done, total)
+
+                else:
+                    future = executor.submit(_translate_tile, settings, submitted,
+                                             input_values, out_file, kwargs)
+                    pending[future] = submitted
+
+                submitted += 1
+
+            # Wait until the next tile, in input order, is translated
+            while index not in finished:
+                completed, _ = wait(pending, return_when=FIRST_COMPLETED)
+
+                for future in completed:
+                    tile = future.result()
+                    finished[pending.pop(future)] = tile
+
+                    if store is not None and tile.error is None:
+                        store(tile)
+
+                    done += 1
+                    if progress is not None:
+                        progress(tile, done, total)
+
+            yield finished.pop(index)
+
+
+def translate_many(settings, inputs, out_dir=".", workers=None,
+                   max_in_flight=None, progress=None, restore=None, store=None,
+                   **kwargs):
+    """
+    Translate many tiles over a pool of processes. See
+    "iter_translate_many" for the parameters.
+
+    :return: A list of TileResult, in the order of the given inputs.
+    :rtype: list
+    """
+
+    return list(iter_translate_many(settings, inputs, out_dir, workers,
+                                    max_in_flight, progress, restore, store, **kwargs))
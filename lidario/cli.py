@@ -0,0 +1,210 @@
+"""
+Command-line interface of lidario: translate tif files to point cloud
+files.
+
+Usage: lidario INPUT [INPUT ...] [-t OUTPUT_TYPE] [-o OUT_DIR] [--workers N]
+                                 [--chunk-size N] [--dtype float32] [--skip-existing]
+                                 [--cache-dir DIR] [--cache-size MB]
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+from lidario.batch import _out_file
+from lidario.io import ResultCache
+from lidario.io.output_handler import output_extension
+from lidario.translator import Translator
+
+
+# Output types of the command
+OUTPUT_TYPES = ["csv", "xyz", "ply", "las", "npy", "parquet"]
+
+# Extensions of the tif files searched in the given directories
+TIF_EXTENSIONS = (".tif", ".tiff")
+
+
+def find_inputs(patterns):
+    """
+    Expand the given files, directories and glob patterns into a sorted
+    list of tif files. A directory gives the tif files it contains. The
+    outputs are named after the files: a ValueError is raised if files
+    of different directories have the same name.
+
+    :param patterns: Paths of files or directories, or glob patterns.
+    :type patterns: list
+
+    :return: A tuple of (paths of the tif files, without duplicates,
+        patterns which match no file).
+    :rtype: tuple
+    """
+
+    paths, unmatched = [], []
+
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            matches = [os.path.join(pattern, name) for name in sorted(os.listdir(pattern))
+                       if name.lower().endswith(TIF_EXTENSIONS)]
+
+        elif os.path.exists(pattern):
+            matches = [pattern]
+
+        else:
+            matches = sorted(glob.glob(pattern))
+
+        if not matches:
+            unmatched.append(pattern)
+
+        paths.extend(matches)
+
+    # Keep the first occurrence of each file, however it is spelled
+    files = {}
+    for path in paths:
+        files.setdefault(os.path.realpath(path), path)
+
+    paths = list(files.values())
+
+    # The same output for different files
+    names = {}
+    for path in paths:
+        names.setdefault(os.path.normcase(_out_file("", 0, path)), []).append(path)
+
+    collisions = [group for group in names.values() if len(group) > 1]
+    if collisions:
+        raise ValueError("files of the same name would be saved to the same output: "
+                         + "; ".join(", ".join(group) for group in collisions))
+
+    return paths, unmatched
+
+
+def output_path(out_dir, index, input_values, output_type, out_format=None):
+    """Return the path of the file saved for a tile."""
+
+    return _out_file(out_dir, index, input_values) + output_extension(output_type, out_format)
+
+
+def create_parser():
+    """Create the parser of the command-line arguments."""
+
+    parser = argparse.ArgumentParser(
+        prog="lidario", description="Translate tif files to point cloud files.")
+
+    parser.add_argument("inputs", nargs="+", metavar="INPUT",
+                        help="tif file, directory of tif files, or glob pattern")
+    parser.add_argument("-t", "--output-type", default="csv", choices=OUTPUT_TYPES,
+                        help="type of the point cloud files (default: csv)")
+    parser.add_argument("-f", "--format", dest="out_format",
+                        help="format of the files: gzip (csv, xyz), ascii (ply), "
+                             "1.4 (las), structured (npy), or a parquet codec")
+    parser.add_argument("-o", "--out-dir", default=".",
+                        help="directory of the point cloud files (default: .)")
+    parser.add_argument("-w", "--workers", type=int, default=1,
+                        help="number of processes (default: 1)")
+    parser.add_argument("--chunk-size", type=int,
+                        help="translate the rasters by windows of this size, "
+                             "to bound the memory usage")
+    parser.add_argument("--dtype", choices=["float32", "float64"],
+                        help="float type of the coordinates (default: float64)")
+    parser.add_argument("--skip-existing", action="store_true",
+                        help="do not translate the tiles whose file exists")
+    parser.add_argument("--cache-dir",
+                        help="cache the point cloud files in this directory, and "
+                             "restore the files of the unchanged tiles from it")
+    parser.add_argument("--cache-size", type=float,
+                        help="maximum size of the cache, in MB (default: unbounded)")
+    parser.add_argument("--no-data", type=float,
+                        help="value to exclude (default: the nodata of the tif file)")
+    parser.add_argument("--decimal", type=int,
+                        help="round the coordinates to this decimal")
+    parser.add_argument("--band", type=int, nargs="+", default=[1],
+                        help="band(s) to translate (default: 1)")
+    parser.add_argument("-q", "--quiet", action="store_true",
+                        help="only print the summary")
+
+    return parser
+
+
+def main(argv=None):
+    """
+    Run the command-line interface.
+
+    :param argv: The command-line arguments. Default: sys.argv[1:].
+
+    :return: The exit code: 0, or 1 if a tile failed, an input matched
+        no file, or inputs have the same name.
+    :rtype: int
+    """
+
+    args = create_parser().parse_args(argv)
+
+    try:
+        inputs, unmatched = find_inputs(args.inputs)
+    except ValueError as error:
+        print(f"lidario: {error}", file=sys.stderr)
+        return 1
+
+    skipped = 0
+
+    for pattern in unmatched:
+        print(f"lidario: no tif file matches '{pattern}'", file=sys.stderr)
+
+    if args.skip_existing:
+        pending = [path for index, path in enumerate(inputs) if not os.path.exists(
+            output_path(args.out_dir, index, path, args.output_type, args.out_format))]
+        skipped = len(inputs) - len(pending)
+        inputs = pending
+
+    os.makedirs(args.out_dir, exist_ok=True)
+
+    result_cache = None
+    if args.cache_dir is not None:
+        max_size = int(args.cache_size * 1e6) if args.cache_size is not None else None
+        result_cache = ResultCache(args.cache_dir, max_size)
+
+    # Profile the time only, to count the points without slowing down
+    translator = Translator("geotiff", args.output_type, profile="time",
+                            result_cache=result_cache)
+
+    kwargs = dict(out_format=args.out_format, no_data=args.no_data,
+                  decimal=args.decimal, dtype=args.dtype,
+                  band=args.band[0] if len(args.band) == 1 else args.band,
+                  chunked=args.chunk_size is not None, window_size=args.chunk_size)
+
+    def progress(tile, done, total):
+        if args.quiet:
+            return
+
+        if tile.error is not None:
+            status = f"failed: {tile.error}"
+        elif tile.stats is None:
+            status = "restored from the cache"
+        else:
+            status = f"{tile.stats.get('points', {}).get('points', 0)} points, " \
+                     f"{tile.stats['total']['seconds']:.2f} s"
+
+        print(f"[{done}/{total}] {tile.input_values}: {status}", file=sys.stderr)
+
+    start = time.perf_counter()
+    results = translator.translate_many(inputs, args.out_dir, args.workers,
+                                        progress=progress, **kwargs)
+    seconds = max(time.perf_counter() - start, 1e-9)
+
+    # Throughput of the translated tiles, the cached ones excluded
+    translated = [tile for tile in results if tile.error is None and tile.stats is not None]
+    cached = sum(1 for tile in results if tile.error is None and tile.stats is None)
+    failed = len(results) - len(translated) - cached
+
+    points = sum(tile.stats.get('points', {}).get('points', 0) for tile in translated)
+    megabytes = sum(os.path.getsize(tile.input_values) for tile in translated) / 1e6
+
+    print(f"{len(translated)} tiles translated ({failed} failed, {skipped} skipped, "
+          f"{cached} cached), "
+          f"{points} points in {seconds:.2f} s: {points / seconds:,.0f} points/s, "
+          f"{megabytes / seconds:.1f} MB/s", file=sys.stderr)
+
+    return 1 if failed or unmatched else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,3 +1,7 @@
 
 from lidario.io.input_handler import InputHandler
 from lidario.io.output_handler import OutputHandler
+from lidario.io.dataset_cache import DatasetCache
+from lidario.io.point_cloud import PointCloud
+from lidario.io.result_cache import ResultCache
+from lidario.io.point_reader import PointReader
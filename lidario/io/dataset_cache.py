@@ -0,0 +1,149 @@
+import os
+import threading
+from collections import OrderedDict
+
+import rasterio
+
+
+class DatasetCache:
+    """
+    Least recently used cache of open rasterio datasets, with memoized
+    metadata. Share it between Translator and MetadataReader objects to
+    open each file once, instead of on every call.
+
+    A dataset is reopened when its file is modified. The least recently
+    used datasets are closed when the cache is full. Use the cache as a
+    context manager, or call "close", to close all the datasets.
+
+    Rasterio datasets are not thread-safe: do not read the same dataset
+    from several threads at once.
+
+    :param maxsize: Maximum number of datasets kept open. Default: 16.
+    :param metadata_maxsize: Maximum number of memoized metadata.
+        Default: 1024.
+
+    :type maxsize: int, optional
+    :type metadata_maxsize: int, optional
+    """
+
+    def __init__(self, maxsize=16, metadata_maxsize=1024):
+
+        self.maxsize = maxsize
+        self.metadata_maxsize = metadata_maxsize
+
+        # path: (mtime, dataset) and (path, mtime): metadata
+        self.__datasets = OrderedDict()
+        self.__metadata = OrderedDict()
+
+        self.__lock = threading.RLock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self):
+        return len(self.__datasets)
+
+    def __contains__(self, path):
+        return os.fspath(path) in self.__datasets
+
+    def open(self, path):
+        """
+        Return the open dataset of the given path, from the cache if
+        its file did not change.
+
+        :param path: Path of the raster file.
+        :type path: str
+
+        :return: A rasterio DatasetReader, owned by the cache: do not
+            close it.
+        """
+
+        path = os.fspath(path)
+        mtime = self.__mtime(path)
+
+        with self.__lock:
+            if path in self.__datasets:
+                cached_mtime, dataset = self.__datasets[path]
+
+                if cached_mtime == mtime and not dataset.closed:
+                    self.__datasets.move_to_end(path)
+                    return dataset
+
+                self.evict(path)
+
+            dataset = rasterio.open(path)
+            self.__datasets[path] = (mtime, dataset)
+
+            # Close the least recently used datasets
+            while len(self.__datasets) > self.maxsize:
+                _, (_, oldest) = self.__datasets.popitem(last=False)
+                oldest.close()
+
+            return dataset
+
+    def get_metadata(self, path) -> dict:
+        """
+        Return the metadata of the given path, memoized by path and
+        modification time.
+
+        :param path: Path of the raster file.
+        :type path: str
+
+        :return: A copy of the metadata dictionary of the dataset.
+        :rtype: dict
+        """
+
+        path = os.fspath(path)
+        key = (path, self.__mtime(path))
+
+        with self.__lock:
+            if key not in self.__metadata:
+                self.__metadata[key] = self.open(path).meta
+
+                while len(self.__metadata) > self.metadata_maxsize:
+                    self.__metadata.popitem(last=False)
+
+            self.__metadata.move_to_end(key)
+
+            return dict(self.__metadata[key])
+
+    def evict(self, path) -> None:
+        """
+        Close the dataset of the given path and forget its metadata.
+
+        :param path: Path of the raster file.
+        :type path: str
+        """
+
+        path = os.fspath(path)
+
+        with self.__lock:
+            if path in self.__datasets:
+                _, dataset = self.__datasets.pop(path)
+                dataset.close()
+
+            for key in [key for key in self.__metadata if key[0] == path]:
+                del self.__metadata[key]
+
+    def close(self) -> None:
+        """
+        Close all the datasets and forget all the metadata.
+        """
+
+        with self.__lock:
+            for _, dataset in self.__datasets.values():
+                dataset.close()
+
+            self.__datasets.clear()
+            self.__metadata.clear()
+
+    @staticmethod
+    def __mtime(path):
+        """Return the modification time of a file, None if it is not a file."""
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return None
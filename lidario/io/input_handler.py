@@ -1,23 +1,61 @@
 
+import math
+import os
+from contextlib import ExitStack, nullcontext
+
 import rasterio
+from affine import Affine
+from rasterio import features, windows
+from rasterio.enums import Resampling
+from rasterio.errors import WindowError
+from rasterio.features import geometry_mask
+from rasterio.io import MemoryFile
+from rasterio.vrt import WarpedVRT
+from rasterio.warp import reproject
+from rasterio.windows import Window
 import numpy as np
 
 
+# Placeholder CRS of the in-memory rasters resampled without CRS: the
+# same CRS on both sides, so only the grid changes
+RESAMPLING_CRS = "EPSG:3857"
+
+# Fraction of a pixel ignored when snapping bounds to whole pixels
+SNAP_TOLERANCE = 1e-6
+
+
 class InputHandler:
 
-    def __init__(self, input_type):
+    def __init__(self, input_type, cache=None):
         self.loader = self.__create_loader(input_type)
+        self.window_loader = self.__create_window_loader(input_type)
 
-    def load(self, raster, input_values, band=None):
+        # Optional DatasetCache of the open datasets and their metadata
+        self.cache = cache
+
+    def load(self, raster, input_values, band=None, **read):
         """
 
         :param raster: If True, return a tuple of (raster, metadata).
             If False, return only the metadata.
+        :param band: Band index, or list of band indexes. For a list, the
+            raster is of shape (bands, rows, cols).
+        :param read: Keyword arguments of "resampled_grid": decimate,
+            resolution, and the name of the "resampling" method. The
+            raster is read directly on the resampled grid, and the
+            metadata describes this grid. The resampling ignores the
+            "nodata" value if given, else the nodata of the metadata. For a tif file, the "bounds"
+            or "geometry" of "subset_window" too: only the window which
+            covers them is read, and the pixels outside of the geometry
+            are masked. For an in-memory "array" too: its subset and
+            bands are views of the array, unless it is resampled.
         """
         return self.loader(raster=raster,
                            input_raster=input_values,
                            rasterio_mask=input_values,
-                           band=band)
+                           band=self.__indexes(band),
+                           cache=self.cache,
+                           **read)
 
     def __create_loader(self, input_type):
 
@@ -28,14 +66,124 @@ class InputHandler:
             "tiff": self.__load_tif,
             "geotiff": self.__load_tif,
 
+            # In-memory tif files
+            "bytes": self.__load_tif,
+            "memoryfile": self.__load_tif,
+
             # Rasterio mask
             "mask": self.__load_rasterio_mask,
+
+            # Numpy array, with its affine transformation
+            "array": self.__load_array,
         }
 
         return loaders[input_type]
 
+    def load_windows(self, input_values, band=1, window_size=None, **read):
+        """
+        Open the given "input_values" and return its metadata, with a
+        generator of (raster, window) tuples. Only one window of the
+        raster is held in memory at a time.
+
+        :param window_size: Size of the windows to read, as an int (square
+            windows) or a (rows, cols) tuple. If None, use the internal
+            blocks of the dataset.
+        :param read: See "load". The windows are taken on the
+            resampled grid of the subset.
+
+        :return: A tuple of (metadata, windows generator).
+        """
+        return self.window_loader(input_values, band=self.__indexes(band),
+                                  window_size=window_size, cache=self.cache,
+                                  **read)
+
+    @staticmethod
+    def __indexes(band):
+        """Return the band indexes as rasterio reads them: an int or a list."""
+        return list(band) if isinstance(band, tuple) else band
+
+    def __create_window_loader(self, input_type):
+
+        window_loaders = {
+
+            # Tif files
+            "tif": self.__load_tif_windows,
+            "tiff": self.__load_tif_windows,
+            "geotiff": self.__load_tif_windows,
+
+            # In-memory tif files
+            "bytes": self.__load_tif_windows,
+            "memoryfile": self.__load_tif_windows,
+
+            # Rasterio mask
+            "mask": self.__load_rasterio_mask_windows,
+
+            # Numpy array, with its affine transformation
+            "array": self.__load_array_windows,
+        }
+
+        return window_loaders[input_type]
+
+    @staticmethod
+    def __open_tif(input_raster, cache=None):
+        """
+        Open a tif file with rasterio, or get it from the cache. An
+        in-memory tif file (bytes, or a rasterio MemoryFile) is read
+        through a MemoryFile, without any disk I/O, and is not cached.
+
+        :return: A tuple of (DatasetReader, context manager, metadata).
+            Without cache, the context manager closes the dataset on exit.
+        """
+
+        if not isinstance(input_raster, (str, os.PathLike)):
+            reader, context = InputHandler.__open_memory_file(input_raster)
+            metadata = reader.meta
+
+        elif cache is None:
+            reader = rasterio.open(input_raster)
+            context, metadata = reader, reader.meta
+
+        # The cache owns the dataset: do not close it
+        else:
+            reader = cache.open(input_raster)
+            context, metadata = nullcontext(), cache.get_metadata(input_raster)
+
+        # Set -9999 as default if nodata is None
+        if metadata['nodata'] is None:
+            metadata['nodata'] = -9999
+
+        return reader, context, metadata
+
+    @staticmethod
+    def __open_memory_file(input_raster):
+        """
+        Open the content of a tif file held in memory.
+
+        :param input_raster: A rasterio MemoryFile, owned by the caller,
+            the bytes of a tif file, or a binary file object. Another
+            buffer (ie: a bytearray) is copied to bytes first.
+
+        :return: A tuple of (DatasetReader, context manager). The context
+            manager closes the dataset, and the MemoryFile created for
+            the bytes.
+        """
+
+        context = ExitStack()
+
+        if isinstance(input_raster, MemoryFile):
+            memory_file = input_raster
+        else:
+            if isinstance(input_raster, (bytearray, memoryview)):
+                input_raster = bytes(input_raster)
+
+            memory_file = context.enter_context(MemoryFile(input_raster))
+
+        return context.enter_context(memory_file.open()), context
+
     @staticmethod
-    def __load_tif(raster=True, input_raster=None, band=1, **kwargs):
+    def __load_tif(raster=True, input_raster=None, band=1, cache=None,
+                   decimate=None, resolution=None, resampling="nearest",
+                   bounds=None, geometry=None, nodata=None, **kwargs):
         """
         Load a tif file with rasterio, return
 
@@ -46,24 +194,231 @@ class InputHandler:
         :return: a rasterio DatasetReader object.
         """
 
-        # Open the tiff file
-        reader = rasterio.open(input_raster)
+        # Only the metadata: skip the dataset if it is memoized
+        if not raster and cache is not None and isinstance(input_raster, (str, os.PathLike)):
+            metadata = cache.get_metadata(input_raster)
 
-        # Get the metadata
-        metadata = reader.meta
+            if metadata['nodata'] is None:
+                metadata['nodata'] = -9999
 
-        # Set -9999 as default if nodata is None
-        if metadata['nodata'] is None:
-            metadata['nodata'] = -9999
+            return InputHandler.__subset_metadata(
+                metadata, decimate, resolution, bounds, geometry)[1]
 
-        # If raster, return a tuple of (raster, metadata)
-        if raster:
-            return reader.read(band), metadata
+        # Open the tiff file, and get the metadata
+        reader, context, metadata = InputHandler.__open_tif(input_raster, cache)
+        source, metadata = InputHandler.__subset_metadata(
+            metadata, decimate, resolution, bounds, geometry)
+
+        with context:
+
+            # If raster, return a tuple of (raster, metadata), read on the
+            # resampled grid of the subset if asked
+            if raster:
+                window = Window(0, 0, metadata['width'], metadata['height'])
+                outside = InputHandler.__outside_geometry(geometry, metadata)
+
+                with InputHandler.__resampling_reader(reader, source, metadata,
+                                                      resampling, nodata) as reader:
+                    return InputHandler.__read_window(
+                        reader, band, source, window, metadata, resampling,
+                        outside), metadata
 
         return metadata
 
     @staticmethod
-    def __load_rasterio_mask(raster=True, rasterio_mask=None, **kwargs):
+    def __load_tif_windows(input_raster, band=1, window_size=None, cache=None,
+                           decimate=None, resolution=None, resampling="nearest",
+                           bounds=None, geometry=None, nodata=None):
+        """
+        Open a tif file with rasterio and return its metadata, with a
+        generator of windowed reads of the given band.
+
+        :return: A tuple of (metadata, windows generator).
+        """
+
+        # Open the tiff file, and get the metadata
+        reader, context, metadata = InputHandler.__open_tif(input_raster, cache)
+        source, metadata = InputHandler.__subset_metadata(
+            metadata, decimate, resolution, bounds, geometry)
+
+        height, width = metadata['height'], metadata['width']
+        resampled = (height, width) != (source.height, source.width)
+
+        # Walk the internal blocks, or a regular grid of the given size
+        if window_size is None and not resampled:
+            block_band = band[0] if isinstance(band, list) else band
+            windows = InputHandler.__block_windows(reader, block_band, source)
+        else:
+            windows = InputHandler._iter_windows(
+                height, width, window_size or reader.block_shapes[0])
+
+        # Rasterize the geometry once, on the whole grid: the windows
+        # mask the same pixels as a single read
+        outside = InputHandler.__outside_geometry(geometry, metadata)
+
+        def read_windows():
+            with context, InputHandler.__resampling_reader(
+                    reader, source, metadata, resampling, nodata) as resampling_reader:
+                for window in windows:
+                    yield InputHandler.__read_window(
+                        resampling_reader, band, source, window, metadata, resampling,
+                        outside), window
+
+        return metadata, read_windows()
+
+    @staticmethod
+    def __read_window(reader, band, source, window, metadata, resampling="nearest",
+                      outside=None):
+        """
+        Read a window of the grid described by "metadata": the grid of
+        the "source" window of the dataset, maybe resampled. The pixels
+        outside of the geometry are masked.
+
+        :param source: Window of the dataset covered by the grid.
+        :param window: Window of the grid to read.
+        :param outside: Mask of the pixels of the grid outside of the
+            geometry, see "__outside_geometry". Default: None, no mask.
+
+        :return: The raster data, as np.array, or as np.ma.MaskedArray
+            with a mask.
+        """
+
+        out_shape = InputHandler.__out_shape(band, window.height, window.width)
+
+        # The subset does not overlap the dataset
+        if not window.height or not window.width:
+            return np.empty(out_shape, dtype=reader.dtypes[0])
+
+        # Size of a pixel of the grid, in pixels of the dataset
+        x_factor = source.width / metadata['width']
+        y_factor = source.height / metadata['height']
+
+        # Read the window of the dataset under the window of the grid
+        source_window = Window(source.col_off + window.col_off * x_factor,
+                               source.row_off + window.row_off * y_factor,
+                               window.width * x_factor, window.height * y_factor)
+
+        if x_factor == 1 and y_factor == 1:
+            raster = reader.read(band, window=source_window)
+        else:
+            raster = reader.read(band, window=source_window, out_shape=out_shape,
+                                 resampling=Resampling[resampling])
+
+        return InputHandler.__mask_outside(raster, outside, window)
+
+    @staticmethod
+    def __resampling_reader(reader, source, metadata, resampling="nearest", nodata=None):
+        """
+        Return a context manager of the reader of the resampled reads of
+        the "source" window: a WarpedVRT of the dataset if the no data
+        value to ignore is not the nodata of the dataset, else the
+        dataset itself.
+
+        :param nodata: No data value to ignore. See "__resampling_nodata".
+        """
+
+        resampled = (metadata['height'], metadata['width']) != (source.height, source.width)
+        nodata = InputHandler.__resampling_nodata(metadata, nodata, reader.dtypes[0])
+
+        if not resampled or nodata is None or nodata == reader.nodata:
+            return nullcontext(reader)
+
+        # The same grid and CRS, even rotated: the VRT only adds the
+        # nodata. Its reads on a coarser grid are warped with its own
+        # resampling
+        crs = reader.crs or RESAMPLING_CRS
+        return WarpedVRT(reader, src_crs=crs, crs=crs, src_nodata=nodata, nodata=nodata,
+                         transform=reader.transform, width=reader.width,
+                         height=reader.height, resampling=Resampling[resampling])
+
+    @staticmethod
+    def __resampling_nodata(metadata, nodata, dtype):
+        """
+        Return the no data value ignored by a resampling: the given
+        "nodata", or the nodata of the metadata if it is None or a (low,
+        high) range. None if the raster type can not hold it.
+        """
+
+        if nodata is None or isinstance(nodata, (tuple, list)):
+            nodata = metadata['nodata']
+
+        if not np.can_cast(np.min_scalar_type(nodata), dtype):
+            return None
+
+        return nodata
+
+    @staticmethod
+    def __block_windows(reader, band, source):
+        """
+        Yield the internal blocks of the dataset, clipped to the "source"
+        window, as windows of the "source" window.
+        """
+
+        for _, block in reader.block_windows(band):
+            try:
+                block = block.intersection(source)
+            except WindowError:
+                continue
+
+            yield Window(block.col_off - source.col_off, block.row_off - source.row_off,
+                         block.width, block.height)
+
+    @staticmethod
+    def __outside_geometry(geometry, metadata):
+        """
+        Rasterize the pixels of the grid described by "metadata" outside
+        of the given geometry.
+
+        :return: A np.array of bool, True outside of the geometry, or None
+            without geometry.
+        """
+
+        if geometry is None:
+            return None
+
+        shape = (metadata['height'], metadata['width'])
+
+        # An empty grid has nothing to rasterize
+        if not all(shape):
+            return np.ones(shape, dtype=bool)
+
+        return geometry_mask(InputHandler.__shapes(geometry), out_shape=shape,
+                             transform=metadata['transform'])
+
+    @staticmethod
+    def __mask_outside(raster, outside, window=None):
+        """
+        Mask the pixels of a raster outside of a geometry.
+
+        :param outside: Mask of the grid, see "__outside_geometry".
+        :param window: Window of the grid covered by the raster. Default:
+            None, the whole grid.
+
+        :return: A np.ma.MaskedArray, or the raster if "outside" is None.
+        """
+
+        if outside is None:
+            return raster
+
+        if window is not None:
+            outside = outside[window.toslices()]
+
+        return np.ma.masked_array(raster, mask=np.broadcast_to(outside, raster.shape))
+
+    @staticmethod
+    def __shapes(geometry):
+        """Return a geometry, or an iterable of geometries, as a list."""
+        if isinstance(geometry, dict) or hasattr(geometry, '__geo_interface__'):
+            return [geometry]
+
+        return list(geometry)
+
+    @staticmethod
+    def __load_rasterio_mask(raster=True, rasterio_mask=None, decimate=None,
+                             resolution=None, resampling="nearest", bounds=None,
+                             geometry=None, nodata=None, **kwargs):
+
+        InputHandler.__check_no_subset(bounds, geometry)
 
         # Retrieve the image and the affine transformation
         out_image, transform = rasterio_mask
@@ -73,6 +428,332 @@ class InputHandler:
 
         # If raster, return a tuple of (raster, metadata)
         if raster:
-            return np.squeeze(out_image), metadata
+            out_image = InputHandler.__drop_band_axis(out_image)
+
+            if decimate is None and resolution is None:
+                return out_image, metadata
+
+            return InputHandler.__resample_array(
+                out_image, metadata, decimate, resolution, resampling, nodata)
 
         return metadata
+
+    @staticmethod
+    def __load_rasterio_mask_windows(rasterio_mask, window_size=None, decimate=None,
+                                     resolution=None, resampling="nearest", bounds=None,
+                                     geometry=None, nodata=None, **kwargs):
+        """
+        Return the metadata of a rasterio mask, with a generator of
+        windowed views of its image.
+
+        :return: A tuple of (metadata, windows generator).
+        """
+
+        InputHandler.__check_no_subset(bounds, geometry)
+
+        # Retrieve the image and the affine transformation
+        out_image, transform = rasterio_mask
+        out_image = InputHandler.__drop_band_axis(out_image)
+
+        # Create a metadata object
+        metadata = {'nodata': -9999, 'transform': transform}
+
+        # The image is in memory: resample it at once
+        if decimate is not None or resolution is not None:
+            out_image, metadata = InputHandler.__resample_array(
+                out_image, metadata, decimate, resolution, resampling, nodata)
+
+        height, width = out_image.shape[-2:]
+        metadata = dict(metadata, height=height, width=width)
+
+        # Without window size, the whole image is a single window
+        if window_size is None:
+            window_size = (height, width)
+
+        def read_windows():
+            for window in InputHandler._iter_windows(height, width, window_size):
+                yield out_image[(..., *window.toslices())], window
+
+        return metadata, read_windows()
+
+    @staticmethod
+    def __drop_band_axis(image):
+        """
+        Return a single band image of shape (1, rows, cols) as a view of
+        shape (rows, cols). Unlike np.squeeze, keep the rows and columns
+        axes of a single row or column image.
+        """
+        if image.ndim == 3 and image.shape[0] == 1:
+            return image[0]
+
+        return image
+
+    @staticmethod
+    def __load_array(raster=True, input_raster=None, band=1, decimate=None,
+                     resolution=None, resampling="nearest", bounds=None, geometry=None,
+                     nodata=None, **kwargs):
+        """
+        Load an in-memory raster: a tuple of (np.array, affine
+        transformation) or of (np.array, affine transformation, nodata).
+        The array is of shape (rows, cols), or (bands, rows, cols).
+
+        :return: A tuple of (raster, metadata) if raster is True, else the
+            metadata. The raster is a view of the array, unless it is
+            resampled or a list of non-consecutive bands is selected.
+        """
+
+        image, metadata = InputHandler.__split_array(input_raster)
+        transform = metadata['transform']
+
+        source, metadata = InputHandler.__subset_metadata(
+            metadata, decimate, resolution, bounds, geometry)
+
+        if not raster:
+            return metadata
+
+        image = InputHandler.__array_bands(image, band)[(..., *source.toslices())]
+
+        # Resample the subset on the grid of the metadata
+        if (metadata['height'], metadata['width']) != (source.height, source.width):
+            image = InputHandler.__resample_array(
+                image, dict(metadata, transform=windows.transform(source, transform)),
+                decimate, resolution, resampling, nodata)[0]
+
+        image = InputHandler.__mask_outside(
+            image, InputHandler.__outside_geometry(geometry, metadata))
+
+        return image, metadata
+
+    @staticmethod
+    def __load_array_windows(input_raster, band=1, window_size=None, **read):
+        """
+        Return the metadata of an in-memory raster, with a generator of
+        windowed views of its array.
+
+        :return: A tuple of (metadata, windows generator).
+        """
+
+        image, metadata = InputHandler.__load_array(True, input_raster, band, **read)
+        height, width = metadata['height'], metadata['width']
+
+        # Without window size, the whole array is a single window
+        if window_size is None:
+            window_size = (max(height, 1), max(width, 1))
+
+        def read_windows():
+            for window in InputHandler._iter_windows(height, width, window_size):
+                yield image[(..., *window.toslices())], window
+
+        return metadata, read_windows()
+
+    @staticmethod
+    def __split_array(input_raster):
+        """Return the array of an "array" input, with its metadata."""
+
+        image, transform, *nodata = input_raster
+        nodata = nodata[0] if nodata else None
+
+        if image.ndim not in (2, 3):
+            raise ValueError(f"Expected an array of shape (rows, cols) or "
+                             f"(bands, rows, cols), got {image.shape}")
+
+        metadata = {'driver': None, 'dtype': image.dtype.name,
+                    'nodata': -9999 if nodata is None else nodata,
+                    'width': image.shape[-1], 'height': image.shape[-2],
+                    'count': 1 if image.ndim == 2 else image.shape[0],
+                    'crs': None, 'transform': transform}
+
+        return image, metadata
+
+    @staticmethod
+    def __array_bands(image, band):
+        """
+        Select the band(s) of an in-memory image, as rasterio reads them:
+        a band index gives a (rows, cols) image, a list of band indexes a
+        (bands, rows, cols) image. A (rows, cols) image has a single band.
+        """
+
+        if image.ndim == 2:
+            image = image[np.newaxis]
+
+        if band is None:
+            return InputHandler.__drop_band_axis(image)
+
+        if not isinstance(band, list):
+            return image[band - 1]
+
+        # Consecutive bands: a view
+        if band == list(range(band[0], band[0] + len(band))):
+            return image[band[0] - 1:band[0] - 1 + len(band)]
+
+        return image[[index - 1 for index in band]]
+
+    @staticmethod
+    def __check_no_subset(bounds, geometry):
+        """Raise a ValueError if a subset is asked to a rasterio mask."""
+        if bounds is not None or geometry is not None:
+            raise ValueError("'bounds' and 'geometry' are not supported for "
+                             "mask inputs. Use an array input instead.")
+
+    @staticmethod
+    def resampled_grid(height, width, transform, decimate=None, resolution=None):
+        """
+        Compute the grid of a resampled raster.
+
+        :param height: Number of rows of the raster.
+        :param width: Number of columns of the raster.
+        :param transform: Affine transformation of the raster.
+        :param decimate: Resampling factor: the size of a resampled pixel,
+            in pixels of the raster. Greater than 1 to downsample, lower
+            than 1 to upsample.
+        :param resolution: Size of a resampled pixel, in units of the
+            coordinates, as a number or a (x, y) tuple. Used instead of
+            "decimate".
+
+        :return: A tuple of (height, width, transform) of the resampled grid.
+        :rtype: tuple
+        """
+
+        if resolution is not None:
+            x_res, y_res = resolution if isinstance(resolution, (tuple, list)) \
+                else (resolution, resolution)
+
+            x_factor, y_factor = x_res / abs(transform.a), y_res / abs(transform.e)
+
+        elif decimate is not None:
+            x_factor = y_factor = decimate
+
+        else:
+            return height, width, transform
+
+        out_height = max(int(round(height / y_factor)), 1)
+        out_width = max(int(round(width / x_factor)), 1)
+
+        out_transform = transform * Affine.scale(width / out_width, height / out_height)
+
+        return out_height, out_width, out_transform
+
+    @staticmethod
+    def subset_window(height, width, transform, bounds=None, geometry=None):
+        """
+        Compute the window of a raster which covers the given bounds, or
+        the bounds of the given geometry. The window is snapped outward to
+        whole pixels, and clipped to the raster.
+
+        :param height: Number of rows of the raster.
+        :param width: Number of columns of the raster.
+        :param transform: Affine transformation of the raster.
+        :param bounds: A (left, bottom, right, top) tuple, in the
+            coordinates of the raster.
+        :param geometry: A GeoJSON-like geometry, or a list of geometries,
+            in the coordinates of the raster. Used if "bounds" is None.
+
+        :return: The window covering the bounds. Of size 0 if the bounds do
+            not overlap the raster.
+        :rtype: rasterio.windows.Window
+        """
+
+        if bounds is None:
+            lefts, bottoms, rights, tops = zip(
+                *(features.bounds(shape) for shape in InputHandler.__shapes(geometry)))
+            bounds = min(lefts), min(bottoms), max(rights), max(tops)
+
+        window = windows.from_bounds(*bounds, transform=transform)
+
+        # Snap to whole pixels, ignoring the rounding errors of the bounds
+        col_start = max(math.floor(window.col_off + SNAP_TOLERANCE), 0)
+        row_start = max(math.floor(window.row_off + SNAP_TOLERANCE), 0)
+        col_stop = min(math.ceil(window.col_off + window.width - SNAP_TOLERANCE), width)
+        row_stop = min(math.ceil(window.row_off + window.height - SNAP_TOLERANCE), height)
+
+        return Window(col_start, row_start,
+                      max(col_stop - col_start, 0), max(row_stop - row_start, 0))
+
+    @staticmethod
+    def __subset_metadata(metadata, decimate=None, resolution=None, bounds=None,
+                          geometry=None):
+        """
+        Return the window of the raster covered by the given "bounds" or
+        "geometry" (the whole raster by default), with the metadata of
+        this window resampled on the grid given by "decimate" or
+        "resolution". See "subset_window" and "resampled_grid".
+
+        :return: A tuple of (window, metadata).
+        :rtype: tuple
+        """
+
+        if bounds is None and geometry is None:
+            source = Window(0, 0, metadata['width'], metadata['height'])
+        else:
+            source = InputHandler.subset_window(
+                metadata['height'], metadata['width'], metadata['transform'],
+                bounds, geometry)
+
+        transform = windows.transform(source, metadata['transform'])
+        height, width = source.height, source.width
+
+        # An empty subset stays empty
+        if height and width:
+            height, width, transform = InputHandler.resampled_grid(
+                height, width, transform, decimate, resolution)
+
+        return source, dict(metadata, height=height, width=width, transform=transform)
+
+    @staticmethod
+    def __resample_array(image, metadata, decimate, resolution, resampling, nodata=None):
+        """
+        Resample an in-memory image on the grid given by "decimate" or
+        "resolution", ignoring its no data values.
+
+        :param nodata: No data value to ignore. See "__resampling_nodata".
+
+        :return: A tuple of (resampled image, metadata).
+        :rtype: tuple
+        """
+
+        transform = metadata['transform'] or Affine.identity()
+        height, width = image.shape[-2:]
+
+        out_height, out_width, out_transform = InputHandler.resampled_grid(
+            height, width, transform, decimate, resolution)
+
+        out_image = np.empty((*image.shape[:-2], out_height, out_width),
+                             dtype=image.dtype)
+
+        nodata = InputHandler.__resampling_nodata(metadata, nodata, image.dtype)
+
+        reproject(image, out_image,
+                  src_transform=transform, src_crs=RESAMPLING_CRS, src_nodata=nodata,
+                  dst_transform=out_transform, dst_crs=RESAMPLING_CRS, dst_nodata=nodata,
+                  resampling=Resampling[resampling])
+
+        return out_image, dict(metadata, transform=out_transform)
+
+    @staticmethod
+    def __out_shape(band, height, width):
+        """Return the shape of a read of the given band(s)."""
+        if isinstance(band, list):
+            return len(band), height, width
+
+        return height, width
+
+    @staticmethod
+    def _iter_windows(height, width, window_size):
+        """
+        Yield the windows of a regular grid covering a raster of the
+        given height and width, row by row.
+
+        :param window_size: Size of the windows, as an int (square
+            windows) or a (rows, cols) tuple.
+        """
+
+        if isinstance(window_size, int):
+            window_size = (window_size, window_size)
+
+        rows, cols = window_size
+
+        for row_off in range(0, height, rows):
+            for col_off in range(0, width, cols):
+                yield Window(col_off, row_off,
+                             min(cols, width - col_off),
+                             min(rows, height - row_off))
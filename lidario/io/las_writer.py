@@ -0,0 +1,199 @@
+import datetime
+import math
+import struct
+
+import numpy as np
+
+
+# Point data record format 0
+LAS_POINT_DTYPE = np.dtype([
+    ('X', '<i4'), ('Y', '<i4'), ('Z', '<i4'),
+    ('intensity', '<u2'), ('return_bits', 'u1'), ('classification', 'u1'),
+    ('scan_angle_rank', 'i1'), ('user_data', 'u1'), ('point_source_id', '<u2')
+])
+
+# Sizes of the public header blocks, by version
+LAS_HEADER_SIZES = {"1.2": 227, "1.4": 375}
+
+# Single return: return number 1, of 1 return
+SINGLE_RETURN = 0b00001001
+
+# Range of the quantized coordinates
+INT32 = np.iinfo(np.int32)
+
+
+class LasWriter:
+    """
+    Write x, y, z points to a LAS file (point data format 0), chunk by
+    chunk. The coordinates are quantized to int32 with the given scales
+    and offsets: a ValueError is raised if they do not fit. The header is rewritten on close, with the number of
+    points and the bounds accumulated over the chunks.
+
+    :param out_file: Path of the .las file.
+    :param scale: (x, y, z) scale factors of the coordinates.
+    :param offset: (x, y, z) offsets of the coordinates.
+    :param version: LAS version: "1.2" or "1.4".
+    :param wkt: WKT of the coordinate reference system. Written in a
+        variable length record, only for LAS 1.4.
+    :param chunk_size: Number of points quantized at a time.
+    """
+
+    def __init__(self, out_file, scale, offset, version="1.2", wkt=None,
+                 chunk_size=1 << 20):
+
+        if version not in LAS_HEADER_SIZES:
+            raise ValueError(f"Unsupported LAS version: {version}")
+
+        self.scale = scale
+        self.offset = offset
+        self.version = version
+        self.chunk_size = chunk_size
+
+        # Only LAS 1.4 supports WKT
+        self.vlr = self.__wkt_vlr(wkt) if wkt and version == "1.4" else b""
+
+        self.count = 0
+        self.minimum = np.full(3, INT32.max, dtype=np.int64)
+        self.maximum = np.full(3, INT32.min, dtype=np.int64)
+
+        # Reserve the header, written on close
+        self.file = open(out_file, "wb")
+        self.file.write(self.__header())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def write(self, x, y, z) -> None:
+        """
+        Quantize and write the given x, y, z points to the file.
+        """
+
+        count = len(z)
+        records = np.zeros(min(count, self.chunk_size), dtype=LAS_POINT_DTYPE)
+        records['return_bits'] = SINGLE_RETURN
+        buffer = np.empty(len(records), dtype=np.float64)
+
+        for start in range(0, count, self.chunk_size):
+            chunk = slice(start, start + self.chunk_size)
+            size = len(z[chunk])
+
+            for axis, (name, values) in enumerate(zip("XYZ", (x, y, z))):
+                quantized = buffer[:size]
+                np.subtract(values[chunk], self.offset[axis], out=quantized)
+                np.divide(quantized, self.scale[axis], out=quantized)
+                np.rint(quantized, out=quantized)
+
+                # Refuse to wrap the coordinates out of the int32 range
+                if not (quantized.min() >= INT32.min and quantized.max() <= INT32.max):
+                    raise ValueError(
+                        f"{name} coordinates out of the int32 range of the LAS format, "
+                        f"with a scale of {self.scale[axis]} and an offset of "
+                        f"{self.offset[axis]}: use a larger scale (fewer decimals)")
+
+                records[name][:size] = quantized
+
+                # Update the bounds
+                self.minimum[axis] = min(self.minimum[axis], records[name][:size].min())
+                self.maximum[axis] = max(self.maximum[axis], records[name][:size].max())
+
+            records[:size].tofile(self.file)
+
+        self.count += count
+
+    def close(self) -> None:
+        """
+        Rewrite the header with the points count and bounds, and close
+        the file.
+        """
+        if self.file.closed:
+            return
+
+        self.file.seek(0)
+        self.file.write(self.__header())
+        self.file.close()
+
+    def __header(self) -> bytes:
+        """
+        Create the public header block, followed by the variable length
+        records.
+        """
+
+        header_size = LAS_HEADER_SIZES[self.version]
+        today = datetime.date.today()
+
+        # Bounds of the points, as (max, min) of x, then y, then z
+        if self.count:
+            maximum = self.maximum * self.scale + self.offset
+            minimum = self.minimum * self.scale + self.offset
+        else:
+            maximum = minimum = np.zeros(3)
+
+        bounds = [value for axis in range(3)
+                  for value in (maximum[axis], minimum[axis])]
+
+        legacy_count = self.count if self.count < 2 ** 32 else 0
+
+        header = struct.pack(
+            "<4sHH16sBB32s32sHHHIIBHI5I3d3d6d",
+            b"LASF", 0, 0b10000 if self.vlr else 0, bytes(16),
+            1, int(self.version[-1]),
+            b"lidario", b"lidario",
+            today.timetuple().tm_yday, today.year,
+            header_size, header_size + len(self.vlr), 1 if self.vlr else 0,
+            0, LAS_POINT_DTYPE.itemsize, legacy_count,
+            legacy_count, 0, 0, 0, 0,
+            *self.scale, *self.offset, *bounds
+        )
+
+        if self.version == "1.4":
+            header += struct.pack("<QQIQ15Q", 0, 0, 0, self.count,
+                                  self.count, *([0] * 14))
+
+        elif self.count >= 2 ** 32:
+            raise ValueError("LAS 1.2 files are limited to 2^32 - 1 points, use LAS 1.4")
+
+        return header + self.vlr
+
+    @staticmethod
+    def __wkt_vlr(wkt) -> bytes:
+        """Create the variable length record of the given WKT."""
+
+        data = wkt.encode("ascii") + b"\0"
+
+        return struct.pack("<H16sHH32s", 0, b"LASF_Projection", 2112,
+                           len(data), b"OGC Coordinate System WKT") + data
+
+
+def las_scale_offset(transform, decimal=None):
+    """
+    Derive the scales and offsets of the LAS coordinates from the affine
+    transformation of the raster. The offsets are the origin of the
+    raster. The scales are a hundredth of the pixel size (rounded to a
+    power of 10), or 10^-decimal if the coordinates are rounded.
+
+    :param transform: Affine transformation of the raster. If None,
+        use a null offset.
+    :param decimal: Number of decimals of the coordinates.
+
+    :return: A tuple of ((x, y, z) scales, (x, y, z) offsets).
+    :rtype: tuple
+    """
+
+    if decimal is not None:
+        scale = 10.0 ** -decimal
+        xy_scale = z_scale = scale
+
+    else:
+        z_scale = 0.001
+
+        # Sizes of the sides of a pixel, even rotated
+        pixel = min(math.hypot(transform[0], transform[3]),
+                    math.hypot(transform[1], transform[4])) if transform else 1
+        xy_scale = 10.0 ** (math.floor(math.log10(pixel)) - 2)
+
+    offset = (float(transform[2]), float(transform[5])) if transform else (0.0, 0.0)
+
+    return (xy_scale, xy_scale, z_scale), (*offset, 0.0)
@@ -1,21 +1,190 @@
 
-import pandas as pd
+from itertools import chain
+
 import numpy as np
-from plyfile import PlyData, PlyElement
-from typing import Callable, Iterable
+from typing import Callable, TYPE_CHECKING
+from lidario.io.ply_writer import ply_array, write_binary_ply
+from lidario.io.text_writer import TextWriter
+from lidario.io.las_writer import LasWriter, las_scale_offset
+from lidario.io.point_cloud import PointCloud
+
+# pandas and plyfile are slow to import: they are imported by the savers
+# which need them
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+def import_pyarrow():
+    """
+    Import pyarrow, an optional dependency of the "arrow" and "parquet"
+    outputs.
+
+    :return: The pyarrow module.
+    """
+    try:
+        import pyarrow
+    except ImportError as error:
+        raise ImportError("The \"arrow\" and \"parquet\" outputs require pyarrow: "
+                          "pip install lidario[arrow]") from error
+
+    return pyarrow
+
+
+def point_columns(x, y, z) -> dict:
+    """
+    Return the columns of the points, by name: "x", "y" and "z". For a
+    multi-band point cloud, z is of shape (n, bands), and its columns are
+    named "z1", "z2", ... in the order of the bands.
+
+    :return: A dictionary of the columns.
+    :rtype: dict
+    """
+
+    columns = {'x': x, 'y': y}
+
+    if np.ndim(z) == 2:
+        columns.update((f"z{i + 1}", z[:, i]) for i in range(z.shape[1]))
+    else:
+        columns['z'] = z
+
+    return columns
+
+
+def arrow_arrays(x, y, z, schema=None) -> dict:
+    """
+    Return the pyarrow arrays of the columns of the points, by name. With
+    a "schema", the arrays are cast to its types: all the chunks of a
+    table or a file then have the same schema. A value which does not
+    fit raises a pyarrow.ArrowInvalid.
+
+    :return: A dictionary of pyarrow arrays.
+    :rtype: dict
+    """
+
+    pa = import_pyarrow()
+
+    return {name: pa.array(values, type=None if schema is None else schema.field(name).type)
+            for name, values in point_columns(x, y, z).items()}
+
+
+def output_extension(output_type, out_format=None):
+    """
+    Return the extension of the file saved by a file output type.
+
+    :return: The extension (ie: ".csv.gz"), or None if the output type
+        does not save a file.
+    :rtype: str
+    """
+
+    if output_type in ("csv", "xyz"):
+        return f".{output_type}.gz" if out_format == "gzip" else f".{output_type}"
+
+    extensions = {"ply": ".ply", "las": ".las", "npy": ".npy", "memmap": ".npy",
+                  "parquet": ".parquet"}
+
+    return extensions.get(output_type)
+
+
+def peek(chunks):
+    """
+    Return the first chunk of an iterable, with an iterator over all
+    the chunks. The first chunk is None if the iterable is empty.
+
+    :return: A tuple of (first chunk, iterator of the chunks).
+    :rtype: tuple
+    """
+
+    chunks = iter(chunks)
+    first = next(chunks, None)
+
+    if first is None:
+        return None, iter(())
+
+    return first, chain([first], chunks)
 
 
 class OutputHandler:
 
     def __init__(self, output_type):
+        self.output_type = output_type
         self.saver: Callable = self.__create_saver(output_type)
+        self.chunk_saver: Callable = self.__create_chunk_saver(output_type)
+
+        # The on-disk arrays are preallocated: their saver needs the number
+        # of points before the first chunk
+        self.requires_count = output_type in ("npy", "memmap")
+
+        # The Numpy arrays are returned as is: their saver takes the points
+        # translated in a preallocated (n, 3) array
+        self.accepts_points = output_type in ("numpy", "np", "array", "list", "tuple")
 
-    def save(self, x, y, z, out_file, out_format, transpose):
+        # The spatial index is made of the pixels of the points: their
+        # saver takes them from the translation
+        self.requires_pixels = output_type == "pointcloud"
+
+    def save(self, x, y, z, out_file, out_format, transpose, decimal=None,
+             transform=None, crs=None, points=None, pixels=None):
         """
         Execute the save function.
+
+        :param transform: Affine transformation from the pixel indices to
+            the x, y coordinates. None if x and y are the pixel indices.
+        :param crs: Coordinate reference system of the x, y coordinates.
+        :param points: Array of shape (n, 2 + bands) whose columns are x,
+            y and z, if they are views of it. Used without copy by the
+            savers which "accepts_points".
+        :param pixels: (row, col) tuple of the pixels of the points in
+            the grid of the "transform". Used by the savers which
+            "requires_pixels".
         """
         return self.saver(x, y, z, out_file=out_file, out_format=out_format,
-                          transpose=transpose)
+                          transpose=transpose, decimal=decimal,
+                          transform=transform, crs=crs, points=points, pixels=pixels)
+
+    def load(self, out_file, out_format=None, transpose=False):
+        """
+        Return the value returned by "save" for a file already saved: the
+        .npy file memory-mapped, None for the other file types.
+
+        :param out_file: Name of the saved file, without extension.
+        """
+
+        if output_extension(self.output_type) != ".npy":
+            return None
+
+        array = np.load(out_file + ".npy", mmap_mode="r+")
+
+        if transpose and array.dtype.names is None:
+            return array.T
+
+        return array
+
+    def save_chunks(self, chunks, out_file, out_format, transpose, decimal=None,
+                    transform=None, crs=None, count=None):
+        """
+        Execute the save function on an iterable of (x, y, z) chunks.
+        File savers which support it write the chunks one by one. The
+        other savers concatenate them first.
+
+        :param count: Total number of points of the chunks. Required if
+            "requires_count" is True.
+
+        If "requires_pixels" is True, the chunks are (x, y, z, row, col)
+        tuples.
+        """
+
+        if self.chunk_saver is not None and not transpose:
+            return self.chunk_saver(chunks, out_file=out_file,
+                                    out_format=out_format, decimal=decimal,
+                                    transform=transform, crs=crs, count=count)
+
+        # Concatenate the chunks of each coordinate
+        chunks = list(chunks)
+        x, y, z, *pixels = (np.concatenate(column) for column in zip(*chunks)) \
+            if chunks else (np.empty(0), np.empty(0), np.empty(0))
+
+        return self.save(x, y, z, out_file, out_format, transpose, decimal,
+                         transform, crs, pixels=pixels or None)
 
     def __create_saver(self, output_type) -> Callable:
         """
@@ -33,7 +202,17 @@ class OutputHandler:
         savers = {
             # Files
             "csv": self.__save_csv,
+            "xyz": self.__save_xyz,
             "ply": self.__save_ply,
+            "las": self.__save_las,
+
+            # Apache Arrow table and Parquet file
+            "arrow": self.__save_arrow,
+            "parquet": self.__save_parquet,
+
+            # Numpy array, memory-mapped to a .npy file
+            "npy": self.__save_npy,
+            "memmap": self.__save_npy,
 
             # Pandas dataframe
             "dataframe": self.__save_dataframe,
@@ -41,6 +220,9 @@ class OutputHandler:
             "pd": self.__save_dataframe,
             "df": self.__save_dataframe,
 
+            # Point cloud with a spatial index
+            "pointcloud": self.__save_point_cloud,
+
             # Numpy array
             "numpy": self.__save_numpy,
             "np": self.__save_numpy,
@@ -57,54 +239,279 @@ class OutputHandler:
 
         return savers[output_type]
 
+    def __create_chunk_saver(self, output_type) -> Callable:
+        """
+        Associate the saver function which writes the point cloud chunk by
+        chunk, if the "output_type" supports it.
+
+        :return: The chunk save function associated with the given
+            "output_type", or None.
+        """
+
+        chunk_savers = {
+            "csv": self.__save_csv_chunks,
+            "xyz": self.__save_xyz_chunks,
+            "las": self.__save_las_chunks,
+            "arrow": self.__save_arrow_chunks,
+            "parquet": self.__save_parquet_chunks,
+            "npy": self.__save_npy_chunks,
+            "memmap": self.__save_npy_chunks
+        }
+
+        return chunk_savers.get(output_type)
+
     # File savings
     # -------------------------------------------------------------------------
 
     def __save_csv(self, x, y, z, transpose=False, out_file="output", **kwargs) -> None:
         """
-        Create a CSV file from a given x, y, z point cloud.
+        Create a CSV file from a given x, y, z point cloud. If "out_format"
+        is "gzip", compress the file.
 
         :return: None
         """
 
-        # Create a pandas dataframe and save it to CSV
-        out_file += ".csv"
-        self.__save_dataframe(x, y, z, transpose).to_csv(out_file, index=False)
+        # Points written on columns, through a pandas dataframe
+        if transpose:
+            out_file += ".csv"
+            self.__save_dataframe(x, y, z, transpose).to_csv(out_file, index=False)
+            return
 
-    def __save_ply(self, x, y, z, out_file="output", out_format="binary", **kwargs) -> None:
+        self.__save_csv_chunks([(x, y, z)], out_file=out_file, **kwargs)
+
+    @staticmethod
+    def __save_csv_chunks(chunks, out_file="output", out_format=None,
+                          decimal=None, **kwargs) -> None:
         """
-        Create a .ply file from a given x, y, z point cloud.
+        Create a CSV file from an iterable of x, y, z chunks.
+
+        :return: None
+        """
+
+        out_file += ".csv.gz" if out_format == "gzip" else ".csv"
+
+        # Name the columns after the first chunk
+        first, chunks = peek(chunks)
+        header = point_columns(*first).keys() if first else ("x", "y", "z")
+
+        with TextWriter(out_file, delimiter=",", header=header,
+                        decimal=decimal, compression=out_format) as writer:
+            for x, y, z in chunks:
+                writer.write(*point_columns(x, y, z).values())
+
+    def __save_xyz(self, x, y, z, **kwargs) -> None:
+        """
+        Create a .xyz file from a given x, y, z point cloud: one point per
+        line, with space separated values. If "out_format" is "gzip",
+        compress the file.
+
+        :return: None
+        """
+
+        self.__save_xyz_chunks([(x, y, z)], **kwargs)
+
+    @staticmethod
+    def __save_xyz_chunks(chunks, out_file="output", out_format=None,
+                          decimal=None, **kwargs) -> None:
+        """
+        Create a .xyz file from an iterable of x, y, z chunks.
+
+        :return: None
+        """
+
+        out_file += ".xyz.gz" if out_format == "gzip" else ".xyz"
+
+        with TextWriter(out_file, delimiter=" ", decimal=decimal,
+                        compression=out_format) as writer:
+            for x, y, z in chunks:
+                writer.write(*point_columns(x, y, z).values())
+
+    def __save_las(self, x, y, z, **kwargs) -> None:
+        """
+        Create a .las file from a given x, y, z point cloud. If
+        "out_format" is "1.4", write a LAS 1.4 file. Else, write a
+        LAS 1.2 file.
 
         :return: None
         """
 
-        def to_tuples(array: np.array) -> Iterable:
-            """Return an iterable of tuple frm a given (n, 3) np.array"""
-            shape = array.shape[0]
+        self.__save_las_chunks([(x, y, z)], **kwargs)
+
+    @staticmethod
+    def __save_las_chunks(chunks, out_file="output", out_format=None,
+                          decimal=None, transform=None, crs=None, **kwargs) -> None:
+        """
+        Create a .las file from an iterable of x, y, z chunks. The scales
+        and offsets of the coordinates are derived from the "transform".
 
-            for i in range(shape):
-                yield tuple(array[i])
+        :return: None
+        """
 
-        # Create a numpy array and set a custom dtype
-        raw_array = self.__save_numpy(x, y, z)
+        out_file += ".las"
+        version = "1.4" if out_format == "1.4" else "1.2"
+        scale, offset = las_scale_offset(transform, decimal)
+        wkt = crs.to_wkt() if crs is not None else None
+
+        with LasWriter(out_file, scale, offset, version, wkt) as writer:
+            for x, y, z in chunks:
+                # A list of a single band is a single band
+                if np.ndim(z) == 2:
+                    if z.shape[1] != 1:
+                        raise ValueError("The LAS output supports a single band")
+
+                    z = z.ravel()
+
+                writer.write(x, y, z)
+
+    def __save_ply(self, x, y, z, out_file="output", out_format="binary", **kwargs) -> None:
+        """
+        Create a .ply file from a given x, y, z point cloud.
 
-        # Transform it with a custom dtype
-        np_array = np.fromiter(
-            to_tuples(raw_array),
-            dtype=[('x', 'f4'), ('y', 'f4'), ('z', 'f4')]
-        )
+        :return: None
+        """
 
-        # Instantiate a PlyElement with the numpy array
         out_file += ".ply"
-        ply = PlyElement.describe(np_array, out_file)
 
         # If out_type is "ascii", write a text file
         if out_format == "ascii":
+            from plyfile import PlyData, PlyElement
+
+            ply = PlyElement.describe(ply_array(point_columns(x, y, z)), out_file)
             PlyData([ply], text=True).write(out_file)
 
-        # Else, write a binary file
+        # Else, stream the raw points to a binary file
         else:
-            PlyData([ply]).write(out_file)
+            write_binary_ply(out_file, out_file, point_columns(x, y, z))
+
+    def __save_npy(self, x, y, z, transpose=False, **kwargs) -> np.memmap:
+        """
+        Create a .npy file of shape (n, 3) from a given x, y, z point
+        cloud, and return it memory-mapped. If "out_format" is
+        "structured", create a structured array with the "x", "y" and "z"
+        fields instead. If "transpose" is set to True, return a view of
+        shape (3, n).
+
+        :return: np.memmap of shape (n, 3).
+        :rtype: np.memmap
+        """
+
+        array = self.__save_npy_chunks([(x, y, z)], count=len(z), **kwargs)
+
+        if transpose and array.dtype.names is None:
+            return array.T
+
+        return array
+
+    @staticmethod
+    def __save_npy_chunks(chunks, out_file="output", out_format=None,
+                          count=None, **kwargs) -> np.memmap:
+        """
+        Preallocate a .npy file of "count" points, and fill it with an
+        iterable of x, y, z chunks, through a memory map. The dtype of the
+        file is the common type of the first chunk.
+
+        :return: np.memmap of shape (n, 3), or (n,) if structured.
+        :rtype: np.memmap
+        """
+
+        if count is None:
+            raise ValueError("The number of points is required to preallocate the .npy file")
+
+        out_file += ".npy"
+        structured = out_format == "structured"
+
+        def open_memmap(dtype, names):
+            if structured:
+                dtype, shape = [(name, dtype) for name in names], (count,)
+            else:
+                shape = (count, len(names))
+
+            return np.lib.format.open_memmap(out_file, mode="w+", dtype=dtype,
+                                             shape=shape)
+
+        array = None
+        start = 0
+
+        for x, y, z in chunks:
+            stop = start + len(z)
+
+            if stop > count:
+                raise ValueError(f"More than the {count} expected points to save")
+
+            columns = point_columns(x, y, z)
+
+            if array is None:
+                array = open_memmap(np.result_type(x, y, z), columns)
+
+            # A wider chunk would wrap around in the type of the file
+            elif not np.can_cast(np.result_type(x, y, z), array.dtype if not structured
+                                 else array.dtype[0]):
+                raise ValueError(f"Can not save a chunk of {np.result_type(x, y, z)} points "
+                                 f"to a .npy file of {array.dtype}")
+
+            # Fill the memory map column by column
+            for axis, (name, values) in enumerate(columns.items()):
+                if structured:
+                    array[name][start:stop] = values
+                else:
+                    array[start:stop, axis] = values
+
+            start = stop
+
+        if array is None:
+            array = open_memmap(np.float64, "xyz")
+
+        array.flush()
+
+        return array
+
+    def __save_parquet(self, x, y, z, **kwargs) -> None:
+        """
+        Create a .parquet file from a given x, y, z point cloud. See
+        "__save_parquet_chunks".
+
+        :return: None
+        """
+
+        self.__save_parquet_chunks([(x, y, z)], **kwargs)
+
+    @staticmethod
+    def __save_parquet_chunks(chunks, out_file="output", out_format=None,
+                              row_group_size=1 << 20, **kwargs) -> None:
+        """
+        Create a .parquet file from an iterable of x, y, z chunks. Each
+        chunk is written as one or more row groups, of at most
+        "row_group_size" points. "out_format" is the compression codec:
+        "snappy" (default), "gzip", "brotli", "lz4", "zstd" or "none".
+
+        :return: None
+        """
+
+        pa = import_pyarrow()
+        import pyarrow.parquet as pq
+
+        out_file += ".parquet"
+
+        codecs = ("snappy", "gzip", "brotli", "lz4", "zstd", "none")
+        compression = out_format if out_format in codecs else "snappy"
+
+        writer = None
+
+        for x, y, z in chunks:
+            # The schema of the file is the one of the first chunk
+            table = pa.table(arrow_arrays(x, y, z, None if writer is None else writer.schema))
+
+            if writer is None:
+                writer = pq.ParquetWriter(out_file, table.schema,
+                                          compression=compression)
+
+            writer.write_table(table, row_group_size=row_group_size)
+
+        if writer is None:
+            pq.write_table(pa.table({'x': [], 'y': [], 'z': []}), out_file,
+                           compression=compression)
+        else:
+            writer.close()
 
     # Python data structure savings
     # -------------------------------------------------------------------------
@@ -132,7 +539,7 @@ class OutputHandler:
         """
 
         # Create a numpy array and transform it into a list
-        return self.__save_numpy(x, y, z, transpose).tolist()
+        return self.__save_numpy(x, y, z, transpose, **kwargs).tolist()
 
     def __save_tuple(self, x, y, z, transpose=False, **kwargs) -> tuple:
         """
@@ -146,12 +553,12 @@ class OutputHandler:
 
         # Create a numpy array and transform it into a tuple
         # https://www.geeksforgeeks.org/python-convert-list-of-lists-to-tuple-of-tuples/
-        return tuple(map(tuple, self.__save_numpy(x, y, z, transpose)))
+        return tuple(map(tuple, self.__save_numpy(x, y, z, transpose, **kwargs)))
 
     # C-based data structure savings
     # -------------------------------------------------------------------------
 
-    def __save_dataframe(self, x, y, z, transpose=False, **kwargs) -> pd.DataFrame:
+    def __save_dataframe(self, x, y, z, transpose=False, **kwargs) -> "pd.DataFrame":
         """
         Create a (n, 3) pandas dataframe of the points. By default,
         each point [x, y, z] is written on a new row. If transpose is
@@ -160,29 +567,93 @@ class OutputHandler:
         :return: A pandas dataframe of the point cloud.
         :rtype: pd.DataFrame
         """
+        import pandas as pd
 
-        # Get a numpy array of [x, y, z]
-        data = self.__save_numpy(x, y, z, transpose)
+        columns = point_columns(x, y, z)
 
         # If transpose, set each [x, y, z] point on columns (horizontally)
         if transpose:
-            return pd.DataFrame(data=data, index=['x', 'y', 'z'])
+            data = self.__save_numpy(x, y, z, transpose)
+            return pd.DataFrame(data=data, index=list(columns))
+
+        # If not, use x, y and z as columns, without copying them
+        return pd.DataFrame(columns, copy=False)
+
+    @staticmethod
+    def __save_arrow(x, y, z, **kwargs):
+        """
+        Create a pyarrow Table of the points, with the "x", "y" and "z"
+        columns. The columns share the memory of the given arrays.
+
+        :return: A pyarrow Table of the point cloud.
+        :rtype: pyarrow.Table
+        """
+
+        pa = import_pyarrow()
+
+        return pa.table(arrow_arrays(x, y, z))
+
+    @staticmethod
+    def __save_arrow_chunks(chunks, **kwargs):
+        """
+        Create a pyarrow Table of the points from an iterable of x, y, z
+        chunks. Each chunk is a record batch of the table: the chunks are
+        not concatenated.
+
+        :return: A pyarrow Table of the point cloud.
+        :rtype: pyarrow.Table
+        """
+
+        pa = import_pyarrow()
+
+        batches = []
+        for x, y, z in chunks:
+            # The schema of the table is the one of the first chunk
+            schema = batches[0].schema if batches else None
+            batches.append(pa.RecordBatch.from_pydict(arrow_arrays(x, y, z, schema)))
+
+        return pa.Table.from_batches(batches) if batches else \
+            pa.table({'x': [], 'y': [], 'z': []})
+
+    @staticmethod
+    def __save_point_cloud(x, y, z, out_file="output", out_format=None,
+                           decimal=None, transform=None, crs=None, pixels=None,
+                           **kwargs) -> PointCloud:
+        """
+        Create a PointCloud of the points, with a spatial index of their
+        (row, col) "pixels", or of the pixels under their x and y. If
+        "out_format" is a file output type ("csv", "xyz", "ply", "las",
+        "npy", "parquet"), also save the points to this file, and the
+        index next to it, as "<out_file>.index.npz".
+
+        :return: A PointCloud of the points.
+        :rtype: PointCloud
+        """
+
+        point_cloud = PointCloud(x, y, z, transform, crs, *(pixels or ()))
+
+        if out_format in ("csv", "xyz", "ply", "las", "npy", "parquet"):
+            OutputHandler(out_format).save(x, y, z, out_file, None, False, decimal,
+                                           transform, crs)
+            point_cloud.save_index(out_file)
 
-        # If not, set each [x, y, z] point on rows (vertically)
-        return pd.DataFrame(data=data, columns=['x', 'y', 'z'])
+        return point_cloud
 
     @staticmethod
-    def __save_numpy(x, y, z, transpose=False, **kwargs) -> np.array:
+    def __save_numpy(x, y, z, transpose=False, points=None, **kwargs) -> np.array:
         """
         Create a numpy array of shape (n, 3), filled with x, y and z.
         If "transpose" is set to True, return a numpy array of shape (3, n).
+        For a multi-band point cloud, the array is of shape (n, 2 + bands).
+        If x, y and z are the columns of the given "points", return it
+        without copy.
 
         :return: np.array matrix of shape (n, 3).
         :rtype: np.array
         """
 
         # Create a numpy array of shape (n, 3) with x, y, z
-        np_array = np.column_stack((x, y, z))
+        np_array = points if points is not None else np.column_stack((x, y, z))
 
         # If True, transpose the array to (3, n)
         if transpose:
@@ -0,0 +1,100 @@
+import numpy as np
+
+
+# PLY property types of the numpy dtypes
+PLY_TYPES = {
+    'i1': 'char', 'u1': 'uchar',
+    'i2': 'short', 'u2': 'ushort',
+    'i4': 'int', 'u4': 'uint',
+    'f4': 'float', 'f8': 'double'
+}
+
+# Type of the points written in a .ply file
+PLY_FIELD_TYPE = '<f4'
+
+
+def ply_dtype(names) -> np.dtype:
+    """
+    Create the structured dtype of the points written in a .ply file.
+
+    :param names: Names of the properties of the points.
+
+    :return: A structured dtype, with a float field per property.
+    :rtype: np.dtype
+    """
+    return np.dtype([(name, PLY_FIELD_TYPE) for name in names])
+
+
+# Default dtype of the points written in a .ply file
+PLY_DTYPE = ply_dtype("xyz")
+
+
+def ply_array(columns, dtype=None) -> np.ndarray:
+    """
+    Create a structured array of points, filled column by column.
+
+    :param columns: Dictionary of the columns of the points (ie: "x",
+        "y" and "z"), by name.
+
+    :return: A structured np.array with a field per column.
+    :rtype: np.array
+    """
+
+    dtype = dtype or ply_dtype(columns)
+    array = np.empty(len(next(iter(columns.values()))), dtype=dtype)
+
+    for name, values in columns.items():
+        array[name] = values
+
+    return array
+
+
+def ply_header(element, count, dtype=PLY_DTYPE, text=False) -> bytes:
+    """
+    Create the header of a .ply file, formatted as plyfile does.
+
+    :param element: Name of the element described by the header.
+    :param count: Number of points of the element.
+    :param dtype: Structured dtype of the points.
+    :param text: If True, create the header of an ascii file.
+
+    :return: The encoded header.
+    :rtype: bytes
+    """
+
+    ply_format = "ascii" if text else "binary_little_endian"
+
+    lines = ["ply", f"format {ply_format} 1.0", f"element {element} {count}"]
+    lines.extend(f"property {PLY_TYPES[dtype.fields[name][0].str[1:]]} {name}"
+                 for name in dtype.names)
+    lines.append("end_header")
+
+    return ("\n".join(lines) + "\n").encode("ascii")
+
+
+def write_binary_ply(out_file, element, columns, chunk_size=1 << 20) -> None:
+    """
+    Write a binary little-endian .ply file from the given columns. The
+    header is followed by the raw buffers of the points, written chunk
+    by chunk, without any Python loop over the points.
+
+    :param out_file: Path of the .ply file.
+    :param element: Name of the element in the .ply file.
+    :param columns: Dictionary of the columns of the points (ie: "x",
+        "y" and "z"), by name.
+    :param chunk_size: Number of points written at a time.
+
+    :return: None
+    """
+
+    dtype = ply_dtype(columns)
+    count = len(next(iter(columns.values())))
+
+    with open(out_file, "wb") as file:
+        file.write(ply_header(element, count, dtype))
+
+        for start in range(0, count, chunk_size):
+            chunk = {name: values[start:start + chunk_size]
+                     for name, values in columns.items()}
+
+            ply_array(chunk, dtype).tofile(file)
@@ -0,0 +1,298 @@
+import math
+
+import numpy as np
+from affine import Affine
+from rasterio.crs import CRS
+
+
+class PointCloud:
+    """
+    Point cloud translated from a raster, with a spatial index of its
+    points. Each pixel of the raster gives at most one point: the index
+    is a dense grid of the point of each pixel, and the spatial queries
+    are grid lookups instead of tree searches.
+
+    The grid row and column of each point are the pixel it was translated
+    from. If they are not given, they are computed from its x and y
+    coordinates, with the inverse of the affine transformation of the
+    raster: then, points rounded into the same pixel are indexed once.
+    Points rounded out of their pixel are searched in a margin of pixels
+    around the queries. The grid covers the rows and columns of the points: its memory usage
+    is proportional to their bounding box, in pixels.
+
+    :param x: X-array of coordinates.
+    :param y: Y-array of coordinates.
+    :param z: Z-array of values, of shape (n,), or (n, bands) for a
+        multi-band point cloud.
+    :param transform: Affine transformation from the pixel indices to the
+        x, y coordinates. If None, x and y are the pixel indices.
+    :param crs: Coordinate reference system of the x, y coordinates.
+    :param row: Grid row of each point. Default: None, computed.
+    :param col: Grid column of each point. Default: None, computed.
+
+    :type x: np.array
+    :type y: np.array
+    :type z: np.array
+    :type transform: affine.Affine, optional
+    :type crs: rasterio.crs.CRS, optional
+    :type row: np.array, optional
+    :type col: np.array, optional
+    """
+
+    def __init__(self, x, y, z, transform=None, crs=None, row=None, col=None):
+
+        self.x = x
+        self.y = y
+        self.z = z
+
+        self.transform = transform
+        self.crs = crs
+
+        # Grid indices of the points, and the number of pixels between
+        # the points and their pixel
+        if row is None or col is None:
+            col, row = self.__pixels(np.asarray(x), np.asarray(y))
+            self.margin = 0
+        else:
+            self.margin = self.__margin(x, y, row, col)
+
+        self.row, self.col = row, col
+
+        # Dense grid of the point index of each pixel, -1 without point
+        self.row_off, self.col_off, self.grid = self.__create_grid(self.row, self.col)
+
+    def __len__(self):
+        return len(self.z)
+
+    def to_numpy(self) -> np.array:
+        """
+        Create a numpy array of shape (n, 3), filled with x, y and z. For
+        a multi-band point cloud, the array is of shape (n, 2 + bands).
+
+        :rtype: np.array
+        """
+        return np.column_stack((self.x, self.y, self.z))
+
+    def bbox(self, left, bottom, right, top) -> np.array:
+        """
+        Find the points within a bounding box.
+
+        :param left: Minimum x coordinate.
+        :param bottom: Minimum y coordinate.
+        :param right: Maximum x coordinate.
+        :param top: Maximum y coordinate.
+
+        :return: The indices of the points in the box (inclusive), in
+            increasing order.
+        :rtype: np.array
+        """
+
+        # Pixels under the corners of the box
+        cols, rows = self.__pixels(np.array([left, right, left, right], dtype=np.float64),
+                                   np.array([bottom, bottom, top, top], dtype=np.float64))
+
+        # And the pixels around them, of the points rounded into the box
+        margin = self.margin
+        index = self.__window(rows.min() - margin, rows.max() + margin,
+                              cols.min() - margin, cols.max() + margin)
+
+        # Keep the points of the border pixels inside the box
+        x, y = self.x[index], self.y[index]
+        inside = (x >= left) & (x <= right) & (y >= bottom) & (y <= top)
+
+        return np.sort(index[inside])
+
+    def radius(self, x, y, r) -> np.array:
+        """
+        Find the points within a distance of a given point.
+
+        :param x: X coordinate of the point.
+        :param y: Y coordinate of the point.
+        :param r: Distance from the point (inclusive).
+
+        :return: The indices of the points, in increasing order.
+        :rtype: np.array
+        """
+
+        index = self.bbox(x - r, y - r, x + r, y + r)
+
+        return index[self.__distances(index, x, y) <= r]
+
+    def knn(self, x, y, k=1) -> tuple:
+        """
+        Find the k nearest points of a given point. The pixels around the
+        point are searched ring by ring, until the k-th nearest point is
+        closer than the searched area.
+
+        :param x: X coordinate of the point.
+        :param y: Y coordinate of the point.
+        :param k: Number of points to find. Default: 1.
+
+        :return: A tuple of (distances, indices) of the k nearest points,
+            sorted by distance. Less than k if the point cloud is smaller.
+        :rtype: tuple
+        """
+
+        col, row = (int(v[0]) for v in self.__pixels(np.array([x], dtype=np.float64),
+                                                       np.array([y], dtype=np.float64)))
+
+        # Distance covered by a pixel, in the direction of its shortest side
+        a, b, _, d, e, _ = (self.transform or Affine.identity())[:6]
+        pixel_size = min(math.hypot(a, d), math.hypot(b, e))
+
+        half = max(math.ceil(math.sqrt(k) / 2), 1)
+
+        while True:
+            index = self.__window(row - half, row + half, col - half, col + half)
+            distances = self.__distances(index, x, y)
+
+            # The window covers the whole grid: no other candidate
+            complete = row - half <= self.row_off and col - half <= self.col_off \
+                and row + half >= self.row_off + self.grid.shape[0] - 1 \
+                and col + half >= self.col_off + self.grid.shape[1] - 1
+
+            if len(index) < k and not complete:
+                half *= 2
+                continue
+
+            order = np.argsort(distances, kind="stable")[:k]
+
+            # A closer point may be outside of the window, or rounded out
+            # of it: expand it
+            farthest = distances[order[-1]] if len(order) else 0
+            if complete or farthest <= (half - self.margin) * pixel_size:
+                return distances[order], index[order]
+
+            half = math.ceil(farthest / pixel_size) + 1 + self.margin
+
+    def save_index(self, out_file) -> None:
+        """
+        Save the index of the point cloud to a "<out_file>.index.npz"
+        file, next to the file of its points. See "load_index".
+
+        :param out_file: Name of the file, without extension.
+        :type out_file: str
+        """
+
+        transform = np.array(self.transform[:6] if self.transform is not None else [])
+        crs = self.crs.to_wkt() if self.crs is not None else ""
+
+        np.savez(out_file + ".index.npz", grid=self.grid, row_off=self.row_off,
+                 col_off=self.col_off, margin=self.margin, transform=transform, crs=crs)
+
+    @classmethod
+    def load_index(cls, index_file, x, y, z):
+        """
+        Create a PointCloud from the given points and the index saved with
+        them by "save_index". The points must be in the order of the
+        point cloud which saved the index.
+
+        :param index_file: Path of the .index.npz file.
+        :param x: X-array of coordinates.
+        :param y: Y-array of coordinates.
+        :param z: Z-array of values.
+
+        :type index_file: str
+        :type x: np.array
+        :type y: np.array
+        :type z: np.array
+
+        :rtype: PointCloud
+        """
+
+        with np.load(index_file) as index:
+            transform = Affine(*index["transform"]) if index["transform"].size else None
+            crs = CRS.from_wkt(str(index["crs"])) if str(index["crs"]) else None
+
+            point_cloud = cls.__new__(cls)
+            point_cloud.x, point_cloud.y, point_cloud.z = x, y, z
+            point_cloud.transform = transform
+            point_cloud.crs = crs
+
+            point_cloud.grid = index["grid"]
+            point_cloud.row_off = int(index["row_off"])
+            point_cloud.col_off = int(index["col_off"])
+            point_cloud.margin = int(index["margin"]) if "margin" in index else 0
+
+        # Grid indices of the points, from their pixel in the grid
+        rows, cols = np.nonzero(point_cloud.grid >= 0)
+        order = point_cloud.grid[rows, cols]
+
+        point_cloud.row = np.empty(len(order), dtype=rows.dtype)
+        point_cloud.col = np.empty(len(order), dtype=cols.dtype)
+        point_cloud.row[order] = rows + point_cloud.row_off
+        point_cloud.col[order] = cols + point_cloud.col_off
+
+        return point_cloud
+
+    def __pixels(self, x, y):
+        """
+        Compute the column and row of the pixels under the given x and y
+        coordinates, with the inverse affine transformation.
+
+        :return: A tuple of (cols, rows), as np.array of int.
+        :rtype: tuple
+        """
+
+        if self.transform is None:
+            return np.floor(x).astype(np.int64), np.floor(y).astype(np.int64)
+
+        cols, rows = ~self.transform * (x.astype(np.float64, copy=False),
+                                         y.astype(np.float64, copy=False))
+
+        return np.floor(cols).astype(np.int64), np.floor(rows).astype(np.int64)
+
+    def __margin(self, x, y, rows, cols):
+        """
+        Compute the number of pixels between the given points and the
+        pixels they are indexed in (ie: after a rounding).
+
+        :rtype: int
+        """
+
+        if not len(rows):
+            return 0
+
+        pixel_cols, pixel_rows = self.__pixels(np.asarray(x), np.asarray(y))
+
+        return int(max(np.abs(pixel_rows - rows).max(), np.abs(pixel_cols - cols).max()))
+
+    @staticmethod
+    def __create_grid(rows, cols):
+        """
+        Create the dense grid of the point index of each pixel, over the
+        bounding box of the points. Pixels without point are -1.
+
+        :return: A tuple of (row offset, column offset, grid).
+        :rtype: tuple
+        """
+
+        if not len(rows):
+            return 0, 0, np.full((0, 0), -1, dtype=np.int32)
+
+        row_off, col_off = int(rows.min()), int(cols.min())
+        shape = (int(rows.max()) - row_off + 1, int(cols.max()) - col_off + 1)
+
+        grid = np.full(shape, -1, dtype=np.result_type(np.int32, np.min_scalar_type(-len(rows))))
+        grid[rows - row_off, cols - col_off] = np.arange(len(rows))
+
+        return row_off, col_off, grid
+
+    def __window(self, row_start, row_stop, col_start, col_stop):
+        """
+        Get the indices of the points of a window of pixels (inclusive),
+        clipped to the grid.
+
+        :return: np.array of the indices of the points, row by row.
+        """
+
+        rows = slice(max(row_start - self.row_off, 0), max(row_stop - self.row_off + 1, 0))
+        cols = slice(max(col_start - self.col_off, 0), max(col_stop - self.col_off + 1, 0))
+
+        index = self.grid[rows, cols].ravel()
+
+        return index[index >= 0]
+
+    def __distances(self, index, x, y):
+        """Return the distances of the given points to a (x, y) point."""
+        return np.hypot(self.x[index] - np.float64(x), self.y[index] - np.float64(y))
@@ -0,0 +1,297 @@
+import struct
+
+import numpy as np
+from lidario.io.output_handler import import_pyarrow
+
+
+class PointReader:
+    """
+    Read the x, y, z points of a point cloud given in any of the output
+    types of a Translator, chunk by chunk: the reverse of an
+    OutputHandler.
+
+    :param input_type: Type of point cloud data provided: an output type
+        of a Translator ("csv", "numpy", "dataframe", ...), or "chunks"
+        for an iterable of (x, y, z) tuples.
+    """
+
+    def __init__(self, input_type):
+        self.reader = self.__create_reader(input_type)
+
+    def read(self, input_values, chunk_size=None, transpose=False):
+        """
+        Return a generator of (x, y, z) chunks of the given point cloud.
+        The chunks of an in-memory point cloud are views of its arrays.
+        A file is read chunk by chunk, or memory-mapped if possible.
+
+        :param input_values: The point cloud, or the path of its file.
+        :param chunk_size: Maximum number of points of a chunk. If None,
+            read the whole point cloud at once.
+        :param transpose: If True, the points of a "numpy", "list" or
+            "tuple" point cloud are on columns: (3, n) instead of (n, 3).
+
+        :return: A generator of (x, y, z) tuples of np.array. For a
+            multi-band point cloud, z is of shape (n, bands).
+        """
+        return self.reader(input_values, chunk_size=chunk_size, transpose=transpose)
+
+    def __create_reader(self, input_type):
+
+        readers = {
+
+            # Files
+            "csv": self.__read_csv,
+            "xyz": self.__read_xyz,
+            "ply": self.__read_ply,
+            "las": self.__read_las,
+            "parquet": self.__read_parquet,
+            "npy": self.__read_npy,
+            "memmap": self.__read_npy,
+
+            # C-based data structures
+            "arrow": self.__read_arrow,
+            "dataframe": self.__read_dataframe,
+            "pandas": self.__read_dataframe,
+            "pd": self.__read_dataframe,
+            "df": self.__read_dataframe,
+            "pointcloud": self.__read_point_cloud,
+            "numpy": self.__read_numpy,
+            "np": self.__read_numpy,
+            "array": self.__read_numpy,
+
+            # Python data structures
+            "dictionary": self.__read_dictionary,
+            "dict": self.__read_dictionary,
+            "list": self.__read_numpy,
+            "tuple": self.__read_numpy,
+
+            # Iterable of (x, y, z) tuples (ie: Translator.translate_iter)
+            "chunks": self.__read_chunks,
+        }
+
+        return readers[input_type]
+
+    # Files
+    # -------------------------------------------------------------------------
+
+    @staticmethod
+    def __read_csv(input_values, chunk_size=None, **kwargs):
+        """Read a .csv file (or .csv.gz), with a header."""
+        import pandas as pd
+
+        frames = pd.read_csv(input_values, chunksize=chunk_size)
+
+        return PointReader.__read_frames(frames if chunk_size else [frames], chunk_size)
+
+    @staticmethod
+    def __read_xyz(input_values, chunk_size=None, **kwargs):
+        """Read a .xyz file (or .xyz.gz): x, y and z values, without header."""
+        import pandas as pd
+
+        frames = pd.read_csv(input_values, sep=" ", header=None, chunksize=chunk_size)
+
+        for frame in PointReader.__frames(frames if chunk_size else [frames], chunk_size):
+            columns = frame.to_numpy()
+            yield PointReader.__xyz_columns(columns[:, 0], columns[:, 1], columns[:, 2:])
+
+    @staticmethod
+    def __read_ply(input_values, chunk_size=None, **kwargs):
+        """Read the points of a .ply file: its first element."""
+        from plyfile import PlyData
+
+        # The element of the points is named after the file by lidario
+        vertices = PlyData.read(input_values).elements[0].data
+
+        return PointReader.__read_columns(
+            {name: vertices[name] for name in vertices.dtype.names}, len(vertices), chunk_size)
+
+    @staticmethod
+    def __read_las(input_values, chunk_size=None, **kwargs):
+        """
+        Read a .las file (LAS 1.0 to 1.4, any point data format): the
+        point records are memory-mapped, and their quantized coordinates
+        scaled chunk by chunk.
+        """
+
+        with open(input_values, "rb") as file:
+            header = file.read(375)
+
+        if header[:4] != b"LASF":
+            raise ValueError(f"Not a LAS file: {input_values}")
+
+        minor_version = header[25]
+        point_offset, = struct.unpack_from("<I", header, 96)
+        record_length, count = struct.unpack_from("<HI", header, 105)
+        scale = struct.unpack_from("<3d", header, 131)
+        offset = struct.unpack_from("<3d", header, 155)
+
+        # LAS 1.4 counts the points on 64 bits
+        if minor_version >= 4:
+            count, = struct.unpack_from("<Q", header, 247)
+
+        if not count:
+            return
+
+        # X, Y and Z lead the records of all the point data formats
+        dtype = np.dtype({'names': ['X', 'Y', 'Z'], 'formats': ['<i4'] * 3,
+                          'offsets': [0, 4, 8], 'itemsize': record_length})
+        records = np.memmap(input_values, dtype=dtype, mode="r", offset=point_offset,
+                            shape=(count,))
+
+        for chunk in PointReader.__slices(count, chunk_size):
+            yield tuple(records[name][chunk] * scale[axis] + offset[axis]
+                        for axis, name in enumerate("XYZ"))
+
+    @staticmethod
+    def __read_parquet(input_values, chunk_size=None, **kwargs):
+        """Read a .parquet file, row group by row group if chunked."""
+
+        import_pyarrow()
+        import pyarrow.parquet as pq
+
+        if chunk_size is None:
+            yield from PointReader.__read_arrow(pq.read_table(input_values))
+            return
+
+        for batch in pq.ParquetFile(input_values).iter_batches(batch_size=chunk_size):
+            yield from PointReader.__read_arrow(batch)
+
+    @staticmethod
+    def __read_npy(input_values, chunk_size=None, transpose=False, **kwargs):
+        """Memory-map a .npy file, of shape (n, 3) or structured."""
+
+        array = np.load(input_values, mmap_mode="r")
+
+        return PointReader.__read_numpy(array, chunk_size, transpose)
+
+    # C-based data structures
+    # -------------------------------------------------------------------------
+
+    @staticmethod
+    def __read_arrow(input_values, chunk_size=None, **kwargs):
+        """Read a pyarrow Table or RecordBatch, with "x", "y", "z" columns."""
+
+        batches = input_values.to_batches(chunk_size) if hasattr(input_values, "to_batches") \
+            else [input_values]
+
+        for batch in batches:
+            columns = {name: column.to_numpy(zero_copy_only=False)
+                       for name, column in zip(batch.schema.names, batch.columns)}
+
+            yield PointReader.__named_columns(columns)
+
+    @staticmethod
+    def __read_dataframe(input_values, chunk_size=None, **kwargs):
+        """Read a pandas dataframe, with "x", "y", "z" columns."""
+        return PointReader.__read_frames([input_values], chunk_size)
+
+    @staticmethod
+    def __read_point_cloud(input_values, chunk_size=None, **kwargs):
+        """Read a lidario.PointCloud."""
+
+        x, y, z = input_values.x, input_values.y, input_values.z
+
+        for chunk in PointReader.__slices(len(z), chunk_size):
+            yield x[chunk], y[chunk], z[chunk]
+
+    @staticmethod
+    def __read_numpy(input_values, chunk_size=None, transpose=False, **kwargs):
+        """
+        Read a np.array of shape (n, 3), or (n, 2 + bands), or a
+        structured array with "x", "y" and "z" fields. A list or a tuple
+        of points is converted to a np.array first.
+        """
+
+        array = np.asarray(input_values)
+
+        if array.dtype.names is not None:
+            return PointReader.__read_columns(
+                {name: array[name] for name in array.dtype.names}, len(array), chunk_size)
+
+        if transpose:
+            array = array.T
+
+        def read_chunks():
+            for chunk in PointReader.__slices(len(array), chunk_size):
+                points = array[chunk]
+                yield PointReader.__xyz_columns(points[:, 0], points[:, 1], points[:, 2:])
+
+        return read_chunks()
+
+    # Python data structures
+    # -------------------------------------------------------------------------
+
+    @staticmethod
+    def __read_dictionary(input_values, chunk_size=None, **kwargs):
+        """
+        Read a dictionary of columns: of arrays, or of {index: value}
+        dictionaries as returned by a "dictionary" Translator.
+        """
+
+        columns = {name: np.fromiter(column.values(), dtype=np.float64, count=len(column))
+                   if isinstance(column, dict) else np.asarray(column)
+                   for name, column in input_values.items()}
+
+        return PointReader.__read_columns(columns, len(columns['x']), chunk_size)
+
+    @staticmethod
+    def __read_chunks(input_values, **kwargs):
+        """Read an iterable of (x, y, z) tuples, as is."""
+        for x, y, z in input_values:
+            yield x, y, z
+
+    # Helpers
+    # -------------------------------------------------------------------------
+
+    @staticmethod
+    def __read_frames(frames, chunk_size):
+        """Read the x, y, z columns of an iterable of dataframes."""
+
+        for frame in PointReader.__frames(frames, chunk_size):
+            yield PointReader.__named_columns(
+                {name: frame[name].to_numpy() for name in frame.columns})
+
+    @staticmethod
+    def __frames(frames, chunk_size):
+        """Split the given dataframes into chunks of at most "chunk_size" rows."""
+
+        for frame in frames:
+            for chunk in PointReader.__slices(len(frame), chunk_size):
+                yield frame.iloc[chunk]
+
+    @staticmethod
+    def __read_columns(columns, count, chunk_size):
+        """Read a dictionary of columns, by chunks of rows."""
+
+        for chunk in PointReader.__slices(count, chunk_size):
+            yield PointReader.__named_columns(
+                {name: column[chunk] for name, column in columns.items()})
+
+    @staticmethod
+    def __named_columns(columns):
+        """
+        Return the (x, y, z) of a dictionary of columns: "x", "y" and "z",
+        or "z1", "z2", ... for a multi-band point cloud.
+        """
+
+        if 'z' in columns:
+            return columns['x'], columns['y'], columns['z']
+
+        bands = sorted((name for name in columns if name[:1] == "z" and name[1:].isdigit()),
+                       key=lambda name: int(name[1:]))
+
+        return columns['x'], columns['y'], np.column_stack([columns[name] for name in bands])
+
+    @staticmethod
+    def __xyz_columns(x, y, z):
+        """Return the z of a single band as a (n,) array, else as (n, bands)."""
+        return x, y, z[:, 0] if z.shape[1] == 1 else z
+
+    @staticmethod
+    def __slices(count, chunk_size):
+        """Yield the slices of the chunks of "count" points."""
+
+        chunk_size = chunk_size or max(count, 1)
+
+        for start in range(0, count, chunk_size):
+            yield slice(start, start + chunk_size)
@@ -0,0 +1,240 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+
+
+class ResultCache:
+    """
+    On-disk cache of the files saved by a Translator, to translate only the
+    tiles which changed since the last run. The files are keyed by a hash
+    of the input file and of the parameters of the translation. An
+    unchanged tile is not translated again: its file is restored from the
+    cache, or left as is if it is already up to date.
+
+    The cache is a directory, with a "manifest.json" file which describes
+    its entries. The least recently used entries are removed when the
+    cache grows beyond "max_size". Share the directory between runs, but
+    not between processes running at the same time.
+
+    :param directory: Directory of the cache. Created if missing.
+    :param max_size: Maximum size of the cached files, in bytes. Default:
+        None, unbounded.
+    :param hash_content: If True, identify an input file by a hash of its
+        content, which survives a copy or a touch of the file, but reads
+        the whole file. If False (default), identify it by its path, size
+        and modification time.
+
+    :type directory: str
+    :type max_size: int, optional
+    :type hash_content: bool, optional
+    """
+
+    def __init__(self, directory, max_size=None, hash_content=False):
+
+        self.directory = os.fspath(directory)
+        self.max_size = max_size
+        self.hash_content = hash_content
+
+        os.makedirs(self.directory, exist_ok=True)
+        self.__manifest_file = os.path.join(self.directory, "manifest.json")
+
+        # key: {"files": [suffix, ...], "size": bytes, "last_used": time}
+        self.__entries = self.__load_manifest()
+
+        # (path, size, mtime): content hash, to hash each file once
+        self.__hashes = {}
+
+        self.__lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.__entries)
+
+    def __contains__(self, key):
+        return key in self.__entries
+
+    @property
+    def size(self) -> int:
+        """Total size of the cached files, in bytes."""
+        return sum(entry["size"] for entry in self.__entries.values())
+
+    def key(self, input_values, params):
+        """
+        Return the key of the translation of an input file with the given
+        parameters.
+
+        :param input_values: Path of the input file.
+        :param params: JSON-serializable parameters of the translation.
+
+        :return: The key, as an hexadecimal string. None if the input is
+            not a file: it can not be cached.
+        :rtype: str
+        """
+
+        if not isinstance(input_values, (str, os.PathLike)) or \
+                not os.path.isfile(input_values):
+            return None
+
+        payload = json.dumps([self.__identity(os.fspath(input_values)), params],
+                             sort_keys=True, default=repr)
+
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def restore(self, key, out_file) -> bool:
+        """
+        Restore the cached files of the given key to "out_file" plus their
+        extension. The files which are already identical to the cached
+        ones are left as is.
+
+        :param key: Key of the translation, see "key".
+        :param out_file: Name of the output files, without extension.
+
+        :return: True if the files are restored, False if they are not
+            cached.
+        :rtype: bool
+        """
+
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is None:
+                return False
+
+            cached_files = [os.path.join(self.directory, key, "output" + suffix)
+                            for suffix in entry["files"]]
+
+            # The cache was modified from the outside
+            if not all(os.path.exists(cached) for cached in cached_files):
+                self.evict(key)
+                return False
+
+            for suffix, cached in zip(entry["files"], cached_files):
+                target = out_file + suffix
+
+                if not self.__same_file(cached, target):
+                    shutil.copy2(cached, target)
+
+            entry["last_used"] = time.time()
+            self.__save_manifest()
+
+            return True
+
+    def store(self, key, out_file, suffixes) -> None:
+        """
+        Copy the files saved by a translation to the cache, and remove the
+        least recently used entries if the cache is full.
+
+        :param key: Key of the translation, see "key".
+        :param out_file: Name of the output files, without extension.
+        :param suffixes: Extensions of the output files (ie: ".csv").
+            The missing files are not cached.
+
+        :type key: str
+        :type out_file: str
+        :type suffixes: list
+        """
+
+        suffixes = [suffix for suffix in suffixes if os.path.exists(out_file + suffix)]
+        if key is None or not suffixes:
+            return
+
+        with self.__lock:
+            self.evict(key)
+
+            entry_directory = os.path.join(self.directory, key)
+            os.makedirs(entry_directory)
+
+            for suffix in suffixes:
+                shutil.copy2(out_file + suffix, os.path.join(entry_directory, "output" + suffix))
+
+            size = sum(os.path.getsize(out_file + suffix) for suffix in suffixes)
+            self.__entries[key] = {"files": suffixes, "size": size,
+                                   "last_used": time.time()}
+
+            # Remove the least recently used entries
+            if self.max_size is not None:
+                by_use = sorted(self.__entries, key=lambda k: self.__entries[k]["last_used"])
+
+                while by_use and self.size > self.max_size:
+                    self.__remove(by_use.pop(0))
+
+            self.__save_manifest()
+
+    def evict(self, key) -> None:
+        """
+        Remove the cached files of the given key.
+
+        :param key: Key of the translation, see "key".
+        :type key: str
+        """
+
+        with self.__lock:
+            if self.__remove(key):
+                self.__save_manifest()
+
+    def clear(self) -> None:
+        """
+        Remove all the cached files.
+        """
+
+        with self.__lock:
+            for key in list(self.__entries):
+                self.__remove(key)
+
+            self.__save_manifest()
+
+    def __remove(self, key):
+        """Remove an entry and its files, without saving the manifest."""
+
+        shutil.rmtree(os.path.join(self.directory, key), ignore_errors=True)
+
+        return self.__entries.pop(key, None) is not None
+
+    def __identity(self, path):
+        """Identify an input file by its content hash, or by its stats."""
+
+        stat = os.stat(path)
+        stats = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+
+        if not self.hash_content:
+            return stats
+
+        if stats not in self.__hashes:
+            digest = hashlib.sha256()
+
+            with open(path, "rb") as file:
+                for block in iter(lambda: file.read(1 << 20), b""):
+                    digest.update(block)
+
+            self.__hashes[stats] = digest.hexdigest()
+
+        return self.__hashes[stats]
+
+    @staticmethod
+    def __same_file(cached, target):
+        """Return True if the target is a copy of the cached file."""
+        try:
+            cached_stat, target_stat = os.stat(cached), os.stat(target)
+        except OSError:
+            return False
+
+        return cached_stat.st_size == target_stat.st_size and \
+            cached_stat.st_mtime_ns == target_stat.st_mtime_ns
+
+    def __load_manifest(self):
+        """Read the entries of the manifest file, if any."""
+        try:
+            with open(self.__manifest_file) as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {}
+
+    def __save_manifest(self):
+        """Write the entries to the manifest file, atomically."""
+
+        temporary = self.__manifest_file + ".tmp"
+        with open(temporary, "w") as file:
+            json.dump(self.__entries, file)
+
+        os.replace(temporary, self.__manifest_file)
@@ -0,0 +1,102 @@
+import gzip
+import io
+from itertools import chain
+
+import numpy as np
+
+
+# Compression level of the gzip files: the default of the gzip tool,
+# several times faster than the level 9 of the gzip module
+GZIP_LEVEL = 6
+
+
+class TextWriter:
+    """
+    Write x, y, z points to a delimited text file (.csv, .xyz), chunk by
+    chunk. Each chunk is formatted at once from the columns, with a single
+    format string, and written through a large buffered file handle.
+
+    :param out_file: Path of the text file.
+    :param delimiter: Delimiter of the values on a row.
+    :param header: Names of the columns, written on the first row. If
+        None, no header is written.
+    :param decimal: Number of decimals of the float values. If None,
+        write the shortest representation of the floats.
+    :param compression: If "gzip", compress the file with gzip.
+    :param compresslevel: Level of the gzip compression, from 1 (fastest)
+        to 9 (smallest).
+    :param chunk_size: Number of points formatted at a time.
+    :param buffer_size: Size of the file buffer, in bytes.
+    """
+
+    def __init__(self, out_file, delimiter=",", header=None, decimal=None,
+                 compression=None, compresslevel=GZIP_LEVEL, chunk_size=1 << 16,
+                 buffer_size=1 << 24):
+
+        self.delimiter = delimiter
+        self.decimal = decimal
+        self.chunk_size = chunk_size
+
+        # Compress the text through the same large buffer
+        if compression == "gzip":
+            compressed = gzip.GzipFile(out_file, "wb", compresslevel=compresslevel)
+            self.file = io.TextIOWrapper(io.BufferedWriter(compressed, buffer_size),
+                                         encoding="ascii", newline="")
+        else:
+            self.file = open(out_file, "w", buffering=buffer_size,
+                             encoding="ascii", newline="")
+
+        if header is not None:
+            self.file.write(delimiter.join(header) + "\n")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def write(self, *columns) -> None:
+        """
+        Write the given columns of points (ie: x, y, z) to the file.
+        """
+
+        row_format = self.__row_format(columns)
+        count = len(columns[0])
+
+        for start in range(0, count, self.chunk_size):
+            chunk = [column[start:start + self.chunk_size].tolist()
+                     for column in columns]
+
+            values = tuple(chain.from_iterable(zip(*chunk)))
+            self.file.write((row_format * len(chunk[0])) % values)
+
+    def close(self) -> None:
+        self.file.close()
+
+    def __row_format(self, columns) -> str:
+        """
+        Create the format string of a row: integers as they are, floats
+        with a fixed number of decimals if asked.
+        """
+
+        if self.decimal is None:
+            float_format = "%r"
+        else:
+            float_format = f"%.{max(self.decimal, 0)}f"
+
+        formats = ["%d" if np.issubdtype(column.dtype, np.integer)
+                   else float_format for column in columns]
+
+        return self.delimiter.join(formats) + "\n"
+
+
+def write_text(out_file, x, y, z, **kwargs) -> None:
+    """
+    Write x, y, z points to a delimited text file. See TextWriter for
+    the keyword arguments.
+
+    :return: None
+    """
+
+    with TextWriter(out_file, **kwargs) as writer:
+        writer.write(x, y, z)
@@ -7,18 +7,26 @@ class MetadataReader:
     Instantiate a MetadataReader object which will handle the metadata
     retrieval from the given input.
 
-    :param input_type: Type of raster data provided: "**geotiff**" or "**mask**".
+    :param input_type: Type of raster data provided: "**geotiff**",
+        "**bytes**", "**memoryfile**", "**mask**" or "**array**".
 
         - "geotiff": a .tif raster file.
+        - "bytes": the content of a .tif file, held in memory.
+        - "memoryfile": a *rasterio.io.MemoryFile* of a .tif file.
         - "mask", a *rasterio.mask.mask()* result.
+        - "array": a Numpy array, with its affine transformation.
+
+    :param cache: A lidario.DatasetCache, to memoize the metadata of the
+        geotiff files. By default, the files are opened on each call.
 
     :type input_type: str
+    :type cache: lidario.DatasetCache, optional
     """
 
-    def __init__(self, input_type):
+    def __init__(self, input_type, cache=None):
 
         # Handle the input of files/objects
-        self.input_handler = InputHandler(input_type)
+        self.input_handler = InputHandler(input_type, cache)
 
     def get_metadata(self, input_values):
         """
@@ -28,7 +36,10 @@ class MetadataReader:
             Translator's "input_type" parameter:
 
             - For a "**geotiff**": Takes the path to your .tif file (string).
+            - For a "**bytes**": Takes the bytes of a .tif file, read without any disk I/O.
+            - For a "**memoryfile**": Takes a rasterio.io.MemoryFile, left open.
             - For a "**mask**": Takes the np.array returned by a rasterio.mask.mask() method.
+            - For an "**array**": Takes a (np.array, affine transformation) or a (np.array, affine transformation, nodata) tuple. The array is of shape (rows, cols) or (bands, rows, cols), and is not copied.
 
         :return: A dictionary of the metadata.
         :rtype: dict
@@ -0,0 +1,175 @@
+import logging
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+
+logger = logging.getLogger("lidario")
+
+
+class Stage:
+    """Running measures of a stage of the translation pipeline."""
+
+    __slots__ = ("name", "count", "elapsed", "resumed", "start_memory", "peak_memory")
+
+    def __init__(self, name):
+        self.name = name
+
+        # Number of pixels or points processed, set by the stage
+        self.count = None
+
+        self.elapsed = 0.0
+        self.resumed = 0.0
+        self.start_memory = 0
+        self.peak_memory = 0
+
+
+# Stage of a disabled profiler: nothing is measured, the count set by the
+# stage is ignored
+NULL_STAGE = nullcontext(Stage(None))
+
+
+class Profiler:
+    """
+    Record the wall time, the number of pixels or points, and the peak
+    memory allocated (with tracemalloc) of each stage of a translation.
+
+    The time of a stage excludes the time of the stages nested in it (ie:
+    the "save" stage of a chunked translation excludes the reading and
+    the translation of the chunks). Its peak memory includes them. With
+    threads, the stages run concurrently: their times add up, and their
+    peak memory is approximate.
+
+    :param memory: If False, do not trace the memory: tracemalloc slows
+        down the allocations of Python objects (ie: the text outputs).
+    """
+
+    def __init__(self, memory=True):
+        self.memory = memory
+        self.stats = {}
+
+        self.__lock = threading.Lock()
+        self.__local = threading.local()
+
+        self.__started = 0.0
+        self.__start_memory = 0
+        self.__peak_memory = 0
+        self.__tracing = False
+
+    def start(self) -> None:
+        """Forget the previous measures, and start tracing the memory."""
+
+        self.stats = {}
+
+        # Do not stop a tracing started by the user
+        self.__tracing = self.memory and not tracemalloc.is_tracing()
+        if self.__tracing:
+            tracemalloc.start()
+
+        self.__start_memory = self.__peak_memory = self.__traced_memory()[0]
+        self.__started = time.perf_counter()
+
+    def stop(self, name="translate") -> dict:
+        """
+        Stop tracing the memory, record the "total" of the stages, and log
+        the measures of each stage at the DEBUG level.
+
+        :param name: Name of the profiled call, in the log messages.
+
+        :return: The stats, by stage name.
+        :rtype: dict
+        """
+
+        seconds = time.perf_counter() - self.__started
+        peak_memory = max(self.__peak_memory, self.__traced_memory()[1])
+
+        if self.__tracing:
+            tracemalloc.stop()
+
+        self.stats["total"] = {"seconds": seconds, "calls": 1}
+        if self.memory:
+            self.stats["total"]["peak_mib"] = (peak_memory - self.__start_memory) / 2 ** 20
+
+        for stage, stats in self.stats.items():
+            counts = "".join(f", {stats[key]} {key}" for key in ("pixels", "points")
+                             if key in stats)
+            peak = f", peak {stats['peak_mib']:.1f} MiB" if self.memory else ""
+
+            logger.debug("%s %s: %.3f s%s%s", name, stage, stats["seconds"], counts,
+                         peak, extra={"stage": stage, "stats": stats})
+
+        return self.stats
+
+    @contextmanager
+    def stage(self, name, counter="points"):
+        """
+        Measure a stage of the pipeline. The stage sets the "count" of the
+        yielded Stage object to the number of items it processed.
+
+        :param name: Name of the stage: "read", "points", "transform", ...
+        :param counter: Name of the items counted: "pixels" or "points".
+        """
+
+        stack = self.__stack()
+        now = time.perf_counter()
+
+        # Pause the parent stage, and keep its peak memory so far
+        if stack:
+            parent = stack[-1]
+            parent.elapsed += now - parent.resumed
+            parent.peak_memory = max(parent.peak_memory, self.__traced_memory()[1])
+
+        if self.memory and hasattr(tracemalloc, "reset_peak"):
+            tracemalloc.reset_peak()
+
+        stage = Stage(name)
+        stage.start_memory = stage.peak_memory = self.__traced_memory()[0]
+        stage.resumed = time.perf_counter()
+        stack.append(stage)
+
+        try:
+            yield stage
+
+        finally:
+            now = time.perf_counter()
+            stack.pop()
+
+            stage.elapsed += now - stage.resumed
+            stage.peak_memory = max(stage.peak_memory, self.__traced_memory()[1])
+
+            # Resume the parent stage
+            if stack:
+                stack[-1].resumed = now
+                stack[-1].peak_memory = max(stack[-1].peak_memory, stage.peak_memory)
+
+            self.__record(stage, counter)
+
+    def __traced_memory(self):
+        """Return the (current, peak) traced memory, (0, 0) if not traced."""
+        return tracemalloc.get_traced_memory() if self.memory else (0, 0)
+
+    def __stack(self):
+        """Return the stack of the running stages of the current thread."""
+        if not hasattr(self.__local, "stack"):
+            self.__local.stack = []
+
+        return self.__local.stack
+
+    def __record(self, stage, counter):
+        """Add the measures of a stage to the stats."""
+
+        peak = (stage.peak_memory - stage.start_memory) / 2 ** 20
+
+        with self.__lock:
+            self.__peak_memory = max(self.__peak_memory, stage.peak_memory)
+
+            stats = self.stats.setdefault(stage.name, {"seconds": 0.0, "calls": 0})
+            stats["seconds"] += stage.elapsed
+            stats["calls"] += 1
+
+            if self.memory:
+                stats["peak_mib"] = max(stats.get("peak_mib", 0.0), peak)
+
+            if stage.count is not None:
+                stats[counter] = stats.get(counter, 0) + int(stage.count)
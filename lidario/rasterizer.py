@@ -0,0 +1,348 @@
+import numpy as np
+import rasterio
+from lidario.io.point_reader import PointReader
+
+
+# Ways to combine the z values of the points which fall in the same pixel
+AGGREGATES = ("last", "mean", "min", "max", "count")
+
+# Number of points located and aggregated at a time, to bound the
+# temporary arrays
+BLOCK_SIZE = 1 << 20
+
+
+class Rasterizer:
+    """
+    Instantiate a Rasterizer object which will handle the translation of
+    a point cloud back to a raster: the reverse of a Translator. Each
+    point falls in the pixel under its x and y coordinates, and the z
+    values of the points of a pixel are aggregated.
+
+    :param input_type: Type of point cloud data provided: any output type
+        of a Translator, or "**chunks**".
+
+        - "csv", "xyz", "ply", "las", "npy", "parquet": the path of a file.
+        - "arrow", "pointcloud", "numpy", "dataframe", "dictionary",
+          "list", "tuple": the point cloud.
+        - "chunks": an iterable of (x, y, z) tuples (ie: the generator
+          returned by Translator.translate_iter).
+
+    :param aggregate: Value of a pixel with several points: the z of the
+        "**last**" point (default), or the "**mean**", "**min**" or
+        "**max**" of their z, or their "**count**".
+    :param nodata: Value of the pixels without any point. Default: -9999.
+        If the type of the raster can not hold it, the raster is
+        promoted to a larger type (ie: "uint8" to "int16").
+    :param dtype: Type of the raster. Default: the type of the z values,
+        "float64" for "mean", and "uint32" for "count".
+    :param metadata: If True, the "rasterize" method will return a tuple
+        with the raster and its metadata. If False (default), it will
+        only return the raster.
+
+    :type input_type: str
+    :type aggregate: str, optional
+    :type nodata: int or float, optional
+    :type dtype: str or np.dtype, optional
+    :type metadata: bool, optional
+    """
+
+    def __init__(self, input_type, aggregate="last", nodata=-9999, dtype=None,
+                 metadata=False):
+
+        if aggregate not in AGGREGATES:
+            raise ValueError(f"Unknown aggregate: {aggregate}. Expected one of {AGGREGATES}")
+
+        self.input_type = input_type
+        self.point_reader = PointReader(input_type)
+
+        self.aggregate = aggregate
+        self.nodata = nodata
+        self.dtype = dtype
+        self.return_metadata = metadata
+
+    def rasterize(self, input_values, transform, shape=None, out_file=None, crs=None,
+                  chunk_size=None, transpose=False):
+        """
+        Rasterize a given "input_values" on the grid of the given affine
+        transformation.
+
+        :param input_values: Point cloud to rasterize, or the path of its
+            file. See the Rasterizer's "input_type".
+        :param transform: Affine transformation of the raster: from the
+            pixel indices to the x, y coordinates.
+        :param shape: (rows, cols) shape of the raster. The points outside
+            of it are ignored. By default, the raster covers the points
+            from the origin of the transformation: the point cloud is read
+            twice.
+        :param out_file: Name of the GeoTIFF file to save the raster to,
+            without extension: "<out_file>.tif". The file is tiled and
+            compressed. Default: None, the raster is not saved.
+        :param crs: Coordinate reference system of the raster, saved in
+            the GeoTIFF file.
+        :param chunk_size: Number of points read at a time, for a point
+            cloud which does not fit in memory (ie: a large csv file).
+            The raster is accumulated chunk by chunk. By default, the
+            point cloud is read at once.
+        :param transpose: If True, the points of a "numpy", "list" or
+            "tuple" point cloud are on columns: (3, n) instead of (n, 3).
+
+        :type input_values: str, np.array, pd.DataFrame, dict, list or tuple
+        :type transform: affine.Affine
+        :type shape: tuple, optional
+        :type out_file: str, optional
+        :type crs: str or rasterio.crs.CRS, optional
+        :type chunk_size: int, optional
+        :type transpose: bool, optional
+
+        :return: The raster, as a np.array of shape (rows, cols), or
+            (bands, rows, cols) for a multi-band point cloud.
+        :rtype: np.array
+        """
+
+        def read_chunks():
+            return self.point_reader.read(input_values, chunk_size, transpose)
+
+        # From the x, y coordinates to the pixel indices
+        inverse = ~transform
+
+        if shape is None:
+            if self.input_type == "chunks":
+                raise ValueError("The shape of the raster is required to rasterize chunks")
+
+            shape = self.__extent(read_chunks(), inverse)
+
+        height, width = shape
+        accumulator = Accumulator(self.aggregate, height * width)
+
+        for x, y, z in read_chunks():
+            for block in range(0, len(z), BLOCK_SIZE):
+                points = slice(block, block + BLOCK_SIZE)
+
+                cells, inside = self.__cells(x[points], y[points], inverse, height, width)
+                accumulator.add(cells, np.asarray(z[points])[inside])
+
+        raster = accumulator.raster(self.nodata, self.dtype)
+
+        # (cells, bands) to (bands, rows, cols)
+        if raster.ndim == 2:
+            raster = raster.T.reshape(-1, height, width)
+        else:
+            raster = raster.reshape(height, width)
+
+        metadata = {'driver': "GTiff", 'dtype': raster.dtype.name,
+                    'nodata': None if self.aggregate == "count" else self.nodata,
+                    'width': width, 'height': height,
+                    'count': raster.shape[0] if raster.ndim == 3 else 1,
+                    'crs': crs, 'transform': transform}
+
+        if out_file is not None:
+            self.__save_geotiff(raster, out_file, metadata)
+
+        if self.return_metadata:
+            return raster, metadata
+
+        return raster
+
+    @staticmethod
+    def __cells(x, y, inverse, height, width):
+        """
+        Compute the flat index (row * width + col) of the pixel of each
+        point, with the inverse affine transformation.
+
+        :return: A tuple of (flat indices of the points inside the raster,
+            mask of the points inside the raster).
+        :rtype: tuple
+        """
+
+        cols = Rasterizer.__pixels(x, y, inverse.a, inverse.b, inverse.c)
+        rows = Rasterizer.__pixels(x, y, inverse.d, inverse.e, inverse.f)
+
+        # Compare the floats: NaN and huge coordinates are outside
+        inside = (cols >= 0) & (cols < width) & (rows >= 0) & (rows < height)
+
+        cells = rows[inside].astype(np.int64)
+        cells *= width
+        cells += cols[inside].astype(np.int64)
+
+        return cells, inside
+
+    @staticmethod
+    def __pixels(x, y, x_factor, y_factor, offset):
+        """Compute the floored pixel coordinate x_factor * x + y_factor * y + offset."""
+
+        pixels = np.multiply(x, x_factor, dtype=np.float64)
+
+        # Skip the rotation term of a north-up raster
+        if y_factor:
+            pixels += np.multiply(y, y_factor, dtype=np.float64)
+
+        pixels += offset
+
+        return np.floor(pixels, out=pixels)
+
+    @staticmethod
+    def __extent(chunks, inverse):
+        """Return the (rows, cols) shape which covers the given points."""
+
+        height = width = 0
+
+        for x, y, _ in chunks:
+            for block in range(0, len(x), BLOCK_SIZE):
+                points = slice(block, block + BLOCK_SIZE)
+
+                cols = Rasterizer.__pixels(x[points], y[points], inverse.a, inverse.b, inverse.c)
+                rows = Rasterizer.__pixels(x[points], y[points], inverse.d, inverse.e, inverse.f)
+
+                inside = (cols >= 0) & (rows >= 0)
+                if inside.any():
+                    width = max(width, int(cols[inside].max()) + 1)
+                    height = max(height, int(rows[inside].max()) + 1)
+
+        return height, width
+
+    @staticmethod
+    def __save_geotiff(raster, out_file, metadata):
+        """Save the raster to a tiled and compressed GeoTIFF file."""
+
+        if not raster.size:
+            raise ValueError("The raster is empty: no point is inside it")
+
+        floating = np.issubdtype(raster.dtype, np.floating)
+
+        with rasterio.open(out_file + ".tif", "w", **metadata, tiled=True,
+                           blockxsize=256, blockysize=256, compress="deflate",
+                           predictor=3 if floating else 2, BIGTIFF="IF_SAFER") as writer:
+            writer.write(raster if raster.ndim == 3 else raster[np.newaxis])
+
+
+class Accumulator:
+    """
+    Aggregate the z values of the points, pixel by pixel, block of
+    points after block of points. The reductions are unbuffered ufunc.at
+    calls on the accumulators, or np.bincount when a block is as large
+    as the raster.
+
+    :param aggregate: "last", "mean", "min", "max" or "count".
+    :param size: Number of pixels of the raster.
+    """
+
+    def __init__(self, aggregate, size):
+        self.aggregate = aggregate
+        self.size = size
+
+        # Created on the first block, with the type and bands of its z
+        self.values = None
+        self.counts = np.zeros(size, dtype=np.int64) \
+            if aggregate in ("mean", "count") else None
+        self.filled = np.zeros(size, dtype=bool) \
+            if aggregate not in ("mean", "count") else None
+
+    def add(self, cells, z) -> None:
+        """
+        Add the z values of the points in the given pixels.
+
+        :param cells: Flat indices of the pixels of the points.
+        :param z: Z values of the points, of shape (n,) or (n, bands).
+        """
+
+        if self.aggregate == "count":
+            self.__count(cells)
+            return
+
+        if self.values is None:
+            self.values = self.__create_values(z)
+
+        if self.aggregate == "mean":
+            self.__count(cells)
+
+            z = z.astype(np.float64, copy=False)
+            if len(cells) >= self.size:
+                for band, values in enumerate(self.__bands(z)):
+                    self.__bands(self.values)[band] += np.bincount(
+                        cells, weights=values, minlength=self.size)
+            else:
+                np.add.at(self.values, cells, z)
+            return
+
+        # Same type as the accumulator: the fast path of ufunc.at
+        z = z.astype(self.values.dtype, copy=False)
+
+        if self.aggregate == "min":
+            np.minimum.at(self.values, cells, z)
+        elif self.aggregate == "max":
+            np.maximum.at(self.values, cells, z)
+        else:
+            # The last of the repeated indices is assigned
+            self.values[cells] = z
+
+        self.filled[cells] = True
+
+    def raster(self, nodata=-9999, dtype=None) -> np.array:
+        """
+        Return the aggregated value of each pixel, "nodata" for the
+        pixels without any point.
+
+        :return: A np.array of shape (size,), or (size, bands).
+        :rtype: np.array
+        """
+
+        if self.aggregate == "count":
+            return self.counts.astype(dtype or np.uint32)
+
+        # Without any point, a single band of no data
+        if self.values is None:
+            self.values = np.zeros(self.size, dtype=dtype or np.float64)
+
+        if self.aggregate == "mean":
+            empty = self.counts == 0
+            counts = np.maximum(self.counts, 1)
+            values = self.values / (counts[:, np.newaxis] if self.values.ndim == 2 else counts)
+        else:
+            empty = ~self.filled
+            values = self.values
+
+        dtype = np.dtype(dtype or values.dtype)
+
+        # Promote the raster to hold the no data value
+        if not np.can_cast(np.min_scalar_type(nodata), dtype):
+            dtype = np.promote_types(dtype, np.min_scalar_type(nodata))
+            if dtype == np.float16:
+                dtype = np.dtype(np.float32)
+
+        raster = values.astype(dtype, copy=False)
+        raster[empty] = nodata
+
+        return raster
+
+    def __create_values(self, z):
+        """Create the accumulator of the values, with the identity of the aggregate."""
+
+        shape = (self.size, *z.shape[1:])
+
+        if self.aggregate == "mean":
+            return np.zeros(shape, dtype=np.float64)
+
+        dtype = z.dtype
+        info = np.finfo(dtype) if np.issubdtype(dtype, np.floating) else np.iinfo(dtype)
+
+        if self.aggregate == "min":
+            return np.full(shape, info.max, dtype=dtype)
+
+        if self.aggregate == "max":
+            return np.full(shape, info.min, dtype=dtype)
+
+        return np.zeros(shape, dtype=dtype)
+
+    def __count(self, cells):
+        """Count the points of each pixel."""
+
+        if len(cells) >= self.size:
+            self.counts += np.bincount(cells, minlength=self.size)
+        else:
+            np.add.at(self.counts, cells, 1)
+
+    @staticmethod
+    def __bands(values):
+        """Return the bands of the values, as a list of (size,) views."""
+        return [values] if values.ndim == 1 else [values[:, band] for band in
+                                                  range(values.shape[1])]
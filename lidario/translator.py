@@ -1,6 +1,19 @@
 
+import inspect
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+
 import numpy as np
-from lidario.io import InputHandler, OutputHandler
+from lidario.io import DatasetCache, InputHandler, OutputHandler
+from lidario.io.output_handler import output_extension
+from lidario.profiler import NULL_STAGE, Profiler
+from lidario import batch
+
+
+# Parameters of "translate" which change the saved file
+RESULT_PARAMS = ("out_format", "no_data", "decimal", "transpose", "band", "dtype",
+                 "chunked", "window_size", "decimate", "resolution", "resampling",
+                 "bounds", "geometry")
 
 
 class Translator:
@@ -8,16 +21,26 @@ class Translator:
     Instantiate a Translator object which will handle the translation between
     given input and desired output type.
 
-    :param input_type: Type of raster data provided: "**geotiff**" or "**mask**".
+    :param input_type: Type of raster data provided: "**geotiff**",
+        "**bytes**", "**memoryfile**", "**mask**" or "**array**".
 
         - "geotiff": a .tif raster file.
+        - "bytes": the content of a .tif file, held in memory.
+        - "memoryfile": a *rasterio.io.MemoryFile* of a .tif file.
         - "mask", a *rasterio.mask.mask()* result.
+        - "array": a Numpy array, with its affine transformation.
 
     :param output_type: Type of point cloud data to return: "**csv**",
         "**numpy**", "**pandas**", "**dictionary**", "**list**", "**tuple**".
 
         - "csv": a CSV file.
+        - "xyz": a .xyz file, with space separated values.
         - "ply": a .ply file.
+        - "las": a .las file (LAS 1.2 or 1.4, point data format 0).
+        - "npy": a .npy file, returned as a memory-mapped Numpy array. Alternative: "memmap".
+        - "parquet": a .parquet file (requires pyarrow).
+        - "arrow": a pyarrow Table (requires pyarrow).
+        - "pointcloud": a lidario.PointCloud, with a spatial index for bbox, radius and k-nearest queries.
         - "numpy": a Numpy array. Alternatives: "np", "array".
         - "dataframe": A Pandas dataframe: Alternatives: "pandas", "pd", "df".
         - "dictionary": A pure Python dictionary: Alternative: "dict".
@@ -30,24 +53,58 @@ class Translator:
         with the point cloud and the metadata. If False (default), it will
         only return the point cloud.
 
+    :param cache: A lidario.DatasetCache, to keep the geotiff files open
+        and memoize their metadata between the calls. By default, the
+        files are opened and closed on each call.
+    :param profile: If True, measure each stage of the "translate" calls:
+        "read", "count", "points", "transform", "round" and "save". After
+        a call, the "stats" attribute holds the wall time, the number of
+        pixels or points and the peak memory allocated of each stage, and
+        of the "total" call. The stats are also logged at the DEBUG level
+        by the "lidario" logger. If "time", the memory is not traced,
+        which slows down the text outputs less. Default: False, nothing
+        is measured.
+    :param result_cache: A lidario.ResultCache, to skip the translation
+        of the unchanged geotiff files: if a file was translated with the
+        same parameters, its saved point cloud is restored from the cache.
+        Used only if the "output_type" is a file type: "csv", "xyz",
+        "ply", "las", "npy", "parquet". Default: None.
+
     :type input_type: str
     :type output_type: str
     :type affine_transform: bool, optional
     :type metadata: bool, optional
+    :type cache: lidario.DatasetCache, optional
+    :type profile: bool or str, optional
+    :type result_cache: lidario.ResultCache, optional
     """
 
-    def __init__(self, input_type, output_type, affine_transform=True, metadata=False):
+    def __init__(self, input_type, output_type, affine_transform=True, metadata=False,
+                 cache=None, profile=False, result_cache=None):
+
+        self.input_type = input_type
+        self.output_type = output_type
 
         # Handle the input and output files/objects
-        self.input_handler = InputHandler(input_type)
+        self.input_handler = InputHandler(input_type, cache)
         self.output_handler = OutputHandler(output_type)
 
         # True point cloud has to be geo-transformed
         self.affine_transform = affine_transform
         self.return_metadata = metadata
 
+        # Measures of the stages of the last "translate" call, if profiled
+        self.profile = profile
+        self.profiler = Profiler(memory=profile != "time") if profile else None
+        self.stats = None
+
+        # Saved files of the previous translations
+        self.result_cache = result_cache
+
     def translate(self, input_values, out_file="output1.csv", out_format="binary",
-                  no_data=None, decimal=None, transpose=False, band=1):
+                  no_data=None, decimal=None, transpose=False, band=1, threads=None,
+                  dtype=None, chunked=False, window_size=None, decimate=None,
+                  resolution=None, resampling="nearest", bounds=None, geometry=None):
         """
         Translate a given "input_values" into a X, Y, Z point cloud.
 
@@ -55,34 +112,101 @@ class Translator:
             Translator's "input_type" parameter:
 
             - For a "**geotiff**": Takes the path to your .tif file (string).
+            - For a "**bytes**": Takes the bytes of a .tif file, read without any disk I/O.
+            - For a "**memoryfile**": Takes a rasterio.io.MemoryFile, left open.
             - For a "**mask**": Takes the np.array returned by a rasterio.mask.mask() method.
+            - For an "**array**": Takes a (np.array, affine transformation) or a (np.array, affine transformation, nodata) tuple. The array is of shape (rows, cols) or (bands, rows, cols), and is not copied.
 
         :param out_file: Name of the file to save the point cloud.
-            Used only if the Translator's "output_type" is a file type: "csv", "ply".
+            Used only if the Translator's "output_type" is a file type: "csv", "xyz", "ply", "las", "npy", "parquet".
             Optional, default: "output.csv".
 
-        :param out_format: Data format to save the file: "**binary**" (default)
-            or "**ascii**" (not recommended, may be slow). Used only when "ply"
-            is specified as "output_type". Optional.
+        :param out_format: Data format to save the file. Optional.
+
+            - For a "**ply**": "**binary**" (default) or "**ascii**" (not recommended, may be slow).
+            - For a "**csv**" or "**xyz**": "**gzip**" to compress the file. Plain text otherwise.
+            - For a "**las**": "**1.4**" to write a LAS 1.4 file. LAS 1.2 otherwise.
+            - For a "**parquet**": the compression codec, "**snappy**" (default), "**gzip**", "**brotli**", "**lz4**", "**zstd**" or "**none**".
+            - For a "**npy**": "**structured**" to save a structured array with "x", "y" and "z" fields. A (n, 3) array otherwise.
+            - For a "**pointcloud**": a file type, "**csv**", "**xyz**", "**ply**", "**las**", "**npy**" or "**parquet**", to also save the points to this file, with the spatial index next to it ("<out_file>.index.npz").
 
         :param no_data: Value to exclude from the translation.
 
             - For a "**geotiff**": By default, use the nodata value stored in the tif file. If this value is missing, use -9999.
+            - For a "**bytes**" or "**memoryfile**": like a "**geotiff**".
             - For a "**mask**": By default, use -9999.
+            - For an "**array**": By default, use the nodata of the tuple, if any, or -9999.
 
-        :param band: Band of the raster to translate. Used only if Translator's
-            "input_values" is "geotiff". Default: 1.
+            It can also be NaN, or a (min, max) tuple of the range of values
+            to exclude (inclusive).
+
+        :param band: Band of the raster to translate, or list of bands. Not
+            used if Translator's "input_values" is "mask". Default: 1.
+            With a list, the bands are read at once, and the point cloud
+            has a z column per band: "z1", "z2", ... in the order of the
+            list. A pixel is translated if it has data in all the bands.
         :param decimal: Round the coordinate numbers to the given decimal.
             Default: None.
         :param transpose: If True, transpose the coordinates. Default: False.
+        :param threads: Number of threads. If greater than 1, the raster is
+            split in bands of rows, translated in parallel. The points are
+            returned in the same order as a serial translation.
+            Default: None.
+        :param dtype: Float type of the geo-transformed x and y coordinates:
+            "float32" or "float64". "float32" halves the memory used by the
+            coordinates, but loses precision for large coordinates.
+            Default: "float64". Without affine transformation, x and y
+            are the pixel indices, stored in the smallest integer type
+            which fits the raster.
+        :param chunked: If True, read the raster window by window (see
+            "translate_iter"), and stream the points to the output. The
+            "csv", "xyz", "las" and "parquet" files are written chunk by
+            chunk, the "arrow" table is made of the chunks, and
+            the "npy" file is preallocated from a first count of the points
+            (see "count_points") then filled chunk by chunk. The other
+            outputs are concatenated. Default: False.
+        :param window_size: Size of the windows read when "chunked" is True.
+            See "translate_iter".
+        :param decimate: Resampling factor, to control the density of the
+            point cloud: the size of a point's pixel, in pixels of the
+            raster. 4 reads the raster on a grid 4 times coarser (16 times
+            less points), 0.5 on a grid 2 times finer. The raster is read
+            directly on the resampled grid. Default: None.
+        :param resolution: Size of a point's pixel, in units of the
+            coordinates, as a number or a (x, y) tuple. Used instead of
+            "decimate". Default: None.
+        :param resampling: Name of the resampling method of rasterio, used
+            with "decimate" or "resolution": "nearest" (default), "average",
+            "min", "max", "med", "bilinear", "cubic", ... The resampling
+            ignores the "no_data" value (or the nodata of the raster, for
+            a range).
+        :param bounds: A (left, bottom, right, top) tuple, in the coordinates
+            of the raster. Only the pixels within these bounds are read and
+            translated. Not used if Translator's "input_values" is "mask".
+            Default: None.
+        :param geometry: A GeoJSON-like geometry (or any object with a
+            "__geo_interface__"), or a list of geometries, in the
+            coordinates of the raster. Only the window which covers the
+            geometry is read, and only the pixels whose center is inside
+            the geometry are translated. Not used if Translator's
+            "input_values" is "mask". Default: None.
 
-        :type input_values: str or np.array
+        :type input_values: str, bytes, rasterio.io.MemoryFile or tuple
         :type out_file: str, optional
         :param out_format: str, optional
-        :type no_data: int, optional
+        :type no_data: int, float or tuple, optional
         :type decimal: int, optional
         :type transpose: bool, optional
-        :type band: bool, optional
+        :type band: int or list, optional
+        :type threads: int, optional
+        :type dtype: str or np.dtype, optional
+        :type chunked: bool, optional
+        :type window_size: int or tuple, optional
+        :type decimate: float, optional
+        :type resolution: float or tuple, optional
+        :type resampling: str, optional
+        :type bounds: tuple, optional
+        :type geometry: dict or list, optional
 
         :return: The translated point cloud, typed as specified. If
             Translator's "output_type" is set to "csv", return None instead
@@ -90,54 +214,769 @@ class Translator:
             return a tuple with the point cloud and the metadata.
         """
 
-        # Load the raster and metadata
-        raster, metadata = self.input_handler.load(True, input_values, band)
+        # Serve an unchanged translation from the result cache
+        result_key, restored, point_cloud = self.__restore(input_values, out_file, locals())
+        if restored:
+            return point_cloud
+
+        read = dict(decimate=decimate, resolution=resolution,
+                    resampling=resampling, bounds=bounds, geometry=geometry)
+
+        with self.__profile("translate"):
+
+            # Stream the points, window by window, to the output
+            if chunked:
+                metadata, chunks = self.__iter_points(
+                    input_values, no_data, decimal, band, window_size, dtype, read,
+                    self.output_handler.requires_pixels)
+
+                # Count the points first, to preallocate the output
+                count = None
+                if self.output_handler.requires_count:
+                    with self.__stage("count") as stage:
+                        count = stage.count = self.count_points(
+                            input_values, no_data, band, window_size, **read)
+
+                with self.__stage("save"):
+                    point_cloud = self.output_handler.save_chunks(
+                        chunks, out_file, out_format, transpose, decimal,
+                        *self.__coordinates_reference(metadata), count)
+
+            else:
+                # Load the raster and metadata, resampled without the no
+                # data values
+                with self.__stage("read", "pixels") as stage:
+                    raster, metadata = self.input_handler.load(True, input_values, band,
+                                                               nodata=no_data, **read)
+                    stage.count = raster.size
+
+                if no_data is None:
+                    no_data = metadata['nodata']
+
+                # Translate the points in the array returned by the output
+                points_dtype = self.__points_dtype(raster, dtype, decimal) \
+                    if self.output_handler.accepts_points else None
+
+                # Create a (x, y, z) point cloud from raster data, with the
+                # (row, col) pixels of the points if the output needs them.
+                # An empty raster has no bands of rows to thread
+                pixels = self.output_handler.requires_pixels
+                if threads is not None and threads > 1 and raster.shape[-2]:
+                    x, y, z, *pixels = self.__translate_threaded(
+                        raster, no_data, metadata['transform'], decimal, dtype, threads,
+                        points_dtype, pixels)
+                else:
+                    x, y, z, *pixels = self.__translate_points(
+                        raster, no_data, metadata['transform'], decimal, dtype,
+                        points_dtype=points_dtype, pixels=pixels)
+
+                # Save the point cloud. The columns are views of the
+                # preallocated points, if any
+                with self.__stage("save") as stage:
+                    point_cloud = self.output_handler.save(
+                        x, y, z, out_file, out_format, transpose, decimal,
+                        *self.__coordinates_reference(metadata),
+                        points=x.base if points_dtype is not None else None,
+                        pixels=pixels or None)
+                    stage.count = len(z)
+
+        if result_key is not None:
+            self.__store(result_key, out_file, out_format)
+
+        # If self.return_metadata is True, return the metadata
+        if self.return_metadata:
+            return point_cloud, metadata
+
+        # If not, return only the point cloud
+        return point_cloud
+
+    def translate_many(self, inputs, out_dir=".", workers=None,
+                       max_in_flight=None, progress=None, **kwargs):
+        """
+        Translate many "input_values" in parallel, over a pool of
+        processes. Each worker opens its own rasterio handles.
+
+        :param inputs: Iterable of data values to translate (ie: paths of
+            .tif files). See "translate".
+        :param out_dir: Directory where the point clouds are saved, if the
+            Translator's "output_type" is a file type. Each file is named
+            after its input file. Default: current directory.
+        :param workers: Number of processes. Default: the number of CPUs.
+            With a single worker, the tiles are translated in the current
+            process.
+        :param max_in_flight: Maximum number of tiles being translated or
+            waiting to be returned, to cap the memory in use. Default:
+            twice the number of workers.
+        :param progress: Callable, called in the main process with
+            (tile_result, done, total) each time a tile is translated.
+        :param kwargs: Other keyword arguments of "translate": out_format,
+            no_data, decimal, transpose, band.
+
+        :type inputs: iterable
+        :type out_dir: str, optional
+        :type workers: int, optional
+        :type max_in_flight: int, optional
+        :type progress: callable, optional
+
+        :return: A list of lidario.batch.TileResult (index, input_values,
+            out_file, result, error, stats), in the order of the given
+            inputs. A tile which failed has its exception in "error". If
+            the Translator is profiled, "stats" holds the stats of the tile.
+        :rtype: list
+        """
+
+        settings = (self.input_type, self.output_type, self.affine_transform,
+                    self.return_metadata, self.profile)
+
+        # Restore the unchanged tiles in this process, cache the others
+        restore = store = None
+        if self.result_cache is not None:
+            keys = {}
+
+            def restore(index, input_values, out_file):
+                keys[index], restored, result = self.__restore(input_values, out_file, kwargs)
+                if restored:
+                    return batch.TileResult(index, input_values, out_file, result, None, None)
+
+            def store(tile):
+                self.__store(keys.pop(tile.index), tile.out_file, kwargs.get("out_format"))
+
+        return batch.translate_many(settings, inputs, out_dir, workers, max_in_flight,
+                                    progress, restore, store, **kwargs)
+
+    def translate_geometries(self, input_values, geometries, out_file="output",
+                             **kwargs):
+        """
+        Translate the pixels of a given "input_values" inside each of the
+        given geometries (ie: extract the point cloud of many parcels from
+        a single tif file). The tif file is opened once for all the
+        geometries, and only the window which covers each geometry is read.
+
+        :param input_values: Path of the .tif file to translate.
+        :param geometries: Iterable of GeoJSON-like geometries, in the
+            coordinates of the raster. See "translate".
+        :param out_file: Name of the files to save the point clouds, if the
+            Translator's "output_type" is a file type. The point cloud of
+            the n-th geometry is saved as "<out_file>_<n>".
+            Default: "output".
+        :param kwargs: Other keyword arguments of "translate".
+
+        :type input_values: str
+        :type geometries: iterable
+        :type out_file: str, optional
+
+        :return: A list of the results of "translate", one per geometry, in
+            the order of the given geometries.
+        :rtype: list
+        """
+
+        # Keep the dataset open between the geometries
+        if self.input_handler.cache is not None:
+            return [self.translate(input_values, f"{out_file}_{index}",
+                                   geometry=geometry, **kwargs)
+                    for index, geometry in enumerate(geometries)]
+
+        # Else, cache it for the duration of the call only
+        with DatasetCache(maxsize=1) as cache:
+            self.input_handler.cache = cache
+
+            try:
+                return self.translate_geometries(input_values, geometries,
+                                                 out_file, **kwargs)
+            finally:
+                self.input_handler.cache = None
+
+    def count_points(self, input_values, no_data=None, band=1, window_size=None,
+                     decimate=None, resolution=None, resampling="nearest",
+                     bounds=None, geometry=None):
+        """
+        Count the points of the point cloud of a given "input_values",
+        without creating it: read the raster window by window, and count
+        its valid data.
+
+        :param input_values: Data values to translate. See "translate".
+        :param no_data: Value to exclude from the translation. See "translate".
+        :param band: Band of the raster to translate. Default: 1.
+        :param window_size: Size of the windows to read. See "translate_iter".
+        :param decimate: Resampling factor. See "translate".
+        :param resolution: Resampling resolution. See "translate".
+        :param resampling: Resampling method. See "translate".
+        :param bounds: Bounds of the pixels to count. See "translate".
+        :param geometry: Geometry of the pixels to count. See "translate".
+
+        :return: The number of points.
+        :rtype: int
+        """
+
+        metadata, windows = self.input_handler.load_windows(
+            input_values, band, window_size, decimate=decimate,
+            resolution=resolution, resampling=resampling, bounds=bounds,
+            geometry=geometry, nodata=no_data)
+
+        if no_data is None:
+            no_data = metadata['nodata']
+
+        return sum(int(np.count_nonzero(self.__create_mask(raster, no_data)))
+                   for raster, _ in windows)
+
+    def translate_iter(self, input_values, no_data=None, decimal=None, band=1,
+                       window_size=None, dtype=None, decimate=None, resolution=None,
+                       resampling="nearest", bounds=None, geometry=None):
+        """
+        Translate a given "input_values" into a X, Y, Z point cloud, one
+        window at a time. Instead of reading the whole raster, walk its
+        windows and yield a batch of points for each of them. The peak
+        memory usage is bounded by the size of the windows, not by the
+        size of the raster.
+
+        :param input_values: Data values to translate. See "translate".
+        :param no_data: Value to exclude from the translation. See "translate".
+        :param decimal: Round the coordinate numbers to the given decimal.
+            Default: None.
+        :param band: Band of the raster to translate, or list of bands. See
+            "translate". Default: 1.
+        :param window_size: Size of the windows to read, as an int (square
+            windows) or a (rows, cols) tuple. By default, use the internal
+            blocks of the geotiff, or a single window for a "mask".
+        :param dtype: Float type of the geo-transformed x and y coordinates.
+            See "translate".
+        :param decimate: Resampling factor. See "translate".
+        :param resolution: Resampling resolution. See "translate".
+        :param resampling: Resampling method. See "translate".
+        :param bounds: Bounds of the pixels to translate. See "translate".
+        :param geometry: Geometry of the pixels to translate. See "translate".
+
+        :type input_values: str or np.array
+        :type no_data: int, optional
+        :type decimal: int, optional
+        :type band: int or list, optional
+        :type window_size: int or tuple, optional
+        :type dtype: str or np.dtype, optional
+        :type decimate: float, optional
+        :type resolution: float or tuple, optional
+        :type resampling: str, optional
+        :type bounds: tuple, optional
+        :type geometry: dict or list, optional
+
+        :return: A generator of (x, y, z) tuples of np.array. Windows
+            without any data are skipped. For a list of bands, z is of
+            shape (n, bands).
+        """
+
+        read = dict(decimate=decimate, resolution=resolution,
+                    resampling=resampling, bounds=bounds, geometry=geometry)
+
+        return self.__iter_points(input_values, no_data, decimal, band,
+                                  window_size, dtype, read)[1]
+
+    def __iter_points(self, input_values, no_data, decimal, band, window_size,
+                      dtype, read, pixels=False):
+        """
+        Open the given "input_values", and return its metadata with a
+        generator of (x, y, z) points, window by window.
+
+        :param pixels: If True, yield (x, y, z, row, col) tuples, with the
+            pixels of the points in the grid.
+
+        :return: A tuple of (metadata, generator of (x, y, z) tuples).
+        :rtype: tuple
+        """
+
+        # Open the raster and get the metadata
+        metadata, windows = self.input_handler.load_windows(
+            input_values, band, window_size, nodata=no_data, **read)
 
         if no_data is None:
             no_data = metadata['nodata']
 
+        # Same type of pixel indices in all the windows
+        index_dtype = self.__index_dtype(metadata['height'], metadata['width'])
+
+        def translate_windows():
+            for raster, window in self.__profile_reads(windows):
+
+                # Create a (x, y, z) point cloud from the window data
+                points = self.__translate_points(
+                    raster, no_data, metadata['transform'], decimal, dtype,
+                    window.row_off, window.col_off, index_dtype=index_dtype,
+                    pixels=pixels)
+
+                if points[2].size:
+                    yield points
+
+        return metadata, translate_windows()
+
+    def __restore(self, input_values, out_file, arguments):
+        """
+        Restore the saved file of a translation from the result cache, if
+        its input and its parameters did not change.
+
+        :param arguments: Arguments of "translate", by name. The missing
+            ones take their default value.
+
+        :return: A tuple of (key, restored, point cloud): the key of the
+            translation in the cache (None if it can not be cached), True
+            if the file is restored, and the value "translate" returns.
+        :rtype: tuple
+        """
+
+        if self.result_cache is None or output_extension(self.output_type) is None:
+            return None, False, None
+
+        # Parameters of the translation, with their default value
+        parameters = inspect.signature(Translator.translate).parameters
+        params = {name: arguments.get(name, parameters[name].default)
+                  for name in RESULT_PARAMS}
+
+        key = self.result_cache.key(input_values, [self.input_type, self.output_type,
+                                                   self.affine_transform, params])
+
+        if key is None or not self.result_cache.restore(key, out_file):
+            return key, False, None
+
+        point_cloud = self.output_handler.load(out_file, params['out_format'],
+                                               params['transpose'])
+
+        if self.return_metadata:
+            read = {name: params[name] for name in
+                    ("decimate", "resolution", "resampling", "bounds", "geometry")}
+            metadata = self.input_handler.load(False, input_values, params['band'], **read)
+
+            return key, True, (point_cloud, metadata)
+
+        return key, True, point_cloud
+
+    def __store(self, key, out_file, out_format):
+        """Copy the file saved by a translation to the result cache."""
+        if key is not None:
+            self.result_cache.store(key, out_file,
+                                    [output_extension(self.output_type, out_format)])
+
+    def __profile(self, name):
+        """
+        Return a context manager which profiles a call: it resets the
+        stats at the start, and sets the "stats" attribute at the end.
+        Does nothing if the Translator is not profiled.
+        """
+
+        if self.profiler is None:
+            return nullcontext()
+
+        @contextmanager
+        def profile():
+            self.profiler.start()
+            try:
+                yield
+            finally:
+                self.stats = self.profiler.stop(name)
+
+        return profile()
+
+    def __stage(self, name, counter="points"):
+        """
+        Return a context manager which measures a stage of the pipeline,
+        or a shared no-op one if the Translator is not profiled.
+        """
+
+        if self.profiler is None:
+            return NULL_STAGE
+
+        return self.profiler.stage(name, counter)
+
+    def __profile_reads(self, windows):
+        """
+        Measure each read of a generator of (raster, window) tuples, as a
+        "read" stage. Return the generator as is if the Translator is not
+        profiled.
+        """
+
+        if self.profiler is None:
+            return windows
+
+        def profiled_windows():
+            iterator = iter(windows)
+
+            while True:
+                with self.__stage("read", "pixels") as stage:
+                    item = next(iterator, None)
+                    if item is not None:
+                        stage.count = item[0].size
+
+                if item is None:
+                    return
+
+                yield item
+
+        return profiled_windows()
+
+    def __coordinates_reference(self, metadata):
+        """
+        Return the affine transformation from the pixel indices to the
+        coordinates of the points, and their coordinate reference system.
+        Without affine geo-transformation, the coordinates are the pixel
+        indices: return (None, None).
+
+        :return: A tuple of (transform, crs).
+        :rtype: tuple
+        """
+
+        if not self.affine_transform:
+            return None, None
+
+        return metadata['transform'], metadata.get('crs')
+
+    def __translate_points(self, raster, no_data, transform, decimal,
+                           dtype=None, row_off=0, col_off=0, points_dtype=None,
+                           mask=None, points=None, index_dtype=None, pixels=False):
+        """
+        Translate raster data into a x, y, z point cloud: infer the
+        points, geo-transform and round them.
+
+        With a "points_dtype", the valid pixels are counted first, and
+        the stages write the points in a single preallocated array of
+        shape (n, 2 + bands): x, y and z are its columns.
+
+        :param raster: Raster data as numpy array.
+        :param no_data: No data value of the raster.
+        :param transform: Affine geo-transformation of the whole raster.
+        :param decimal: Round the coordinate numbers to the given decimal.
+        :param dtype: Float type of the geo-transformed x and y.
+        :param row_off: Row offset of the raster data in the whole raster.
+        :param col_off: Column offset of the raster data in the whole raster.
+        :param points_dtype: Type of the preallocated points, see
+            "__points_dtype". Default: None, x, y and z are separate arrays.
+        :param mask: Mask of the valid data of the raster, if already
+            computed.
+        :param points: Preallocated array of the points, if already
+            allocated.
+        :param index_dtype: Integer type of the pixel indices, see
+            "__create_xyz_points".
+        :param pixels: If True, also return the row and column of the
+            pixel of each point in the grid, before the geo-transformation
+            and the rounding. Not supported with preallocated points.
+
+        :return: Tuple of np.array containing the point cloud: (x, y, z),
+            or (x, y, z, row, col) with "pixels".
+        :rtype tuple
+        """
+
         # Create a (x, y, z) point cloud from raster data
-        x, y, z = self.__create_xyz_points(raster, no_data)
+        with self.__stage("points") as stage:
+            if mask is None:
+                mask = self.__create_mask(raster, no_data)
 
-        # Geo-transform the coordinates
+            if points is None and points_dtype is not None:
+                points = self.__allocate_points(np.count_nonzero(mask), raster, points_dtype)
+
+            x, y, z = self.__create_xyz_points(raster, mask, row_off, col_off, points,
+                                               index_dtype)
+            stage.count = len(z)
+
+        # The geo-transformation writes new arrays: copy the indices only
+        # if they are rounded in place
+        if pixels:
+            row, col = (y.copy(), x.copy()) if decimal is not None and \
+                not self.affine_transform else (y, x)
+
+        # Geo-transform the coordinates, in place in the points
         if self.affine_transform:
-            x, y = self.__affine_geo_transformation(x, y, metadata['transform'])
+            with self.__stage("transform") as stage:
+                x, y = self.__affine_geo_transformation(
+                    x, y, transform, dtype or np.float64, in_place=points is not None)
+                stage.count = len(x)
 
         # Round the numbers
         if decimal is not None:
-            x, y, z = self.__round(x, y, z, decimal)
+            with self.__stage("round") as stage:
+                x, y, z = self.__round(x, y, z, decimal)
+                stage.count = len(z)
 
-        # Save the point cloud
-        point_cloud = self.output_handler.save(x, y, z, out_file, out_format, transpose)
+        if pixels:
+            return x, y, z, row, col
 
-        # If self.return_metadata is True, return the metadata
-        if self.return_metadata:
-            return point_cloud, metadata
+        return x, y, z
 
-        # If not, return only the point cloud
-        return point_cloud
+    def __translate_threaded(self, raster, no_data, transform, decimal, dtype,
+                             threads, points_dtype=None, pixels=False):
+        """
+        Translate raster data into a x, y, z point cloud, with a pool of
+        threads. The raster is split in bands of rows, translated in
+        parallel (NumPy releases the GIL) and concatenated in order.
+
+        With a "points_dtype", the valid pixels of each band are counted
+        first, and the bands are translated in their slice of a single
+        preallocated array of points, without concatenation.
+
+        :param threads: Number of threads.
+        :param points_dtype: Type of the preallocated points, see
+            "__points_dtype".
+        :param pixels: If True, also return the row and column of the
+            pixels of the points. See "__translate_points".
+
+        :return: Tuple of np.array containing the point cloud: (x, y, z),
+            or (x, y, z, row, col) with "pixels".
+        :rtype tuple
+        """
+
+        # Create more bands than threads, to balance the load
+        rows = raster.shape[-2]
+        step = max(-(-rows // (threads * 4)), 1)
+        row_offs = range(0, rows, step)
+
+        def band(row_off):
+            return raster[..., row_off:row_off + step, :]
+
+        # Same type of pixel indices in all the bands
+        index_dtype = self.__index_dtype(*raster.shape[-2:])
+
+        def translate_band(row_off, mask=None, points=None):
+            return self.__translate_points(band(row_off), no_data, transform, decimal,
+                                           dtype, row_off, mask=mask, points=points,
+                                           index_dtype=index_dtype, pixels=pixels)
+
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            if points_dtype is None:
+                bands = list(executor.map(translate_band, row_offs))
+                return tuple(np.concatenate(column) for column in zip(*bands))
+
+            # Count the points of each band, to find its slice of the points
+            masks = list(executor.map(lambda row_off: self.__create_mask(band(row_off), no_data),
+                                      row_offs))
+            counts = [np.count_nonzero(mask) for mask in masks]
+            stops = np.cumsum(counts)
+            starts = stops - counts
+
+            points = self.__allocate_points(sum(counts), raster, points_dtype)
+
+            def fill_band(row_off, mask, start, stop):
+                return translate_band(row_off, mask, points[start:stop])
+
+            list(executor.map(fill_band, row_offs, masks, starts, stops))
+
+        return self.__point_columns(points, raster)
+
+    def __points_dtype(self, raster, dtype, decimal):
+        """
+        Return the type of an array of shape (n, 2 + bands) of the points:
+        the type np.column_stack gives to x, y and z. The stages can write
+        in such an array only if they compute in its type: the points are
+        then the same as with separate x, y and z arrays.
+
+        :return: The np.dtype of the points, or None if the stages can not
+            write in an array of points.
+        :rtype: np.dtype
+        """
+
+        # Type of x and y: the float type, or the type of the pixel indices
+        if self.affine_transform:
+            coordinates = np.dtype(dtype or np.float64)
+        else:
+            coordinates = self.__index_dtype(*raster.shape[-2:])
+
+        points_dtype = np.result_type(coordinates, raster.dtype)
+
+        # The affine transformation is computed in the float type
+        if self.affine_transform and points_dtype != coordinates:
+            return None
+
+        # The z values are rounded in their type
+        if decimal is not None and np.issubdtype(raster.dtype, np.floating) \
+                and points_dtype != raster.dtype:
+            return None
+
+        return points_dtype
 
     @staticmethod
-    def __create_xyz_points(raster, no_data=-9999):
+    def __index_dtype(height, width):
         """
-        Infer x, y, z points from raster data.
+        Return the smallest signed integer type of the pixel indices of a
+        grid of the given height and width.
+        """
+        return np.result_type(np.min_scalar_type(-max(height, 1)),
+                              np.min_scalar_type(-max(width, 1)))
+
+    @staticmethod
+    def __allocate_points(count, raster, points_dtype):
+        """Allocate the array of shape (count, 2 + bands) of the points of a raster."""
+
+        bands = len(raster) if raster.ndim == 3 else 1
+
+        return np.empty((count, 2 + bands), dtype=points_dtype)
+
+    @staticmethod
+    def __point_columns(points, raster):
+        """Return the x, y and z columns of an array of points, as views."""
+
+        z = points[:, 2:] if raster.ndim == 3 else points[:, 2]
+
+        return points[:, 0], points[:, 1], z
+
+    @staticmethod
+    def __create_mask(raster, no_data=-9999):
+        """
+        Create the mask of the valid data of a raster.
+
+        :param raster: Raster data as numpy array. For a multi-band raster,
+            of shape (bands, rows, cols), a pixel is valid if it is valid
+            in all the bands. For a masked array, the masked pixels are
+            not valid.
+        :param no_data: No data value of the raster. Can be NaN, or a
+            (min, max) tuple of the range of no data values (inclusive).
+
+        :type raster: np.array
+        :type no_data: int, float or tuple
+
+        :return: A boolean np.array, True where the raster has data.
+        :rtype: np.array
+        """
+
+        # Masked raster (ie: outside of a geometry), the same in all bands
+        if np.ma.isMaskedArray(raster):
+            mask = Translator.__create_mask(raster.data, no_data)
+            masked = np.ma.getmaskarray(raster)
+
+            mask &= ~(masked[0] if masked.ndim == 3 else masked)
+            return mask
+
+        # Multi-band raster: valid where all the bands are valid
+        if raster.ndim == 3:
+            mask = Translator.__create_mask(raster[0], no_data)
+
+            for band in raster[1:]:
+                mask &= Translator.__create_mask(band, no_data)
+
+            return mask
+
+        # Range of no data values
+        if isinstance(no_data, (tuple, list)):
+            low, high = no_data
+            mask = raster < low
+            mask |= raster > high
+
+        # NaN is never equal to itself: look for NaN values
+        elif isinstance(no_data, (float, np.floating)) and np.isnan(no_data):
+            mask = np.isnan(raster)
+            np.logical_not(mask, out=mask)
+
+        else:
+            mask = raster != no_data
+
+        return mask
+
+    @staticmethod
+    def __take_bands(raster, index):
+        """
+        Get the values of each band of a multi-band raster, at the given
+        flat indices.
+
+        :param raster: Raster data of shape (bands, rows, cols).
+        :param index: Flat indices of the points in a band.
+
+        :return: np.array of shape (n, bands), with contiguous columns.
+        :rtype: np.array
+        """
+
+        z = np.empty((len(raster), index.size), dtype=raster.dtype)
+
+        for values, band in zip(z, raster):
+            np.take(np.ravel(band), index, out=values)
+
+        return z.T
+
+    @staticmethod
+    def __take(values, index, out, chunk_size=1 << 16):
+        """
+        Take the values at the given flat indices into "out", of any type
+        and strides (ie: a column of the points). np.take buffers an
+        output which is not contiguous or of the same type: the values
+        are taken chunk by chunk instead, through a temporary array of at
+        most "chunk_size" values.
+        """
+
+        # The indices are valid: "clip" skips the buffer of "raise"
+        if out.dtype == values.dtype and out.flags.c_contiguous:
+            np.take(values, index, out=out, mode="clip")
+            return
+
+        buffer = np.empty(min(chunk_size, index.size), dtype=values.dtype)
+
+        for start in range(0, index.size, chunk_size):
+            chunk = slice(start, start + chunk_size)
+            out[chunk] = np.take(values, index[chunk], out=buffer[:index[chunk].size],
+                                 mode="clip")
+
+    @staticmethod
+    def __create_xyz_points(raster, mask, row_off=0, col_off=0, points=None,
+                            index_dtype=None):
+        """
+        Infer x, y, z points from raster data. The x, y and z are derived
+        from the flat indices of the mask of the valid data. The x and y
+        indices are stored in the "index_dtype", or in the given array of
+        points.
 
         :param raster: Raster data as numpy array.
-        :param no_data: No data value of the raster.
+        :param mask: Mask of the valid data of the raster. See "__create_mask".
+        :param row_off: Row offset of the raster data in the whole raster.
+        :param col_off: Column offset of the raster data in the whole raster.
+        :param points: Array of shape (n, 2 + bands) to write the points
+            in, n being the number of valid pixels. Default: None, x, y
+            and z are allocated.
+        :param index_dtype: Integer type of the x and y indices, the same
+            for all the windows of a raster. Default: the smallest type
+            which fits the raster data and its offsets.
 
         :type raster: np.array
-        :type no_data: int
+        :type mask: np.array
+        :type row_off: int
+        :type col_off: int
+        :type points: np.array, optional
+        :type index_dtype: np.dtype, optional
 
         :return: Tuple of np.array containing the point cloud: (x, y, z).
         :rtype tuple
         """
-        y, x = np.where(raster != no_data)
-        z = np.extract(raster != no_data, raster)
+
+        # Flat indices of the valid data
+        index = np.flatnonzero(mask)
+        raster = np.ma.getdata(raster)
+        rows, cols = raster.shape[-2:]
+
+        if points is not None:
+            x, y, z = Translator.__point_columns(points, raster)
+
+            # Get the values, band by band
+            for values, band in zip(z.T if raster.ndim == 3 else [z],
+                                    raster if raster.ndim == 3 else [raster]):
+                Translator.__take(np.ravel(band), index, values)
+
+            np.divmod(index, cols, out=(y, x))
+
+        else:
+            # Get the values
+            if raster.ndim == 3:
+                z = Translator.__take_bands(raster, index)
+            else:
+                z = np.take(np.ravel(raster), index)
+
+            # Split the indices in rows and columns
+            if index_dtype is None:
+                index_dtype = Translator.__index_dtype(row_off + rows, col_off + cols)
+
+            y = np.empty(index.size, dtype=index_dtype)
+            x = np.empty(index.size, dtype=index_dtype)
+            np.divmod(index, cols, out=(y, x))
+
+        # Shift the coordinates to their position in the whole raster
+        if col_off:
+            x += col_off
+        if row_off:
+            y += row_off
 
         return x, y, z
 
     @staticmethod
-    def __affine_geo_transformation(x, y, gtr):
+    def __affine_geo_transformation(x, y, gtr, dtype=np.float64, chunk_size=1 << 16,
+                                    in_place=False):
         """
         Create affine geo-transformed x and y.
 
@@ -145,9 +984,18 @@ class Translator:
         distances. It replace the point cloud into their original
         space of coordinates.
 
+        The transformation is computed in place, in the arrays of the
+        pixel centers. Only the rotation terms use temporary arrays, of
+        at most "chunk_size" values.
+
         :param x: X-array of coordinates.
         :param y: Y-array of coordinates.
         :param gtr: Affine geo-transformation data.
+        :param dtype: Float type of the geo-transformed x and y.
+        :param chunk_size: Size of the temporary arrays used to apply the
+            rotation terms.
+        :param in_place: If True, x and y are already of the float "dtype"
+            (ie: the columns of the points): transform them in place.
 
         :return: gtr_x, gtr_y, the geo-transformed x and y, as np.array.
         :rtype tuple
@@ -155,14 +1003,50 @@ class Translator:
 
         # https://gdal.org/user/raster_data_model.html#affine-geotransform
         # Affine transformation rewritten for rasterio:
-        gtr_x = gtr[2] + (x + 0.5) * gtr[0] + (y + 0.5) * gtr[1]
-        gtr_y = gtr[5] + (x + 0.5) * gtr[3] + (y + 0.5) * gtr[4]
+        # gtr_x = gtr[2] + (x + 0.5) * gtr[0] + (y + 0.5) * gtr[1]
+        # gtr_y = gtr[5] + (x + 0.5) * gtr[3] + (y + 0.5) * gtr[4]
+        if in_place:
+            center_x = np.add(x, 0.5, out=x)
+            center_y = np.add(y, 0.5, out=y)
+        else:
+            center_x = np.add(x, 0.5, dtype=dtype)
+            center_y = np.add(y, 0.5, dtype=dtype)
+
+        # Without rotation, scale and shift the centers in place
+        if gtr[1] == 0 and gtr[3] == 0:
+            gtr_x = np.multiply(center_x, gtr[0], out=center_x)
+            gtr_x += gtr[2]
+
+            gtr_y = np.multiply(center_y, gtr[4], out=center_y)
+            gtr_y += gtr[5]
+
+            return gtr_x, gtr_y
+
+        # Transform the centers chunk by chunk, to bound the temporary arrays
+        buffer_x = np.empty(min(chunk_size, center_x.size), dtype=center_x.dtype)
+        buffer_y = np.empty_like(buffer_x)
+
+        for start in range(0, center_x.size, chunk_size):
+            chunk = slice(start, start + chunk_size)
+            chunk_x, chunk_y = center_x[chunk], center_y[chunk]
+
+            gtr_x = np.multiply(chunk_x, gtr[0], out=buffer_x[:chunk_x.size])
+            gtr_x += gtr[2]
+            gtr_x += np.multiply(chunk_y, gtr[1], out=buffer_y[:chunk_y.size])
+
+            # The y term is computed before the y centers are overwritten
+            term = np.multiply(chunk_y, gtr[4], out=buffer_y[:chunk_y.size])
+            gtr_y = np.multiply(chunk_x, gtr[3], out=chunk_y)
+            gtr_y += gtr[5]
+            gtr_y += term
+
+            chunk_x[...] = gtr_x
 
-        return gtr_x, gtr_y
+        return center_x, center_y
 
     @staticmethod
     def __round(x, y, z, decimal):
 
-        return np.around(x, decimal),\
-               np.around(y, decimal),\
-               np.around(z, decimal)
+        return np.around(x, decimal, out=x),\
+               np.around(y, decimal, out=y),\
+               np.around(z, decimal, out=z)
@@ -32,7 +32,6 @@ setup(
         "License :: OSI Approved :: MIT License",
         "Programming Language :: Python",
         "Programming Language :: Python :: 3",
-        "Programming Language :: Python :: 3.6",
         "Programming Language :: Python :: 3.7",
         "Programming Language :: Python :: 3.8",
         "Programming Language :: Python :: 3.9",
@@ -42,6 +41,9 @@ setup(
         "Topic :: Utilities"
     ],
     packages=["lidario", "lidario.io"],
+    python_requires=">=3.7",
     include_package_data=True,
-    install_requires=["pandas", "numpy", "rasterio", "plyfile", "pytz"]
+    install_requires=["pandas", "numpy", "rasterio", "plyfile", "pytz"],
+    extras_require={"arrow": ["pyarrow"]},
+    entry_points={"console_scripts": ["lidario=lidario.cli:main"]}
 )
@@ -0,0 +1,120 @@
+import asyncio
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import rasterio.env
+import lidario as lio
+from lidario.async_translator import AsyncTranslator
+
+
+TIF = "./tests/assets/1.tif"
+
+
+class AsyncTranslatorTestCase(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.expected = lio.Translator("tif", "np").translate(TIF)
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+        self.tiles = []
+        for index in range(4):
+            self.tiles.append(os.path.join(self.tmp.name, f"{index}.tif"))
+            shutil.copy(TIF, self.tiles[-1])
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_translate(self):
+        async def translate():
+            async with AsyncTranslator("tif", "np") as translator:
+                return await asyncio.gather(translator.translate(TIF),
+                                            translator.count_points(TIF))
+
+        result, count = asyncio.run(translate())
+
+        np.testing.assert_array_equal(result, self.expected)
+        self.assertEqual(count, len(self.expected))
+
+    def test_no_env_left(self):
+        async def translate(translator):
+            async with translator:
+                await translator.translate(TIF)
+
+                # The GDAL environment ends with the task, not the thread
+                return translator.executor.submit(rasterio.env.hasenv).result()
+
+        translator = AsyncTranslator("tif", "np", max_workers=1)
+        self.assertFalse(asyncio.run(translate(translator)))
+
+    def test_translate_iter(self):
+        async def translate():
+            async with AsyncTranslator("tif", "np", max_workers=3) as translator:
+                batches = [np.column_stack(points) async for points in
+                           translator.translate_iter(TIF, window_size=(100, 571))]
+
+                # Stop after the first window
+                stream = translator.translate_iter(TIF, window_size=100)
+                async for _ in stream:
+                    break
+                await stream.aclose()
+
+                return batches
+
+        np.testing.assert_array_equal(np.concatenate(asyncio.run(translate())), self.expected)
+
+    def test_backpressure(self):
+        async def translate(translator):
+            pending = []
+
+            async def watch():
+                while True:
+                    pending.append(translator.pending)
+                    await asyncio.sleep(0.001)
+
+            watcher = asyncio.ensure_future(watch())
+            results = await translator.translate_many(
+                self.tiles + ["missing.tif"], self.tmp.name, out_format="binary")
+            watcher.cancel()
+
+            return pending, results
+
+        translator = AsyncTranslator("tif", "ply", max_workers=2, max_pending=2)
+        pending, results = asyncio.run(translate(translator))
+        translator.executor.shutdown()
+
+        self.assertLessEqual(max(pending), 2)
+        self.assertEqual([tile.index for tile in results], list(range(5)))
+        self.assertTrue(all(tile.error is None for tile in results[:4]))
+        self.assertIsNotNone(results[4].error)
+
+    def test_cancel(self):
+        done = []
+
+        async def translate(translator):
+            task = asyncio.ensure_future(translator.translate_many(
+                self.tiles, self.tmp.name, progress=lambda tile, *_: done.append(tile)))
+
+            while not done:
+                await asyncio.sleep(0.001)
+            task.cancel()
+
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+            await translator.close()
+
+        asyncio.run(translate(AsyncTranslator("tif", "csv", max_workers=1, max_pending=1)))
+
+        # The tiles waiting for a slot are given up
+        saved = [name for name in os.listdir(self.tmp.name) if name.endswith(".csv")]
+        self.assertLess(len(saved), len(self.tiles))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stderr
+
+from lidario import cli
+
+
+TIF = "./tests/assets/1.tif"
+
+
+class CliTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.tiles = os.path.join(self.tmp.name, "tiles")
+        self.out_dir = os.path.join(self.tmp.name, "out")
+
+        os.mkdir(self.tiles)
+        for name in ("a.tif", "b.tif"):
+            shutil.copy(TIF, os.path.join(self.tiles, name))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def run_cli(self, *argv):
+        """Run the command, and return its exit code and its messages."""
+        stderr = io.StringIO()
+        with redirect_stderr(stderr):
+            code = cli.main(list(argv))
+
+        return code, stderr.getvalue()
+
+    def test_find_inputs(self):
+        pattern = os.path.join(self.tiles, "*.tif")
+        paths, unmatched = cli.find_inputs([self.tiles, pattern, "missing.tif"])
+
+        self.assertEqual([os.path.basename(path) for path in paths], ["a.tif", "b.tif"])
+        self.assertEqual(unmatched, ["missing.tif"])
+
+    def test_translate_directory(self):
+        code, messages = self.run_cli(self.tiles, "-t", "las", "-o", self.out_dir,
+                                      "--chunk-size", "256", "--dtype", "float32")
+
+        self.assertEqual(code, 0)
+        self.assertEqual(sorted(os.listdir(self.out_dir)), ["a.las", "b.las"])
+        self.assertIn("2 tiles translated (0 failed, 0 skipped, 0 cached), 751436 points", messages)
+
+    def test_skip_existing(self):
+        self.run_cli(os.path.join(self.tiles, "a.tif"), "-f", "gzip", "-o", self.out_dir)
+        code, messages = self.run_cli(self.tiles, "-f", "gzip", "-o", self.out_dir,
+                                      "--skip-existing", "--quiet")
+
+        self.assertEqual(code, 0)
+        self.assertEqual(sorted(os.listdir(self.out_dir)), ["a.csv.gz", "b.csv.gz"])
+        self.assertIn("1 tiles translated (0 failed, 1 skipped, 0 cached)", messages)
+
+    def test_cache_dir(self):
+        cache_dir = os.path.join(self.tmp.name, "cache")
+        self.run_cli(self.tiles, "-t", "npy", "-o", self.out_dir, "--cache-dir", cache_dir)
+        os.remove(os.path.join(self.out_dir, "a.npy"))
+
+        code, messages = self.run_cli(self.tiles, "-t", "npy", "-o", self.out_dir,
+                                      "--cache-dir", cache_dir)
+
+        self.assertEqual(code, 0)
+        self.assertEqual(sorted(os.listdir(self.out_dir)), ["a.npy", "b.npy"])
+        self.assertIn("a.tif: restored from the cache", messages)
+        self.assertIn("0 tiles translated (0 failed, 0 skipped, 2 cached)", messages)
+
+    def test_same_names(self):
+        other = os.path.join(self.tmp.name, "other")
+        os.mkdir(other)
+        shutil.copy(TIF, os.path.join(other, "a.tif"))
+
+        with self.assertRaises(ValueError):
+            cli.find_inputs([self.tiles, other])
+
+        # Nothing is translated, nor reported as skipped
+        code, messages = self.run_cli(self.tiles, other, "-o", self.out_dir, "--skip-existing")
+
+        self.assertEqual(code, 1)
+        self.assertIn("a.tif", messages)
+        self.assertFalse(os.path.exists(self.out_dir))
+
+    def test_unmatched_input(self):
+        code, messages = self.run_cli("missing.tif", "-o", self.out_dir)
+
+        self.assertEqual(code, 1)
+        self.assertIn("no tif file matches 'missing.tif'", messages)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import lidario as lio
+
+
+TIF = "./tests/assets/1.tif"
+
+
+class DatasetCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.paths = [os.path.join(self.tmp.name, f"{i}.tif") for i in range(3)]
+
+        for path in self.paths:
+            shutil.copy(TIF, path)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_open(self):
+        with lio.DatasetCache(maxsize=2) as cache:
+            first = cache.open(self.paths[0])
+            self.assertIs(cache.open(self.paths[0]), first)
+
+            # The least recently used dataset is closed
+            cache.open(self.paths[1])
+            cache.open(self.paths[2])
+            self.assertEqual(len(cache), 2)
+            self.assertNotIn(self.paths[0], cache)
+            self.assertTrue(first.closed)
+
+            last = cache.open(self.paths[2])
+
+        self.assertTrue(last.closed)
+        self.assertEqual(len(cache), 0)
+
+    def test_reopen_modified(self):
+        with lio.DatasetCache() as cache:
+            first = cache.open(self.paths[0])
+            metadata = cache.get_metadata(self.paths[0])
+
+            stat = os.stat(self.paths[0])
+            os.utime(self.paths[0], ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+            self.assertIsNot(cache.open(self.paths[0]), first)
+            self.assertTrue(first.closed)
+            self.assertEqual(cache.get_metadata(self.paths[0]), metadata)
+
+    def test_metadata_reader(self):
+        with lio.DatasetCache() as cache:
+            reader = lio.MetadataReader("tif", cache=cache)
+            metadata = reader.get_metadata(self.paths[0])
+
+            # The memoized metadata is a copy
+            metadata['nodata'] = 0
+            self.assertEqual(reader.get_metadata(self.paths[0])['nodata'], -9999)
+            self.assertIn(self.paths[0], cache)
+
+    def test_translator(self):
+        expected = lio.Translator("tif", "np").translate(TIF)
+
+        with lio.DatasetCache() as cache:
+            translator = lio.Translator("tif", "np", cache=cache)
+
+            for _ in range(2):
+                np.testing.assert_array_equal(translator.translate(self.paths[0]), expected)
+
+            batches = list(translator.translate_iter(self.paths[0]))
+            self.assertFalse(cache.open(self.paths[0]).closed)
+            self.assertEqual(sum(len(z) for _, _, z in batches), len(expected))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,183 @@
+import gzip
+import os
+import struct
+import subprocess
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+from plyfile import PlyData, PlyElement
+from affine import Affine
+from lidario.io import OutputHandler
+from lidario.io.las_writer import LAS_POINT_DTYPE
+from lidario.io.text_writer import write_text
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
+
+class OutputHandlerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.out_file = os.path.join(self.tmp.name, "points")
+
+        rng = np.random.default_rng(0)
+        self.x = rng.uniform(0, 1e5, 1000)
+        self.y = rng.uniform(0, 1e5, 1000)
+        self.z = rng.integers(0, 255, 1000).astype(np.uint8)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def __plyfile_bytes(self, text):
+        """Write the points with plyfile, and return the file content."""
+        array = np.array(list(zip(self.x, self.y, self.z)),
+                         dtype=[('x', 'f4'), ('y', 'f4'), ('z', 'f4')])
+        ply_file = os.path.join(self.tmp.name, "expected.ply")
+        element = self.out_file + ".ply"
+
+        PlyData([PlyElement.describe(array, element)], text=text,
+                byte_order='<').write(ply_file)
+
+        with open(ply_file, "rb") as file:
+            return file.read()
+
+    def __saved_bytes(self, out_format):
+        OutputHandler("ply").save(self.x, self.y, self.z, self.out_file,
+                                  out_format, False)
+
+        with open(self.out_file + ".ply", "rb") as file:
+            return file.read()
+
+    def test_lazy_imports(self):
+        # pandas and plyfile are imported by the savers which need them
+        code = "import sys, lidario; print([m for m in ('pandas', 'plyfile') if m in sys.modules])"
+        output = subprocess.run([sys.executable, "-c", code], stdout=subprocess.PIPE,
+                                universal_newlines=True, check=True).stdout
+        self.assertEqual(output.strip(), "[]")
+
+    def test_save_ply_binary(self):
+        self.assertEqual(self.__saved_bytes("binary"),
+                         self.__plyfile_bytes(text=False))
+
+    def test_save_ply_ascii(self):
+        self.assertEqual(self.__saved_bytes("ascii"),
+                         self.__plyfile_bytes(text=True))
+
+    def test_save_csv(self):
+        OutputHandler("csv").save(self.x, self.y, self.z, self.out_file,
+                                  "binary", False)
+
+        result = pd.read_csv(self.out_file + ".csv", float_precision="round_trip")
+        self.assertEqual(list(result.columns), ["x", "y", "z"])
+        np.testing.assert_array_equal(result.to_numpy(),
+                                      np.column_stack((self.x, self.y, self.z)))
+
+    def test_save_csv_gzip(self):
+        OutputHandler("csv").save(self.x, self.y, self.z, self.out_file,
+                                  "gzip", False, decimal=2)
+
+        result = pd.read_csv(self.out_file + ".csv.gz")
+        np.testing.assert_allclose(result["x"], self.x, atol=0.005)
+        np.testing.assert_array_equal(result["z"], self.z)
+
+        # The same text, at any compression level
+        write_text(self.out_file + ".gz", self.x, self.y, self.z, decimal=2,
+                   compression="gzip", compresslevel=1, buffer_size=100)
+        with gzip.open(self.out_file + ".gz", "rt") as fast, \
+                gzip.open(self.out_file + ".csv.gz", "rt") as default:
+            self.assertEqual(fast.read(), default.read().split("\n", 1)[1])
+
+    def test_save_xyz(self):
+        OutputHandler("xyz").save(self.x, self.y, self.z, self.out_file,
+                                  "binary", False, decimal=3)
+
+        with open(self.out_file + ".xyz") as file:
+            first = file.readline()
+
+        self.assertEqual(first, f"{self.x[0]:.3f} {self.y[0]:.3f} {self.z[0]}\n")
+
+    def test_save_las(self):
+        transform = Affine(1.0, 0.0, 0.0, 0.0, -1.0, 1e5)
+        chunks = [(self.x[:600], self.y[:600], self.z[:600]),
+                  (self.x[600:], self.y[600:], self.z[600:])]
+
+        OutputHandler("las").save_chunks(chunks, self.out_file, "binary",
+                                         False, transform=transform)
+
+        with open(self.out_file + ".las", "rb") as file:
+            header = file.read(227)
+            points = np.frombuffer(file.read(), dtype=LAS_POINT_DTYPE)
+
+        count, = struct.unpack_from("<I", header, 107)
+        scale = struct.unpack_from("<3d", header, 131)
+        offset = struct.unpack_from("<3d", header, 155)
+        max_x, min_x = struct.unpack_from("<2d", header, 179)
+
+        self.assertEqual(header[:4], b"LASF")
+        self.assertEqual(count, 1000)
+        self.assertEqual(scale, (0.01, 0.01, 0.001))
+        self.assertEqual(offset, (0.0, 1e5, 0.0))
+        self.assertAlmostEqual(max_x, self.x.max(), places=2)
+        self.assertAlmostEqual(min_x, self.x.min(), places=2)
+        np.testing.assert_allclose(points['X'] * scale[0] + offset[0], self.x, atol=0.005)
+        np.testing.assert_array_equal(points['Z'] * scale[2], self.z)
+
+        # A rotated transformation has the scale of its pixel size
+        rotated = Affine.translation(0.0, 1e5) * Affine.rotation(90) * Affine.scale(1.0, -1.0)
+        OutputHandler("las").save(self.x, self.y, self.z, self.out_file, "binary",
+                                  False, transform=rotated)
+
+        with open(self.out_file + ".las", "rb") as file:
+            self.assertEqual(struct.unpack_from("<3d", file.read(227), 131), scale)
+
+    def test_save_las_range(self):
+        # 3000 with 6 decimals does not fit in an int32
+        z = np.full(10, 3000.0)
+
+        with self.assertRaises(ValueError):
+            OutputHandler("las").save(self.x[:10], self.y[:10], z, self.out_file,
+                                      "binary", False, decimal=6)
+
+    def test_save_dataframe(self):
+        result = OutputHandler("df").save(self.x, self.y, self.z, None, None, False)
+
+        self.assertEqual(list(result.columns), ["x", "y", "z"])
+        self.assertEqual(result["z"].dtype, np.uint8)
+        np.testing.assert_array_equal(result["x"], self.x)
+
+    def test_save_npy_chunks(self):
+        index = np.arange(1000, dtype=np.int16)
+        chunks = [(index[:100].astype(np.int8),) * 3, (index[100:],) * 3]
+
+        # The int16 chunk would wrap around in the int8 file
+        with self.assertRaises(ValueError):
+            OutputHandler("npy").save_chunks(chunks, self.out_file, None, False, count=1000)
+
+    @unittest.skipIf(pq is None, "pyarrow is not installed")
+    def test_save_arrow(self):
+        result = OutputHandler("arrow").save(self.x, self.y, self.z, None, None, False)
+
+        self.assertEqual(result.column_names, ["x", "y", "z"])
+        self.assertTrue(np.shares_memory(result["x"].to_numpy(), self.x))
+
+    @unittest.skipIf(pq is None, "pyarrow is not installed")
+    def test_save_parquet(self):
+        chunks = [(self.x[:600], self.y[:600], self.z[:600]),
+                  (self.x[600:], self.y[600:], self.z[600:])]
+
+        OutputHandler("parquet").save_chunks(chunks, self.out_file, "zstd", False)
+
+        result = pq.ParquetFile(self.out_file + ".parquet")
+        self.assertEqual(result.metadata.num_row_groups, 2)
+        self.assertEqual(result.metadata.row_group(0).column(0).compression, "ZSTD")
+        np.testing.assert_array_equal(result.read()["y"].to_numpy(), self.y)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+from affine import Affine
+import lidario as lio
+
+
+TIF = "./tests/assets/1.tif"
+
+
+class PointCloudTestCase(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # Exclude the low values, to leave holes in the grid
+        translator = lio.Translator("tif", "pointcloud")
+        cls.point_cloud = translator.translate(TIF, no_data=(0, 20))
+
+    def test_grid_indices(self):
+        point_cloud = self.point_cloud
+        valid = lio.Translator("tif", "np", affine_transform=False).translate(
+            TIF, no_data=(0, 20))
+
+        np.testing.assert_array_equal(point_cloud.col, valid[:, 0])
+        np.testing.assert_array_equal(point_cloud.row, valid[:, 1])
+        np.testing.assert_array_equal(
+            point_cloud.grid[point_cloud.row - point_cloud.row_off,
+                             point_cloud.col - point_cloud.col_off],
+            np.arange(len(point_cloud)))
+
+    def test_queries(self):
+        point_cloud = self.point_cloud
+        rng = np.random.default_rng(0)
+
+        for qx, qy, r, k in zip(rng.uniform(78000, 103000, 20),
+                                rng.uniform(1412000, 1440300, 20),
+                                rng.uniform(0, 300, 20), rng.integers(1, 40, 20)):
+
+            distances = np.hypot(point_cloud.x - qx, point_cloud.y - qy)
+
+            # Compare to a brute force search
+            knn_distances, _ = point_cloud.knn(qx, qy, k)
+            np.testing.assert_allclose(knn_distances, np.sort(distances)[:k])
+            np.testing.assert_array_equal(point_cloud.radius(qx, qy, r),
+                                          np.flatnonzero(distances <= r))
+
+            inside = (point_cloud.x >= qx - r) & (point_cloud.x <= qx) & \
+                     (point_cloud.y >= qy - r) & (point_cloud.y <= qy)
+            np.testing.assert_array_equal(point_cloud.bbox(qx - r, qy - r, qx, qy),
+                                          np.flatnonzero(inside))
+
+    def test_rotated_transform(self):
+        transform = Affine.rotation(30) * Affine.scale(2, -3)
+        cols, rows = (axis.ravel() for axis in np.indices((40, 50)))
+        x, y = transform * (cols + 0.5, rows + 0.5)
+
+        point_cloud = lio.PointCloud(x, y, np.zeros(len(x)), transform)
+        np.testing.assert_array_equal(point_cloud.col, cols)
+        np.testing.assert_array_equal(point_cloud.row, rows)
+
+        distances = np.hypot(x - 10, y - 10)
+        np.testing.assert_allclose(point_cloud.knn(10, 10, 7)[0], np.sort(distances)[:7])
+
+    def test_rounded_points(self):
+        # Rounded to integers, four 0.5 pixels share the same coordinates
+        raster = np.arange(100, dtype=np.float32).reshape(10, 10)
+        transform = Affine(0.5, 0, 0, 0, -0.5, 5)
+        translator = lio.Translator("array", "pointcloud")
+
+        for kwargs in ({}, {"threads": 2}, {"window_size": 3}):
+            point_cloud = translator.translate((raster, transform), decimal=0, **kwargs)
+
+            self.assertEqual(len(point_cloud), 100)
+            np.testing.assert_array_equal(np.sort(point_cloud.bbox(-1, -1, 6, 6)),
+                                          np.arange(100))
+            np.testing.assert_array_equal(np.sort(point_cloud.z), raster.ravel())
+
+        # The points rounded several pixels away are found across the
+        # borders of their pixels
+        point_cloud = translator.translate((raster, Affine(0.1, 0, 0, 0, -0.1, 1)), decimal=0)
+        self.assertEqual(point_cloud.margin, 5)
+        rng = np.random.default_rng(0)
+
+        with tempfile.TemporaryDirectory() as out_dir:
+            out_file = os.path.join(out_dir, "points")
+            point_cloud.save_index(out_file)
+            loaded = lio.PointCloud.load_index(out_file + ".index.npz", point_cloud.x,
+                                               point_cloud.y, point_cloud.z)
+            self.assertEqual(loaded.margin, 5)
+
+        for left, bottom in rng.uniform(-0.5, 1.5, (50, 2)):
+            right, top = left + rng.uniform(0, 1), bottom + rng.uniform(0, 1)
+            inside = (point_cloud.x >= left) & (point_cloud.x <= right) & \
+                     (point_cloud.y >= bottom) & (point_cloud.y <= top)
+
+            np.testing.assert_array_equal(point_cloud.bbox(left, bottom, right, top),
+                                          np.flatnonzero(inside))
+
+            distances = np.hypot(point_cloud.x - left, point_cloud.y - bottom)
+            np.testing.assert_allclose(point_cloud.knn(left, bottom, 7)[0],
+                                       np.sort(distances)[:7])
+
+    def test_save_index(self):
+        with tempfile.TemporaryDirectory() as out_dir:
+            out_file = os.path.join(out_dir, "points")
+            translator = lio.Translator("tif", "pointcloud")
+            translator.translate(TIF, out_file, "csv", no_data=(0, 20))
+
+            self.assertTrue(os.path.exists(out_file + ".index.npz"))
+
+            # Query the points of the csv file with the saved index
+            points = pd.read_csv(out_file + ".csv", float_precision="round_trip")
+            point_cloud = lio.PointCloud.load_index(
+                out_file + ".index.npz", points.x.values, points.y.values, points.z.values)
+
+        np.testing.assert_array_equal(point_cloud.row, self.point_cloud.row)
+        np.testing.assert_array_equal(point_cloud.col, self.point_cloud.col)
+        self.assertEqual(point_cloud.transform, self.point_cloud.transform)
+        np.testing.assert_array_equal(point_cloud.knn(80000, 1430000, 5)[1],
+                                      self.point_cloud.knn(80000, 1430000, 5)[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import rasterio
+import lidario as lio
+from affine import Affine
+
+
+TIF = "./tests/assets/1.tif"
+
+
+class RasterizerTestCase(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        with rasterio.open(TIF) as reader:
+            cls.raster, cls.transform = reader.read(1), reader.transform
+
+    def test_round_trip(self):
+        point_cloud = lio.Translator("tif", "np").translate(TIF)
+        raster = lio.Rasterizer("numpy").rasterize(point_cloud, self.transform)
+
+        np.testing.assert_array_equal(raster, self.raster)
+
+    def test_round_trip_files(self):
+        with tempfile.TemporaryDirectory() as out_dir:
+            out_file = os.path.join(out_dir, "points")
+
+            for output_type, extension in (("las", ".las"), ("csv", ".csv"), ("npy", ".npy")):
+                lio.Translator("tif", output_type).translate(TIF, out_file)
+                raster = lio.Rasterizer(output_type).rasterize(
+                    out_file + extension, self.transform, self.raster.shape, chunk_size=10000)
+
+                np.testing.assert_array_equal(raster, self.raster)
+
+    def test_aggregates(self):
+        # Three points in the pixel (0, 0), one in the pixel (1, 1)
+        points = np.array([[0.2, 0.2, 4], [0.5, 0.5, 1], [0.8, 0.8, 7], [1.5, 1.5, 2]])
+        expected = {"last": 7, "mean": 4, "min": 1, "max": 7, "count": 3}
+
+        for aggregate, value in expected.items():
+            raster = lio.Rasterizer("numpy", aggregate, nodata=0).rasterize(
+                points, Affine.identity(), (2, 3), chunk_size=2)
+
+            np.testing.assert_array_equal(
+                raster, [[value, 0, 0], [0, 1 if aggregate == "count" else 2, 0]])
+
+    def test_save_geotiff(self):
+        chunks = lio.Translator("tif", "np").translate_iter(TIF, window_size=100)
+        rasterizer = lio.Rasterizer("chunks", "max", metadata=True)
+
+        with tempfile.TemporaryDirectory() as out_dir:
+            out_file = os.path.join(out_dir, "raster")
+            raster, metadata = rasterizer.rasterize(chunks, self.transform, self.raster.shape,
+                                                    out_file, crs="EPSG:2240")
+
+            with rasterio.open(out_file + ".tif") as reader:
+                np.testing.assert_array_equal(reader.read(1), self.raster)
+                self.assertEqual(reader.profile["compress"], "deflate")
+                self.assertTrue(reader.profile["tiled"])
+
+        # The uint8 points are promoted to hold -9999
+        self.assertEqual(metadata["dtype"], "int16")
+        self.assertEqual(metadata["nodata"], -9999)
+
+    def test_multi_band(self):
+        bands = np.stack([self.raster, self.raster * 2]).astype(np.float32)
+        point_cloud = lio.Translator("array", "dataframe").translate(
+            (bands, self.transform), band=[1, 2])
+
+        raster = lio.Rasterizer("dataframe", "mean").rasterize(point_cloud, self.transform)
+        np.testing.assert_array_equal(raster, bands)
+
+    def test_chunks_shape(self):
+        chunks = lio.Translator("tif", "np").translate_iter(TIF)
+
+        with self.assertRaises(ValueError):
+            lio.Rasterizer("chunks").rasterize(chunks, self.transform)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import lidario as lio
+
+
+TIF = "./tests/assets/1.tif"
+
+
+class ResultCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.tif = os.path.join(self.tmp.name, "1.tif")
+        shutil.copy(TIF, self.tif)
+
+        self.cache = lio.ResultCache(os.path.join(self.tmp.name, "cache"))
+        self.out_file = os.path.join(self.tmp.name, "output")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def translator(self, output_type="npy", **kwargs):
+        return lio.Translator("tif", output_type, result_cache=self.cache, **kwargs)
+
+    def test_restore(self):
+        expected = lio.Translator("tif", "np").translate(self.tif)
+
+        self.translator().translate(self.tif, self.out_file)
+        self.assertEqual(len(self.cache), 1)
+
+        # Restored without translation, not even a profiled one
+        os.remove(self.out_file + ".npy")
+        translator = self.translator(profile="time")
+        result = translator.translate(self.tif, self.out_file)
+
+        self.assertIsNone(translator.stats)
+        np.testing.assert_array_equal(result, expected)
+
+    def test_changed_parameters(self):
+        self.translator("csv").translate(self.tif, self.out_file)
+        self.translator("csv").translate(self.tif, self.out_file, decimal=1)
+        self.translator("csv").translate(self.tif, self.out_file, "gzip")
+
+        self.assertEqual(len(self.cache), 3)
+
+        # The defaults and the given values are the same parameters
+        self.translator("csv").translate(self.tif, self.out_file, "binary", decimal=None)
+        self.assertEqual(len(self.cache), 3)
+
+    def test_changed_input(self):
+        params = ["tif", "npy"]
+        key = self.cache.key(self.tif, params)
+        self.assertEqual(self.cache.key(self.tif, params), key)
+
+        # A touch changes the modification time, not the content
+        os.utime(self.tif, ns=(0, 0))
+        self.assertNotEqual(self.cache.key(self.tif, params), key)
+
+        cache = lio.ResultCache(os.path.join(self.tmp.name, "cache"), hash_content=True)
+        key = cache.key(self.tif, params)
+        os.utime(self.tif, ns=(10 ** 9, 10 ** 9))
+        self.assertEqual(cache.key(self.tif, params), key)
+
+        # Not a file: not cached
+        self.assertIsNone(cache.key(os.path.join(self.tmp.name, "missing.tif"), params))
+
+    def test_eviction(self):
+        self.translator("csv").translate(self.tif, self.out_file)
+        size = self.cache.size
+
+        self.cache.max_size = 2 * size
+        for decimal in (1, 2):
+            self.translator("csv").translate(self.tif, self.out_file, decimal=decimal)
+
+        # The least recently used entry is evicted
+        self.assertEqual(len(self.cache), 2)
+        self.assertLessEqual(self.cache.size, self.cache.max_size)
+        self.assertFalse(self.cache.restore(
+            self.cache.key(self.tif, ["tif", "csv", True, {}]), self.out_file))
+
+        # The manifest is shared between the runs
+        cache = lio.ResultCache(self.cache.directory)
+        self.assertEqual(len(cache), 2)
+
+        cache.clear()
+        self.assertEqual(os.listdir(cache.directory), ["manifest.json"])
+
+    def test_translate_geometries(self):
+        geometry = {'type': 'Polygon', 'coordinates': [[
+            (80000, 1430000), (81000, 1430000), (80500, 1435000), (80000, 1430000)]]}
+
+        # The geometries are translated with the profile and result cache
+        translator = self.translator(profile="time")
+        translator.translate_geometries(self.tif, [geometry], self.out_file)
+        self.assertIsNotNone(translator.stats)
+        self.assertEqual(len(self.cache), 1)
+
+        # Restored without translation
+        os.remove(self.out_file + "_0.npy")
+        translator = self.translator(profile="time")
+        translator.translate_geometries(self.tif, [geometry], self.out_file)
+        self.assertIsNone(translator.stats)
+        self.assertTrue(os.path.exists(self.out_file + "_0.npy"))
+
+    def test_translate_many(self):
+        tiles = [self.tif, os.path.join(self.tmp.name, "2.tif")]
+        shutil.copy(TIF, tiles[1])
+        out_dir = os.path.join(self.tmp.name, "out")
+        os.mkdir(out_dir)
+
+        translator = self.translator(profile="time")
+        translator.translate_many(tiles[:1], out_dir, workers=1)
+        results = translator.translate_many(tiles, out_dir, workers=1)
+
+        self.assertIsNone(results[0].stats)
+        self.assertIsNotNone(results[1].stats)
+        self.assertEqual(len(self.cache), 2)
+        np.testing.assert_array_equal(results[0].result, results[1].result)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,12 +1,473 @@
-
+import os
+import struct
+import tempfile
+import tracemalloc
 import unittest
 
+import numpy as np
+import rasterio
+import rasterio.mask
+from affine import Affine
+import lidario as lio
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
+
+TIF = "./tests/assets/1.tif"
+BOUNDS = (80000, 1430000, 81000, 1435000)
+
 
 class TranslatorTestCase(unittest.TestCase):
 
     def test_empty(self):
         return True
 
+    def test_translate_iter(self):
+        translator = lio.Translator("tif", "np")
+        expected = translator.translate(TIF)
+
+        # Regular windows are read row by row: same points, same order
+        batches = list(translator.translate_iter(TIF, window_size=(100, 571)))
+        result = np.column_stack([np.concatenate(c) for c in zip(*batches)])
+        np.testing.assert_array_equal(result, expected)
+
+    def test_translate_iter_windows(self):
+        translator = lio.Translator("tif", "np", affine_transform=False)
+        expected = translator.translate(TIF)
+
+        # Square windows change the order, not the points
+        batches = list(translator.translate_iter(TIF, window_size=64))
+        result = np.column_stack([np.concatenate(c) for c in zip(*batches)])
+        self.assertEqual(len(batches), 99)
+        np.testing.assert_array_equal(
+            np.unique(result, axis=0), np.unique(expected, axis=0))
+
+    def test_translate_iter_block_windows(self):
+        translator = lio.Translator("tif", "np")
+        expected = translator.translate(TIF)
+
+        batches = list(translator.translate_iter(TIF))
+        result = np.column_stack([np.concatenate(c) for c in zip(*batches)])
+        np.testing.assert_array_equal(result, expected)
+
+    def test_translate_chunked(self):
+        translator = lio.Translator("tif", "csv")
+
+        with tempfile.TemporaryDirectory() as out_dir:
+            expected = os.path.join(out_dir, "expected")
+            result = os.path.join(out_dir, "result")
+
+            translator.translate(TIF, expected)
+            translator.translate(TIF, result, chunked=True, window_size=(100, 571))
+
+            with open(expected + ".csv") as file, open(result + ".csv") as chunked:
+                self.assertEqual(file.read(), chunked.read())
+
+    def test_translate_npy(self):
+        expected = lio.Translator("tif", "np").translate(TIF)
+        translator = lio.Translator("tif", "npy")
+
+        self.assertEqual(translator.count_points(TIF, window_size=100), len(expected))
+
+        with tempfile.TemporaryDirectory() as out_dir:
+            out_file = os.path.join(out_dir, "points")
+
+            result = translator.translate(TIF, out_file, chunked=True, window_size=(100, 571))
+            self.assertIsInstance(result, np.memmap)
+            np.testing.assert_array_equal(result, expected)
+
+            result = translator.translate(TIF, out_file, "structured")
+            np.testing.assert_array_equal(result['z'], expected[:, 2])
+            np.testing.assert_array_equal(np.load(out_file + ".npy", mmap_mode="r"), result)
+            del result
+
+            # The pixel indices of the last windows fit the type of the file
+            raster = (np.ones((40000, 1), np.uint8), Affine(1, 0, 0, 0, -1, 0))
+            result = lio.Translator("array", "npy", affine_transform=False).translate(
+                raster, out_file, chunked=True, window_size=100)
+            np.testing.assert_array_equal(result[-1], [0, 39999, 1])
+            del result
+
+    @unittest.skipIf(pq is None, "pyarrow is not installed")
+    def test_translate_arrow_chunked(self):
+        expected = lio.Translator("tif", "np", affine_transform=False).translate(TIF)
+
+        # The windows of pixel indices are saved with a single schema
+        table = lio.Translator("tif", "arrow", affine_transform=False).translate(
+            TIF, chunked=True, window_size=(64, 571))
+        np.testing.assert_array_equal(np.column_stack([table[name].to_numpy()
+                                                       for name in "xyz"]), expected)
+
+        with tempfile.TemporaryDirectory() as out_dir:
+            out_file = os.path.join(out_dir, "points")
+            lio.Translator("tif", "parquet", affine_transform=False).translate(
+                TIF, out_file, chunked=True, window_size=(64, 571))
+
+            table = pq.read_table(out_file + ".parquet")
+            self.assertEqual(table.schema.field("x").type, "int16")
+            np.testing.assert_array_equal(table["y"].to_numpy(), expected[:, 1])
+
+    def test_translate_bands(self):
+        with rasterio.open(TIF) as reader:
+            profile = reader.profile
+            dsm = reader.read(1)
+
+        intensity = (255 - dsm).astype(np.uint8)
+        intensity[:10] = 0
+        profile.update(count=2, nodata=0)
+
+        with tempfile.TemporaryDirectory() as out_dir:
+            path = os.path.join(out_dir, "bands.tif")
+            with rasterio.open(path, "w", **profile) as writer:
+                writer.write(np.stack((dsm, intensity)))
+
+            # A pixel is translated if it has data in all the bands
+            translator = lio.Translator("tif", "np")
+            valid = ((dsm != 0) & (intensity != 0)).ravel()
+            expected = translator.translate(path, band=1, no_data=-1)[valid]
+
+            result = translator.translate(path, band=[1, 2])
+            np.testing.assert_array_equal(result[:, :3], expected)
+            np.testing.assert_array_equal(result[:, 3], intensity.ravel()[valid])
+
+            threaded = translator.translate(path, band=[1, 2], threads=2)
+            np.testing.assert_array_equal(threaded, result)
+
+            chunked = lio.Translator("tif", "df").translate(path, band=[1, 2], chunked=True)
+            self.assertEqual(list(chunked.columns), ["x", "y", "z1", "z2"])
+            np.testing.assert_array_equal(chunked.to_numpy(), result)
+
+            # A list of a single band is written to a LAS file, not two
+            out_file = os.path.join(out_dir, "points")
+            for chunked in (False, True):
+                lio.Translator("tif", "las").translate(path, out_file, band=[1],
+                                                       chunked=chunked)
+
+                with open(out_file + ".las", "rb") as file:
+                    self.assertEqual(struct.unpack_from("<I", file.read(227), 107)[0],
+                                     np.count_nonzero(dsm))
+
+            with self.assertRaises(ValueError):
+                lio.Translator("tif", "las").translate(path, out_file, band=[1, 2])
+
+    def test_translate_decimate(self):
+        translator = lio.Translator("tif", "np")
+
+        result = translator.translate(TIF, decimate=4, resampling="average")
+        self.assertEqual(len(result), 164 * 143)
+        # The pixels cover the whole raster
+        pixel = (40 * 571 / 143, 40 * 658 / 164)
+        np.testing.assert_allclose(result[0, :2], [78999 + pixel[0] / 2, 1439268 - pixel[1] / 2])
+
+        # Window by window, on the resampled grid
+        chunked = translator.translate(TIF, decimate=4, resampling="average",
+                                       chunked=True, window_size=(50, 143))
+        np.testing.assert_array_equal(chunked, result)
+        self.assertEqual(translator.count_points(TIF, decimate=4), len(result))
+
+        # The same grid, from the size of the pixels
+        by_resolution = translator.translate(TIF, resolution=160, resampling="average")
+        np.testing.assert_array_equal(by_resolution, result)
+
+        upsampled = translator.translate(TIF, decimate=0.5)
+        self.assertEqual(len(upsampled), 4 * 571 * 658)
+
+    def test_translate_decimate_mask(self):
+        raster = np.arange(16.0).reshape(4, 4)
+        raster[0, 0] = -9999
+        translator = lio.Translator("mask", "np", affine_transform=False)
+
+        # The no data values are ignored by the aggregation
+        result = translator.translate((raster, Affine.identity()), decimate=2,
+                                      resampling="average")
+        np.testing.assert_allclose(result[:, 2], [(1 + 4 + 5) / 3, 4.5, 10.5, 12.5])
+
+        result = translator.translate((raster, Affine.identity()), decimate=2,
+                                      resampling="max")
+        np.testing.assert_array_equal(result[:, 2], [5, 7, 13, 15])
+
+    def test_translate_decimate_nodata(self):
+        # A tif without nodata tag: the -9999 default and the given no
+        # data value are ignored by the aggregation, as for an array
+        raster = np.arange(16.0, dtype=np.float32).reshape(4, 4)
+        raster[0, 0], raster[3, 3] = -9999, 0
+        transform = Affine(1, 0, 0, 0, -1, 4)
+        translator = lio.Translator("tif", "np", affine_transform=False)
+
+        with tempfile.TemporaryDirectory() as out_dir:
+            tif = os.path.join(out_dir, "raster.tif")
+            with rasterio.open(tif, "w", driver="GTiff", height=4, width=4, count=1,
+                               dtype="float32", transform=transform,
+                               crs="EPSG:2240") as writer:
+                writer.write(raster, 1)
+
+            for no_data, expected in ((None, [(1 + 4 + 5) / 3, 4.5, 10.5, 35 / 4]),
+                                      (0, [(-9999 + 1 + 4 + 5) / 4, 4.5, 10.5, 35 / 3])):
+                for kwargs in ({}, {"chunked": True, "window_size": 1}):
+                    result = translator.translate(tif, decimate=2, resampling="average",
+                                                  no_data=no_data, **kwargs)
+                    np.testing.assert_allclose(result[:, 2], expected)
+
+                    array = lio.Translator("array", "np", affine_transform=False).translate(
+                        (raster, transform), decimate=2, resampling="average", no_data=no_data)
+                    np.testing.assert_array_equal(result, array)
+
+    def test_translate_decimate_rotated(self):
+        # A rotated tif without nodata tag is resampled on its own grid
+        raster = np.random.default_rng(0).uniform(0, 100, (40, 60)).astype(np.float32)
+        raster[::7, ::5] = -9999
+        transform = Affine.translation(1000, 2000) * Affine.rotation(30) * Affine.scale(2, -2)
+        translator = lio.Translator("tif", "np")
+
+        with tempfile.TemporaryDirectory() as out_dir:
+            tif = os.path.join(out_dir, "rotated.tif")
+            with rasterio.open(tif, "w", driver="GTiff", height=40, width=60, count=1,
+                               dtype="float32", transform=transform,
+                               crs="EPSG:2240") as writer:
+                writer.write(raster, 1)
+
+            for no_data in (None, -9999):
+                result = translator.translate(tif, decimate=2, resampling="average",
+                                              no_data=no_data)
+                array = lio.Translator("array", "np").translate(
+                    (raster, transform), decimate=2, resampling="average", no_data=no_data)
+
+                self.assertEqual(len(result), 20 * 30)
+                np.testing.assert_allclose(result, array, rtol=1e-6)
+
+    def test_translate_bounds(self):
+        translator = lio.Translator("tif", "np")
+        full = translator.translate(TIF)
+
+        # Pixels of 40 units: keep the centers within half a pixel of the bounds
+        left, bottom, right, top = 80000, 1430000, 81000, 1435000
+        inside = (full[:, 0] > left - 20) & (full[:, 0] < right + 20) & \
+                 (full[:, 1] > bottom - 20) & (full[:, 1] < top + 20)
+
+        result = translator.translate(TIF, bounds=(left, bottom, right, top))
+        np.testing.assert_array_equal(result, full[inside])
+
+        # Out of the raster
+        result = translator.translate(TIF, bounds=(0, 0, 1, 1))
+        self.assertEqual(result.shape, (0, 3))
+
+    def test_translate_geometry(self):
+        translator = lio.Translator("tif", "np")
+        geometry = {'type': 'Polygon', 'coordinates': [[
+            (80000, 1430000), (81000, 1430000), (80500, 1435000), (80000, 1430000)]]}
+
+        with rasterio.open(TIF) as dataset:
+            image, _ = rasterio.mask.mask(dataset, [geometry], crop=True, filled=False)
+
+        result = translator.translate(TIF, geometry=geometry)
+        self.assertEqual(len(result), image.count())
+        np.testing.assert_array_equal(np.sort(result[:, 2]), np.sort(image.compressed()))
+
+        # Same points window by window, and for each geometry
+        chunked = translator.translate(TIF, geometry=geometry, chunked=True, window_size=16)
+        results = translator.translate_geometries(TIF, [geometry, geometry])
+        self.assertEqual(len(chunked), len(result))
+        np.testing.assert_array_equal(np.unique(chunked, axis=0), np.unique(result, axis=0))
+        np.testing.assert_array_equal(results[1], result)
+
+        with self.assertRaises(ValueError):
+            lio.Translator("mask", "np").translate((image, None), geometry=geometry)
+
+    def test_translate_geometry_rotated(self):
+        # Edges through the centers of the pixels: the windows mask the
+        # same pixels as a single read
+        raster = np.random.default_rng(0).uniform(0, 1, (200, 300)).astype(np.float32)
+        transform = Affine.translation(1000, 2000) * Affine.rotation(30) * Affine.scale(0.7, -0.7)
+        geometry = {'type': 'Polygon', 'coordinates': [[
+            transform * pixel for pixel in ((10.5, 8.5), (250.5, 20.5), (150.5, 180.5), (10.5, 8.5))]]}
+        translator = lio.Translator("tif", "np")
+
+        with tempfile.TemporaryDirectory() as out_dir:
+            tif = os.path.join(out_dir, "rotated.tif")
+            with rasterio.open(tif, "w", driver="GTiff", height=200, width=300, count=1,
+                               dtype="float32", transform=transform,
+                               crs="EPSG:2240") as writer:
+                writer.write(raster, 1)
+
+            result = translator.translate(tif, geometry=geometry)
+            chunked = translator.translate(tif, geometry=geometry, chunked=True, window_size=7)
+
+        self.assertEqual(len(chunked), len(result))
+        np.testing.assert_array_equal(np.unique(chunked, axis=0), np.unique(result, axis=0))
+
+    def test_translate_nan_no_data(self):
+        raster = np.array([[1.0, np.nan], [np.nan, 4.0]])
+        translator = lio.Translator("mask", "np", affine_transform=False)
+
+        result = translator.translate((raster, None), no_data=np.nan)
+        np.testing.assert_array_equal(result, [[0, 0, 1.0], [1, 1, 4.0]])
+
+    def test_translate_range_no_data(self):
+        raster = np.array([[1, -9999], [-5000, 4]])
+        translator = lio.Translator("mask", "np", affine_transform=False)
+
+        result = translator.translate((raster, None), no_data=(-9999, -1))
+        np.testing.assert_array_equal(result, [[0, 0, 1], [1, 1, 4]])
+
+    def test_translate_threads(self):
+        raster = np.random.default_rng(0).uniform(-1, 1, (101, 37))
+        raster[raster < -0.5] = -9999
+        transform = Affine(0.3, 0.1, 1234.567, 0.05, -0.3, 9876.54321)
+        translator = lio.Translator("mask", "np")
+
+        expected = translator.translate((raster, transform), decimal=3)
+        result = translator.translate((raster, transform), decimal=3, threads=3)
+        np.testing.assert_array_equal(result, expected)
+
+        # A subset without rows is translated serially, to any output
+        for output_type in ("np", "dataframe", "list", "pointcloud"):
+            empty = lio.Translator("tif", output_type).translate(
+                TIF, bounds=(0, 0, 1, 1), threads=2)
+            self.assertEqual(len(empty), 0)
+
+    def test_translate_affine(self):
+        raster = np.arange(12.0).reshape(3, 4)
+        transform = Affine(0.3, 0.1, 1234.567, 0.05, -0.3, 9876.54321)
+        y, x = np.indices(raster.shape).reshape(2, -1)
+
+        result = lio.Translator("mask", "np").translate((raster, transform))
+        np.testing.assert_array_equal(result[:, 0], 1234.567 + (x + 0.5) * 0.3 + (y + 0.5) * 0.1)
+        np.testing.assert_array_equal(result[:, 1], 9876.54321 + (x + 0.5) * 0.05 + (y + 0.5) * -0.3)
+
+    def test_translate_dtype(self):
+        translator = lio.Translator("tif", "np")
+        expected = translator.translate(TIF)
+
+        x, y, z = next(translator.translate_iter(TIF, window_size=1000, dtype="float32"))
+        self.assertEqual((x.dtype, y.dtype), (np.float32, np.float32))
+        np.testing.assert_allclose(x, expected[:, 0], rtol=1e-7)
+
+        # Without affine transformation, pixel indices fit in an int16
+        translator = lio.Translator("tif", "np", affine_transform=False)
+        x, y, z = next(translator.translate_iter(TIF, window_size=1000))
+        self.assertEqual((x.dtype, y.dtype), (np.int16, np.int16))
+
+        # The same type in all the windows, from the size of the whole grid
+        dtypes = {(x.dtype, y.dtype) for x, y, _ in translator.translate_iter(TIF, window_size=64)}
+        self.assertEqual(dtypes, {(np.dtype(np.int16), np.dtype(np.int16))})
+
+    def test_translate_profile(self):
+        self.assertIsNone(lio.Translator("tif", "np").stats)
+
+        translator = lio.Translator("tif", "np", profile=True)
+        with self.assertLogs("lidario", level="DEBUG") as logs:
+            translator.translate(TIF, decimal=2)
+
+        stats = translator.stats
+        self.assertEqual(list(stats),
+                         ["read", "points", "transform", "round", "save", "total"])
+        self.assertEqual(stats["read"]["pixels"], 571 * 658)
+        self.assertEqual(stats["save"]["points"], 571 * 658)
+        self.assertEqual(len(logs.records), 6)
+        self.assertGreater(stats["total"]["peak_mib"], 0)
+
+        # The chunks are counted once, over all the windows
+        translator.translate(TIF, chunked=True, window_size=100)
+        self.assertEqual(translator.stats["points"]["calls"], 42)
+        self.assertEqual(translator.stats["points"]["points"], 571 * 658)
+        self.assertLessEqual(translator.stats["save"]["seconds"],
+                             translator.stats["total"]["seconds"])
+
+    def test_translate_many(self):
+        translator = lio.Translator("tif", "np")
+        expected = translator.translate(TIF)
+        calls = []
+
+        results = translator.translate_many(
+            [TIF, "missing.tif", TIF], workers=2, max_in_flight=2,
+            progress=lambda tile, done, total: calls.append((done, total)))
+
+        self.assertEqual([tile.index for tile in results], [0, 1, 2])
+        self.assertEqual(calls, [(1, 3), (2, 3), (3, 3)])
+        np.testing.assert_array_equal(results[2].result, expected)
+        self.assertIsNone(results[0].error)
+        self.assertIsNotNone(results[1].error)
+
+    def test_translate_many_files(self):
+        translator = lio.Translator("tif", "csv")
+
+        with tempfile.TemporaryDirectory() as out_dir:
+            results = translator.translate_many([TIF], out_dir, workers=1)
+            self.assertEqual(results[0].out_file, os.path.join(out_dir, "1"))
+            self.assertTrue(os.path.exists(os.path.join(out_dir, "1.csv")))
+
+    def test_translate_array(self):
+        expected = lio.Translator("tif", "np").translate(TIF, no_data=0, bounds=BOUNDS)
+
+        with rasterio.open(TIF) as reader:
+            image, transform = reader.read(), reader.transform
+
+        # A single band image is translated from a view of the array
+        raster, _ = lio.io.InputHandler("array").load(True, (image, transform, 0))
+        self.assertEqual(raster.shape, image.shape[1:])
+        self.assertTrue(np.shares_memory(raster, image))
+
+        translator = lio.Translator("array", "np")
+        result = translator.translate((image, transform, 0), bounds=BOUNDS)
+        np.testing.assert_array_equal(result, expected)
+
+        batches = list(translator.translate_iter((image[0], transform, 0), bounds=BOUNDS))
+        np.testing.assert_array_equal(np.column_stack(batches[0]), expected)
+
+    def test_translate_bytes(self):
+        expected = lio.Translator("tif", "np").translate(TIF)
+
+        with open(TIF, "rb") as file:
+            content = file.read()
+
+        np.testing.assert_array_equal(lio.Translator("bytes", "np").translate(content), expected)
+
+        with rasterio.io.MemoryFile(content) as memory_file:
+            result = lio.Translator("memoryfile", "np").translate(memory_file, chunked=True)
+
+            np.testing.assert_array_equal(result, expected)
+            self.assertFalse(memory_file.closed)
+
+    def test_translate_single_row_mask(self):
+        with rasterio.open(TIF) as reader:
+            image, transform = reader.read(window=((0, 1), (0, 571))), reader.transform
+
+        result = lio.Translator("mask", "np").translate((image, transform))
+        self.assertEqual(result.shape, (571, 3))
+
+    def test_translate_preallocated(self):
+        raster = np.random.default_rng(0).uniform(-1, 1, (500, 400))
+        raster[raster < -0.4] = -9999
+        transform = Affine(0.3, 0.1, 1234.567, 0.05, -0.3, 9876.54321)
+        translator = lio.Translator("array", "np")
+
+        # Same points as the separate x, y and z arrays of translate_iter
+        expected = np.column_stack(next(translator.translate_iter((raster, transform))))
+        count = len(expected)
+
+        for threads in (None, 3):
+            tracemalloc.start()
+            result = translator.translate((raster, transform), threads=threads)
+            blocks = [trace.size for trace in tracemalloc.take_snapshot().traces
+                      if trace.size >= count]
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+            np.testing.assert_array_equal(result, expected)
+            self.assertTrue(result.flags.c_contiguous and result.flags.owndata)
+
+            # A single array of points is allocated, and returned
+            self.assertEqual(blocks, [result.nbytes])
+
+            # Besides the points, the peak holds the flat indices of the
+            # points, the mask of the pixels and two chunk buffers.
+            # Measured: 1.55 times the points (serial), 1.25 (threads),
+            # 2.34 with separate arrays and np.column_stack
+            self.assertLess(peak, result.nbytes + 8 * count + raster.size + 16 * (1 << 16))
+
 
 if __name__ == '__main__':
     unittest.main()